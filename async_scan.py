@@ -0,0 +1,115 @@
+import asyncio
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from scan_engine import DEFAULT_RULES, FILE_CATEGORIES, ScanCancelled, TreeBuilder
+
+# Listings and stat batches in flight at once. Network mounts answer each metadata call in milliseconds but
+# serve many of them in parallel, so the walk is bound by latency rather than by the disk
+DEFAULT_CONCURRENCY = int(os.environ.get('ANALYZER_ASYNC_CONCURRENCY', '64'))
+# Stats per executor call: one round trip to a thread for a batch instead of one per entry
+STAT_BATCH = 16
+
+
+def _list_names(path, rules, prefix, scheduler, dev):
+    # Names, types and rule matches only (from the directory entry itself, no stat); the stats are sent out in batches
+    listing, pending = [], []
+    if scheduler is not None:
+        with scheduler.slot(path, dev):
+            entries = list(os.scandir(path))
+    else:
+        with os.scandir(path) as it:
+            entries = list(it)
+    for entry in entries:
+        try:
+            directory = entry.is_dir(follow_symlinks=False)
+            rule = rules.match(entry.name if rules.names_only else entry.path[prefix:], directory) if rules is not None else -1
+            if rule >= 0 and not rules.negated[rule]:
+                listing.append((entry.name, entry.path, directory, None, rule))
+            elif directory or entry.is_file():
+                pending.append(len(listing))
+                listing.append((entry.name, entry.path, directory, entry, rule))
+        except Exception as e:
+            listing.append((entry.name, entry.path, None, e, -1))
+    return listing, pending
+
+
+def _stat_entries(rows):
+    # Folders are not followed, files are (a link to a file counts as that file), as in scan_engine._read_dir
+    stats = []
+    for name, path, directory, entry, rule in rows:
+        try:
+            stats.append((name, path, directory, entry.stat(follow_symlinks=not directory), rule))
+        except Exception as e:
+            stats.append((name, path, None, e, -1))
+    return stats
+
+
+async def scan_tree_async(root, rules=DEFAULT_RULES, categories=FILE_CATEGORIES, progress=None, progress_interval=0.5, cancel=None, top_n=10,
+                          profile=None, max_depth=None, max_entries=None, time_budget=None, relative_to=None, concurrency=None, scheduler=None,
+                          checkpoint=None):
+    # scan_tree for high-latency mounts: up to `concurrency` listings and as many stat batches are in flight at once,
+    # each blocking call on its own executor thread. Folders are consumed in frontier order, so the snapshot is the same.
+    concurrency = concurrency or DEFAULT_CONCURRENCY
+    walk = profile.start('walk') if profile is not None else None
+    tree = TreeBuilder(root, rules, categories, progress, progress_interval, top_n, max_depth, max_entries, time_budget, relative_to, checkpoint)
+    frontier = tree.frontier
+    loop = asyncio.get_running_loop()
+    executor = ThreadPoolExecutor(concurrency * 2, thread_name_prefix='scan-async')
+    listings = asyncio.Semaphore(concurrency)
+    stats = asyncio.Semaphore(concurrency)
+
+    async def stat_batch(rows):
+        async with stats:
+            return await loop.run_in_executor(executor, _stat_entries, rows)
+
+    async def list_folder(item):
+        async with listings:
+            listing, pending = await loop.run_in_executor(executor, _list_names, item[1], tree.rules_at(item[3]), tree.prefix, scheduler, item[4])
+        batches = [pending[start:start + STAT_BATCH] for start in range(0, len(pending), STAT_BATCH)]
+        results = await asyncio.gather(*(stat_batch([listing[i] for i in batch]) for batch in batches))
+        for batch, rows in zip(batches, results):
+            for i, row in zip(batch, rows):
+                listing[i] = row
+        return listing
+
+    # Twice as many folders as listing slots are started ahead, so their stat batches overlap the next listings
+    window = concurrency * 2
+    ahead = deque()
+    try:
+        while frontier:
+            if cancel is not None and cancel.is_set():
+                raise ScanCancelled(tree.root)
+            tree.save_checkpoint()
+            if tree.out_of_budget():
+                break
+            while len(ahead) < min(len(frontier), window):
+                item = frontier[len(ahead)]
+                ahead.append(asyncio.ensure_future(list_folder(item)) if tree.listable(item) else None)
+            task = ahead.popleft()
+            item = frontier[0]
+            if task is None:
+                tree.skip(item)
+                continue
+            try:
+                listing = await task
+            except Exception as e:
+                tree.fail(item, e)
+                continue
+            tree.add(item, listing)
+    except BaseException:
+        tree.save_checkpoint(force=True)
+        raise
+    finally:
+        for task in ahead:
+            if task is not None:
+                task.cancel()
+        await asyncio.gather(*(task for task in ahead if task is not None), return_exceptions=True)
+        executor.shutdown(wait=False, cancel_futures=True)
+    return tree.snapshot(profile, walk, concurrency=concurrency, devices=scheduler.stats() if scheduler is not None else None)
+
+
+def async_scan_tree(root, **options):
+    # Blocking entry point for the CLI, the apps and the service, which do not run an event loop of their own
+    return asyncio.run(scan_tree_async(root, **options))
@@ -0,0 +1,83 @@
+import os
+import time
+from contextlib import contextmanager
+
+# Metadata round trip added to every listing and stat, roughly a Docker Desktop bind mount or an SMB share on a LAN
+DEFAULT_LATENCY_MS = float(os.environ.get('ANALYZER_BENCH_LATENCY_MS', '0.5'))
+
+
+class SlowEntry:
+    # os.DirEntry whose type comes free with the listing (d_type) while stat() pays a round trip, as on a network mount
+    __slots__ = ('_entry', '_delay', 'name', 'path')
+
+    def __init__(self, entry, delay):
+        self._entry = entry
+        self._delay = delay
+        self.name = entry.name
+        self.path = entry.path
+
+    def is_dir(self, follow_symlinks=True):
+        return self._entry.is_dir(follow_symlinks=follow_symlinks)
+
+    def is_file(self, follow_symlinks=True):
+        return self._entry.is_file(follow_symlinks=follow_symlinks)
+
+    def is_symlink(self):
+        return self._entry.is_symlink()
+
+    def inode(self):
+        return self._entry.inode()
+
+    def stat(self, follow_symlinks=True):
+        time.sleep(self._delay)
+        return self._entry.stat(follow_symlinks=follow_symlinks)
+
+    def __fspath__(self):
+        return self.path
+
+
+class SlowScandir:
+    def __init__(self, entries, delay):
+        self._entries = entries
+        self._delay = delay
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return SlowEntry(next(self._entries), self._delay)
+
+    def close(self):
+        self._entries.close()
+
+
+@contextmanager
+def latency_fs(latency_ms=None):
+    # Patches os.scandir, os.stat and os.lstat process-wide so any engine walking a local tree sees a slow mount.
+    # time.sleep releases the GIL like a blocking syscall does, so threaded and asyncio walkers overlap the waits.
+    delay = (DEFAULT_LATENCY_MS if latency_ms is None else latency_ms) / 1000
+    real_scandir, real_stat, real_lstat = os.scandir, os.stat, os.lstat
+
+    def scandir(path='.'):
+        time.sleep(delay)
+        return SlowScandir(real_scandir(path), delay)
+
+    def stat(path, *args, **kwargs):
+        time.sleep(delay)
+        return real_stat(path, *args, **kwargs)
+
+    def lstat(path, *args, **kwargs):
+        time.sleep(delay)
+        return real_lstat(path, *args, **kwargs)
+
+    os.scandir, os.stat, os.lstat = scandir, stat, lstat
+    try:
+        yield delay
+    finally:
+        os.scandir, os.stat, os.lstat = real_scandir, real_stat, real_lstat
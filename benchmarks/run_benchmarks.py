@@ -0,0 +1,253 @@
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic_tree import SIZE_LABELS, default_root, ensure_tree, parse_entries, tree_params
+
+
+def read_proc_io():
+    try:
+        with open('/proc/self/io', encoding='ascii') as f:
+            return {key: int(value) for key, value in (line.split(': ') for line in f)}
+    except OSError:
+        return {}
+
+
+def web_analyzer(workdir):
+    os.environ['ANALYZER_DATA_DIR'] = workdir
+    import streamlit_app
+    return streamlit_app.analyzer
+
+
+def desktop_app(workdir):
+    os.environ['ANALYZER_DATA_DIR'] = workdir
+    import main
+    # Exporters report through dialogs and open the browser; neither can block an unattended run
+    for name in ('showinfo', 'showwarning', 'showerror'):
+        setattr(main.messagebox, name, lambda *args, **kwargs: None)
+    main.webbrowser.open = lambda *args, **kwargs: True
+    app = main.FileSizeAnalyzer()
+    app.root.withdraw()
+    return app
+
+
+def prepared_app(tree, workdir):
+    app = desktop_app(workdir)
+    app.selected_folder = tree
+    app.files_data, _ = app.get_file_sizes()
+    return app
+
+
+def case_scan_tree(tree, workdir):
+    from scan_engine import scan_tree
+    return lambda: scan_tree(tree)
+
+
+def case_get_folder_size(tree, workdir):
+    from scan_engine import get_folder_size
+    return lambda: get_folder_size(tree)
+
+
+def case_scan_tree_latency(tree, workdir):
+    from latency_fs import latency_fs
+    from scan_engine import scan_tree
+
+    def run():
+        with latency_fs():
+            scan_tree(tree)
+    return run
+
+
+def case_async_scan_latency(tree, workdir):
+    from async_scan import async_scan_tree
+    from latency_fs import latency_fs
+
+    def run():
+        with latency_fs():
+            async_scan_tree(tree)
+    return run
+
+
+def case_analyze_folder_contents(tree, workdir):
+    analyzer = web_analyzer(workdir)
+    return lambda: analyzer.analyze_folder_contents(tree)
+
+
+def _snapshot(tree):
+    from scan_engine import scan_tree
+    return scan_tree(tree)
+
+
+def case_filter_top_level(tree, workdir):
+    from datetime import datetime
+    analyzer = web_analyzer(workdir)
+    snapshot = _snapshot(tree)
+    extensions = analyzer.file_categories['Images'] + analyzer.file_categories['Documents']
+    return lambda: analyzer.analyze_folder_contents(tree, extensions, (0.0, 1.0), (datetime(2000, 1, 1), datetime(2100, 1, 1)), 'file', snapshot=snapshot)
+
+
+def case_filter_tree(tree, workdir):
+    from snapshot_query import group_entries, query_entries
+    snapshot = _snapshot(tree)
+
+    def run():
+        query_entries(snapshot, 'File', 'Images', None, 'Size', True, 0, 100)
+        query_entries(snapshot, 'All', 'All', 'file_0001', 'Name', False, 0, 100)
+        group_entries(snapshot, 'Extension')
+    return run
+
+
+def case_export_to_excel(tree, workdir):
+    app = desktop_app(workdir)
+    app.selected_folder = tree
+    return app.export_to_excel
+
+
+def case_export_to_pdf(tree, workdir):
+    return prepared_app(tree, workdir).export_to_pdf
+
+
+def case_export_to_html(tree, workdir):
+    return prepared_app(tree, workdir).export_to_html
+
+
+def case_calculate_compression_savings(tree, workdir):
+    from scan_engine import CATEGORY_NAMES
+    app = desktop_app(workdir)
+    snapshot = _snapshot(tree)
+    files = [(int(size) / (1024 ** 3), CATEGORY_NAMES[category]) for size, category, is_dir in zip(snapshot.size, snapshot.category, snapshot.is_dir) if not is_dir]
+
+    def run():
+        for size_gb, category in files:
+            app.calculate_compression_savings(size_gb, category)
+    return run
+
+
+CASES = {
+    'scan_tree': case_scan_tree,
+    'get_folder_size': case_get_folder_size,
+    'scan_tree_latency': case_scan_tree_latency,
+    'async_scan_latency': case_async_scan_latency,
+    'analyze_folder_contents': case_analyze_folder_contents,
+    'filter_top_level': case_filter_top_level,
+    'filter_tree': case_filter_tree,
+    'export_to_excel': case_export_to_excel,
+    'export_to_pdf': case_export_to_pdf,
+    'export_to_html': case_export_to_html,
+    'calculate_compression_savings': case_calculate_compression_savings
+}
+# Cases that drive the Tk app need a display; they are reported as skipped without one
+DESKTOP_CASES = {'export_to_excel', 'export_to_pdf', 'export_to_html', 'calculate_compression_savings'}
+
+
+def run_child(case, tree, workdir):
+    before_files = set(os.listdir(REPO_DIR))
+    try:
+        run = CASES[case](tree, workdir)
+        io_before, usage_before = read_proc_io(), resource.getrusage(resource.RUSAGE_SELF)
+        started = time.perf_counter()
+        run()
+        wall = time.perf_counter() - started
+        io_after, usage_after = read_proc_io(), resource.getrusage(resource.RUSAGE_SELF)
+        result = {
+            'status': 'ok',
+            'wall_s': round(wall, 4),
+            'cpu_user_s': round(usage_after.ru_utime - usage_before.ru_utime, 4),
+            'cpu_sys_s': round(usage_after.ru_stime - usage_before.ru_stime, 4),
+            'peak_rss_mb': round(usage_after.ru_maxrss / (1024 if platform.system() != 'Darwin' else 1024 ** 2), 1),
+            'read_syscalls': io_after.get('syscr', 0) - io_before.get('syscr', 0) if io_after else None,
+            'write_syscalls': io_after.get('syscw', 0) - io_before.get('syscw', 0) if io_after else None
+        }
+    except Exception as e:
+        skipped = case in DESKTOP_CASES and (isinstance(e, ImportError) or 'display' in str(e).lower())
+        result = {'status': 'skipped' if skipped else 'error', 'error': f'{type(e).__name__}: {e}'}
+    finally:
+        # Exporters write their reports next to main.py
+        for name in set(os.listdir(REPO_DIR)) - before_files:
+            if '_analysis_' in name and name.endswith(('.xlsx', '.pdf', '.html')):
+                os.remove(os.path.join(REPO_DIR, name))
+    print(json.dumps(result))
+
+
+def strace_counts(path):
+    calls = {}
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            fields = line.split()
+            if len(fields) >= 5 and fields[0].replace('.', '').isdigit() and fields[-1] != 'total':
+                calls[fields[-1]] = int(fields[3])
+    return calls
+
+
+def run_case(case, tree, manifest, use_strace):
+    workdir = tempfile.mkdtemp(prefix='analyzer_bench_')
+    command = [sys.executable, os.path.abspath(__file__), '--child', case, '--tree', tree, '--workdir', workdir]
+    strace_path = os.path.join(workdir, 'strace.txt')
+    if use_strace:
+        command = ['strace', '-f', '-c', '-o', strace_path] + command
+    try:
+        completed = subprocess.run(command, capture_output=True, text=True, cwd=REPO_DIR)
+        lines = [line for line in completed.stdout.splitlines() if line.startswith('{')]
+        result = json.loads(lines[-1]) if lines else {'status': 'error', 'error': completed.stderr.strip().splitlines()[-1:] or 'no output'}
+        if use_strace and os.path.exists(strace_path):
+            # Counted for the whole child process, interpreter start-up and setup included
+            calls = strace_counts(strace_path)
+            result['syscalls'] = sum(calls.values())
+            result['syscalls_by_name'] = dict(sorted(calls.items(), key=lambda item: -item[1])[:15])
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    entries = manifest['params']['entries']
+    if result.get('status') == 'ok':
+        result['entries_per_s'] = round(entries / result['wall_s']) if result['wall_s'] else None
+    return {'case': case, 'entries': entries, **result}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run the analyzer benchmarks on synthetic trees.')
+    parser.add_argument('--sizes', default='10k', help='comma separated entry counts: ' + ', '.join(SIZE_LABELS) + ' or numbers')
+    parser.add_argument('--cases', default=','.join(CASES), help='comma separated cases (default: all)')
+    parser.add_argument('--base', default=default_root(), help='where synthetic trees are generated (default: tmpfs)')
+    parser.add_argument('--output', help='write results as JSON lines to this file (default: stdout)')
+    parser.add_argument('--strace', action='store_true', help='count syscalls with strace -c (must be installed)')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    parser.add_argument('--tree', help=argparse.SUPPRESS)
+    parser.add_argument('--workdir', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.child:
+        run_child(args.child, args.tree, args.workdir)
+        return 0
+    if args.strace and shutil.which('strace') is None:
+        parser.error('strace is not installed')
+
+    out = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    try:
+        for size in args.sizes.split(','):
+            params = tree_params(parse_entries(size))
+            started = time.perf_counter()
+            tree, manifest = ensure_tree(params, args.base)
+            print(f"tree {size}: {tree} ready in {time.perf_counter() - started:.1f} s", file=sys.stderr)
+            for case in args.cases.split(','):
+                result = run_case(case, tree, manifest, args.strace)
+                result.update({'size': size, 'python': platform.python_version(), 'platform': platform.platform(), 'timestamp': time.time()})
+                out.write(json.dumps(result) + '\n')
+                out.flush()
+                print(f"  {case}: {result.get('status')} {result.get('wall_s', '')}", file=sys.stderr)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,127 @@
+import argparse
+import json
+import math
+import os
+import random
+import shutil
+import sys
+
+DEFAULT_EXTENSIONS = {
+    '.txt': 8, '.pdf': 4, '.docx': 3, '.jpg': 12, '.png': 6, '.mp4': 2, '.mkv': 1, '.mp3': 3, '.zip': 2,
+    '.7z': 1, '.py': 6, '.js': 5, '.html': 2, '.xlsx': 2, '.csv': 2, '.pptx': 1, '.log': 8, '.bin': 4, '': 4
+}
+SIZE_LABELS = {'10k': 10_000, '100k': 100_000, '1m': 1_000_000, '10m': 10_000_000}
+
+
+def default_root():
+    base = '/dev/shm' if os.path.isdir('/dev/shm') else os.environ.get('TMPDIR', '/tmp')
+    return os.path.join(base, 'analyzer_bench')
+
+
+def parse_entries(value):
+    return SIZE_LABELS.get(value.lower()) or int(value)
+
+
+def tree_params(entries, depth=4, fanout=8, size_median=32 * 1024, size_sigma=2.0, max_size=8 * 1024 ** 3,
+                extensions=None, hardlink_ratio=0.01, symlink_ratio=0.01, seed=1234):
+    return {
+        'entries': entries, 'depth': depth, 'fanout': fanout, 'size_median': size_median, 'size_sigma': size_sigma,
+        'max_size': max_size, 'extensions': extensions or DEFAULT_EXTENSIONS, 'hardlink_ratio': hardlink_ratio,
+        'symlink_ratio': symlink_ratio, 'seed': seed
+    }
+
+
+def _directory_plan(entries, depth, fanout):
+    # Breadth-first directory layout, capped so that directories stay around a tenth of all entries
+    max_dirs = max(entries // 10, 1)
+    dirs = [('', 0)]
+    position = 0
+    while position < len(dirs) and len(dirs) < max_dirs:
+        path, level = dirs[position]
+        position += 1
+        if level >= depth:
+            continue
+        for child in range(fanout):
+            if len(dirs) >= max_dirs:
+                break
+            dirs.append((os.path.join(path, f'dir_{level + 1}_{child:03d}') if path else f'dir_1_{child:03d}', level + 1))
+    return [path for path, _ in dirs]
+
+
+def generate_tree(root, params):
+    rng = random.Random(params['seed'])
+    extensions = list(params['extensions'])
+    weights = [params['extensions'][extension] for extension in extensions]
+    dirs = _directory_plan(params['entries'], params['depth'], params['fanout'])
+    for path in dirs[1:]:
+        os.makedirs(os.path.join(root, path), exist_ok=True)
+    os.makedirs(root, exist_ok=True)
+    file_count = params['entries'] - len(dirs) + 1
+    counts = {'dirs': len(dirs) - 1, 'files': 0, 'hardlinks': 0, 'symlinks': 0, 'bytes': 0}
+    mu = math.log(params['size_median'])
+    previous = []
+    for number in range(file_count):
+        directory = os.path.join(root, dirs[number % len(dirs)])
+        roll = rng.random()
+        extension = rng.choices(extensions, weights)[0]
+        path = os.path.join(directory, f'file_{number:08d}{extension}')
+        if previous and roll < params['hardlink_ratio']:
+            os.link(previous[rng.randrange(len(previous))], path)
+            counts['hardlinks'] += 1
+        elif previous and roll < params['hardlink_ratio'] + params['symlink_ratio']:
+            target = previous[rng.randrange(len(previous))] if rng.random() < 0.5 else os.path.dirname(previous[rng.randrange(len(previous))])
+            os.symlink(target, path)
+            counts['symlinks'] += 1
+        else:
+            size = min(int(rng.lognormvariate(mu, params['size_sigma'])), params['max_size'])
+            # Sparse files: the logical size is set without writing data, so tmpfs holds only the inodes
+            with open(path, 'wb') as f:
+                f.truncate(size)
+            counts['files'] += 1
+            counts['bytes'] += size
+            if len(previous) < 4096:
+                previous.append(path)
+    return counts
+
+
+def ensure_tree(params, base=None):
+    base = base or default_root()
+    name = f"tree_{params['entries']}_{params['seed']}"
+    root = os.path.join(base, name)
+    manifest_path = root + '.json'
+    try:
+        with open(manifest_path, encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest['params'] == params and os.path.isdir(root):
+            return root, manifest
+    except (OSError, ValueError, KeyError):
+        pass
+    shutil.rmtree(root, ignore_errors=True)
+    counts = generate_tree(root, params)
+    manifest = {'root': root, 'params': params, 'counts': counts}
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    return root, manifest
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Generate a deterministic synthetic folder tree for benchmarks.')
+    parser.add_argument('entries', type=parse_entries, help='number of entries (10k, 1m, 10m or a number)')
+    parser.add_argument('--base', default=default_root(), help='parent folder (default: /dev/shm/analyzer_bench)')
+    parser.add_argument('--depth', type=int, default=4)
+    parser.add_argument('--fanout', type=int, default=8)
+    parser.add_argument('--size-median', type=int, default=32 * 1024, help='median file size in bytes (log-normal)')
+    parser.add_argument('--size-sigma', type=float, default=2.0)
+    parser.add_argument('--hardlinks', type=float, default=0.01, help='fraction of files created as hardlinks')
+    parser.add_argument('--symlinks', type=float, default=0.01, help='fraction of files created as symlinks')
+    parser.add_argument('--seed', type=int, default=1234)
+    args = parser.parse_args(argv)
+    params = tree_params(args.entries, args.depth, args.fanout, args.size_median, args.size_sigma,
+                         hardlink_ratio=args.hardlinks, symlink_ratio=args.symlinks, seed=args.seed)
+    root, manifest = ensure_tree(params, args.base)
+    json.dump(manifest, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,167 @@
+import hashlib
+import threading
+from collections import Counter, OrderedDict
+from io import BytesIO
+
+import numpy as np
+
+RENDER_TARGETS = {
+    'screen': {'dpi': 80, 'figsize': (16, 5.5)},
+    'print': {'dpi': 300, 'figsize': (20, 6)}
+}
+CHART_STYLE = 'seaborn-v0_8'
+
+
+def snapshot_hash(files_data, snapshot=None):
+    digest = hashlib.blake2b(digest_size=16)
+    for item in files_data:
+        line = f"{item['Type']}\0{item['Full Path']}\0{item['Size (GB)']}\0{item['Extension']}\n"
+        digest.update(line.encode('utf-8', 'backslashreplace'))
+    if snapshot is not None:
+        # Rollup charts cover the whole tree, which the rounded top-level rows do not: exact sizes and extension counts
+        # go into the key too. A live snapshot keeps its creation time, so its columns are hashed rather than trusted.
+        rollups = snapshot.rollups
+        digest.update(f"{snapshot.root}\0{snapshot.created}\0{len(snapshot)}\0{'/'.join(rollups.extensions)}\n".encode('utf-8', 'backslashreplace'))
+        for column in (snapshot.total, snapshot.file_count, rollups.extension_count, rollups.extension_bytes):
+            digest.update(np.ascontiguousarray(column).data)
+    return digest.hexdigest()
+
+
+def compute_chart_aggregates(files_data, max_types=8, max_folders=20, rollups=None):
+    # With the scan's rollups the file types cover the whole tree and cost O(extensions); only folders come from the rows
+    extension_counts = Counter()
+    folders = []
+    for item in files_data:
+        if item['Type'] == 'File' and rollups is None:
+            extension_counts[item['Extension']] += 1
+        elif item['Type'] == 'Folder':
+            folders.append((item['Size (GB)'], item['Name']))
+    if rollups is not None:
+        extension_counts = Counter({row['extension'] or '(none)': row['files'] for row in rollups.extension_table()})
+    file_types = extension_counts.most_common()
+    if len(file_types) > max_types:
+        file_types = file_types[:max_types] + [('Others', sum(count for _, count in file_types[max_types:]))]
+    folders.sort(key=lambda folder: folder[0], reverse=True)
+    return {
+        'file_types': file_types,
+        'folders': [(name, size) for size, name in folders[:max_folders]],
+        'extension_count': len(extension_counts),
+        'folder_count': len(folders)
+    }
+
+
+class ChartEngine:
+    def __init__(self, max_entries=32):
+        self.max_entries = max_entries
+        self._aggregates = OrderedDict()
+        self._images = OrderedDict()
+        self._lock = threading.Lock()
+        # matplotlib is imported on first use so the desktop app starts without it
+        import matplotlib.style
+        self._style = dict(matplotlib.style.library.get(CHART_STYLE, {}))
+
+    def _remember(self, cache, key, value):
+        with self._lock:
+            cache[key] = value
+            cache.move_to_end(key)
+            while len(cache) > self.max_entries:
+                cache.popitem(last=False)
+
+    def _lookup(self, cache, key):
+        with self._lock:
+            value = cache.get(key)
+            if value is not None:
+                cache.move_to_end(key)
+            return value
+
+    def get_aggregates(self, snapshot_key, files_data, rollups=None):
+        key = (snapshot_key, rollups is not None)
+        aggregates = self._lookup(self._aggregates, key)
+        if aggregates is None:
+            aggregates = compute_chart_aggregates(files_data, rollups=rollups)
+            self._remember(self._aggregates, key, aggregates)
+        return aggregates
+
+    def render_png(self, snapshot_key, files_data, title, target='screen', rollups=None):
+        key = (snapshot_key, rollups is not None, title, target)
+        image = self._lookup(self._images, key)
+        if image is None:
+            aggregates = self.get_aggregates(snapshot_key, files_data, rollups)
+            image = self._render(aggregates, title, RENDER_TARGETS[target])
+            self._remember(self._images, key, image)
+        return image
+
+    def save_png(self, snapshot_key, files_data, title, output_path, target='print', rollups=None):
+        with open(output_path, 'wb') as f:
+            f.write(self.render_png(snapshot_key, files_data, title, target, rollups))
+        return output_path
+
+    def _render(self, aggregates, title, settings):
+        import matplotlib
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+        with matplotlib.rc_context(self._style):
+            fig = Figure(figsize=settings['figsize'])
+            FigureCanvasAgg(fig)
+            ax1, ax2, ax3 = fig.subplots(1, 3)
+            fig.suptitle(f'{title}\nFile Analysis Charts', fontsize=16, fontweight='bold', y=0.95)
+            self._draw_file_types(ax1, aggregates['file_types'])
+            self._draw_top_folders(ax2, aggregates['folders'][:10])
+            self._draw_heatmap(fig, ax3, aggregates['folders'])
+            fig.tight_layout()
+            buffer = BytesIO()
+            fig.savefig(buffer, format='png', dpi=settings['dpi'], bbox_inches='tight', facecolor='white')
+        return buffer.getvalue()
+
+    def _draw_file_types(self, ax, file_types):
+        ax.set_title('📄 File Types Distribution', fontsize=14, fontweight='bold', pad=20)
+        if not file_types:
+            ax.text(0.5, 0.5, 'No files found', ha='center', va='center', transform=ax.transAxes, fontsize=12)
+            return
+        import matplotlib
+
+        labels = [label for label, _ in file_types]
+        values = [count for _, count in file_types]
+        colors = matplotlib.colormaps['Set3'](np.linspace(0, 1, len(values)))
+        _, _, autotexts = ax.pie(values, labels=labels, autopct='%1.1f%%', startangle=90, colors=colors)
+        for autotext in autotexts:
+            autotext.set_color('white')
+            autotext.set_fontweight('bold')
+
+    def _draw_top_folders(self, ax, folders):
+        ax.set_title('📂 Top 10 Largest Folders', fontsize=14, fontweight='bold', pad=20)
+        if not folders:
+            ax.text(0.5, 0.5, 'No folders found', ha='center', va='center', transform=ax.transAxes, fontsize=12)
+            return
+        import matplotlib
+
+        sizes = [size for _, size in folders]
+        bars = ax.barh(range(len(folders)), sizes, color=matplotlib.colormaps['viridis'](np.linspace(0, 1, len(folders))))
+        ax.set_yticks(range(len(folders)))
+        ax.set_yticklabels([name[:20] + '...' if len(name) > 20 else name for name, _ in folders])
+        ax.set_xlabel('Size (GB)', fontweight='bold')
+        for bar, size in zip(bars, sizes):
+            ax.text(bar.get_width() + 0.01, bar.get_y() + bar.get_height() / 2, f'{size:.2f} GB', va='center', fontweight='bold')
+        ax.invert_yaxis()
+
+    def _draw_heatmap(self, fig, ax, folders):
+        ax.set_title('🔥 Folder Size Heat Map', fontsize=14, fontweight='bold', pad=20)
+        if not folders:
+            ax.text(0.5, 0.5, 'No folders found', ha='center', va='center', transform=ax.transAxes, fontsize=12)
+            return
+        grid_size = int(np.ceil(np.sqrt(len(folders))))
+        heatmap_data = np.zeros(grid_size * grid_size)
+        heatmap_data[:len(folders)] = [size for _, size in folders]
+        heatmap_data = heatmap_data.reshape(grid_size, grid_size)
+        im = ax.imshow(heatmap_data, cmap='magma', aspect='auto')
+        cbar = fig.colorbar(im, ax=ax, shrink=0.8)
+        cbar.set_label('Size (GB)', fontweight='bold')
+        threshold = heatmap_data.max() * 0.5
+        for i, (name, size) in enumerate(folders):
+            if size > 0:
+                label = name[:15] + '...' if len(name) > 15 else name
+                ax.text(i % grid_size, i // grid_size, f'{label}\n{size:.2f} GB', ha='center', va='center', fontsize=8,
+                        fontweight='bold', color='white' if size > threshold else 'black')
+        ax.set_xticks([])
+        ax.set_yticks([])
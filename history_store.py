@@ -0,0 +1,192 @@
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from snapshot_store import DEFAULT_DATA_DIR
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS roots (id INTEGER PRIMARY KEY, path TEXT NOT NULL UNIQUE);
+CREATE TABLE IF NOT EXISTS scans (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    root_id INTEGER NOT NULL,
+    created REAL NOT NULL,
+    total_size INTEGER NOT NULL,
+    entries INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS scans_by_root ON scans (root_id, id);
+CREATE TABLE IF NOT EXISTS folders (
+    id INTEGER PRIMARY KEY,
+    root_id INTEGER NOT NULL,
+    path TEXT NOT NULL,
+    depth INTEGER NOT NULL,
+    UNIQUE (root_id, path)
+);
+CREATE TABLE IF NOT EXISTS folder_history (
+    folder_id INTEGER NOT NULL,
+    scan_id INTEGER NOT NULL,
+    size INTEGER,
+    files INTEGER,
+    PRIMARY KEY (folder_id, scan_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS folder_latest (
+    folder_id INTEGER PRIMARY KEY,
+    size INTEGER,
+    files INTEGER
+);
+CREATE TABLE IF NOT EXISTS category_history (
+    scan_id INTEGER NOT NULL,
+    category TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    files INTEGER NOT NULL,
+    PRIMARY KEY (scan_id, category)
+) WITHOUT ROWID;
+"""
+
+
+class HistoryStore:
+    def __init__(self, path=None):
+        self.path = path or os.path.join(DEFAULT_DATA_DIR, 'history.sqlite3')
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def _root_id(self, conn, root, create=False):
+        row = conn.execute('SELECT id FROM roots WHERE path = ?', (root,)).fetchone()
+        if row is None and create:
+            return conn.execute('INSERT INTO roots (path) VALUES (?)', (root,)).lastrowid
+        return row[0] if row else None
+
+    def record(self, snapshot):
+        # A budget-limited scan would read as folders shrinking or disappearing, so it is kept out of the history
+        if snapshot.partial is not None:
+            return None
+        dirs = np.flatnonzero(snapshot.is_dir)
+        paths = snapshot.relative_paths()[dirs].copy()
+        paths[paths == ''] = '.'
+        current = pd.DataFrame({
+            'path': paths,
+            'depth': snapshot.depth[dirs],
+            'size': snapshot.total[dirs],
+            'files': snapshot.file_count[dirs]
+        })
+        categories = snapshot.rollups.categories(0)
+
+        with self._lock, self._connect() as conn:
+            root_id = self._root_id(conn, snapshot.root, create=True)
+            scan_id = conn.execute(
+                'INSERT INTO scans (root_id, created, total_size, entries) VALUES (?, ?, ?, ?)',
+                (root_id, snapshot.created, snapshot.total_size, len(snapshot))
+            ).lastrowid
+            known = pd.read_sql_query(
+                'SELECT f.id AS folder_id, f.path, l.size AS old_size, l.files AS old_files '
+                'FROM folders f LEFT JOIN folder_latest l ON l.folder_id = f.id WHERE f.root_id = ?',
+                conn, params=(root_id,)
+            )
+            merged = current.merge(known, on='path', how='outer', indicator=True)
+
+            new_folders = merged[merged['_merge'] == 'left_only']
+            conn.executemany(
+                'INSERT INTO folders (root_id, path, depth) VALUES (?, ?, ?)',
+                ((root_id, path, int(depth)) for path, depth in zip(new_folders['path'], new_folders['depth']))
+            )
+            if not new_folders.empty:
+                ids = pd.read_sql_query('SELECT id AS folder_id, path FROM folders WHERE root_id = ?', conn, params=(root_id,))
+                merged = merged.drop(columns='folder_id').merge(ids, on='path', how='left')
+
+            present = merged[merged['_merge'] != 'right_only']
+            changed = present[(present['old_size'] != present['size']) | (present['old_files'] != present['files'])]
+            # Folders gone since the last scan get one tombstone row (NULL size) and are skipped afterwards
+            removed = merged[(merged['_merge'] == 'right_only') & merged['old_size'].notna()]
+            rows = [(int(folder_id), scan_id, int(size), int(count)) for folder_id, size, count in zip(changed['folder_id'], changed['size'], changed['files'])]
+            rows.extend((int(folder_id), scan_id, None, None) for folder_id in removed['folder_id'])
+            conn.executemany('INSERT INTO folder_history (folder_id, scan_id, size, files) VALUES (?, ?, ?, ?)', rows)
+            conn.executemany('INSERT OR REPLACE INTO folder_latest (folder_id, size, files) VALUES (?, ?, ?)', ((row[0], row[2], row[3]) for row in rows))
+            conn.executemany(
+                'INSERT INTO category_history (scan_id, category, size, files) VALUES (?, ?, ?, ?)',
+                ((scan_id, row['category'], row['bytes'], row['files']) for row in categories)
+            )
+        return scan_id
+
+    def scans(self, root, last_n=90):
+        with self._connect() as conn:
+            root_id = self._root_id(conn, root)
+            scans = pd.read_sql_query(
+                'SELECT id AS scan_id, created, total_size, entries FROM scans WHERE root_id = ? ORDER BY id DESC LIMIT ?',
+                conn, params=(root_id, last_n)
+            )
+        scans = scans.iloc[::-1].reset_index(drop=True)
+        scans['Date'] = pd.to_datetime(scans['created'].map(datetime.fromtimestamp))
+        return scans
+
+    def folder_series(self, root, folder, last_n=90):
+        scans = self.scans(root, last_n)
+        if scans.empty:
+            return scans
+        with self._connect() as conn:
+            rows = pd.read_sql_query(
+                'SELECT h.scan_id, h.size, h.files FROM folder_history h JOIN folders f ON f.id = h.folder_id '
+                'WHERE f.root_id = (SELECT id FROM roots WHERE path = ?) AND f.path = ? AND h.scan_id <= ? '
+                'AND h.scan_id >= COALESCE((SELECT MAX(h2.scan_id) FROM folder_history h2 WHERE h2.folder_id = f.id AND h2.scan_id <= ?), 0) '
+                'ORDER BY h.scan_id',
+                conn, params=(root, folder, int(scans['scan_id'].iloc[-1]), int(scans['scan_id'].iloc[0]))
+            )
+        return self._carry_forward(scans, rows)
+
+    def category_series(self, root, last_n=90):
+        scans = self.scans(root, last_n)
+        if scans.empty:
+            return pd.DataFrame()
+        with self._connect() as conn:
+            rows = pd.read_sql_query(
+                'SELECT scan_id, category, size, files FROM category_history WHERE scan_id BETWEEN ? AND ?',
+                conn, params=(int(scans['scan_id'].iloc[0]), int(scans['scan_id'].iloc[-1]))
+            )
+        rows = rows.merge(scans[['scan_id', 'Date']], on='scan_id')
+        return rows.rename(columns={'category': 'Category', 'size': 'Size', 'files': 'Files'})[['Date', 'Category', 'Size', 'Files']]
+
+    def fastest_growing(self, root, last_n=90, max_depth=None, limit=20):
+        scans = self.scans(root, last_n)
+        if len(scans) < 2:
+            return pd.DataFrame(columns=['Folder', 'Depth', 'Start Size', 'End Size', 'Growth', 'Growth per Day'])
+        first_scan = int(scans['scan_id'].iloc[0])
+        with self._connect() as conn:
+            root_id = self._root_id(conn, root)
+            latest = pd.read_sql_query(
+                'SELECT f.id, f.path, f.depth, l.size AS end_size FROM folders f JOIN folder_latest l ON l.folder_id = f.id '
+                'WHERE f.root_id = ? AND l.size IS NOT NULL AND (? IS NULL OR f.depth <= ?)',
+                conn, params=(root_id, max_depth, max_depth)
+            )
+            baseline = pd.read_sql_query(
+                'SELECT h.folder_id AS id, h.size AS start_size, MAX(h.scan_id) AS scan_id FROM folder_history h '
+                'JOIN folders f ON f.id = h.folder_id WHERE f.root_id = ? AND h.scan_id <= ? GROUP BY h.folder_id',
+                conn, params=(root_id, first_scan)
+            )
+        report = latest.merge(baseline[['id', 'start_size']], on='id', how='left')
+        report['start_size'] = report['start_size'].fillna(0).astype('int64')
+        report['growth'] = report['end_size'] - report['start_size']
+        days = max((scans['created'].iloc[-1] - scans['created'].iloc[0]) / 86400, 1 / 24)
+        report['growth_per_day'] = report['growth'] / days
+        report = report.nlargest(limit, 'growth')
+        report = report.rename(columns={
+            'path': 'Folder', 'depth': 'Depth', 'start_size': 'Start Size', 'end_size': 'End Size',
+            'growth': 'Growth', 'growth_per_day': 'Growth per Day'
+        })
+        return report[['Folder', 'Depth', 'Start Size', 'End Size', 'Growth', 'Growth per Day']].reset_index(drop=True)
+
+    def _carry_forward(self, scans, rows):
+        rows = rows.fillna({'size': 0, 'files': 0})
+        series = scans[['scan_id', 'Date']].merge(rows, on='scan_id', how='left')
+        before = rows[rows['scan_id'] < scans['scan_id'].iloc[0]]
+        if not before.empty and pd.isna(series.loc[0, 'size']):
+            series.loc[0, ['size', 'files']] = before.iloc[-1][['size', 'files']].values
+        series[['size', 'files']] = series[['size', 'files']].ffill()
+        return series.rename(columns={'size': 'Size', 'files': 'Files'})[['Date', 'Size', 'Files']]
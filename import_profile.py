@@ -0,0 +1,104 @@
+import os
+import sys
+import time
+
+# Same line format as `python -X importtime`, but usable from the frozen exe where -X flags cannot be passed
+
+# The windowed exe has no console (sys.stderr is None), so the timings go to this file in the data folder instead.
+# Same folder as snapshot_store.DEFAULT_DATA_DIR, which is not imported here because it loads numpy.
+REPORT_PATH = os.path.join(os.environ.get('ANALYZER_DATA_DIR') or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'analyzer_data'),
+                           'import_profile.txt')
+
+
+def _default_stream():
+    if sys.stderr is not None:
+        return sys.stderr
+    try:
+        os.makedirs(os.path.dirname(REPORT_PATH), exist_ok=True)
+        return open(REPORT_PATH, 'w', encoding='utf-8', buffering=1)
+    except OSError:
+        # Profiling must never keep the app from starting
+        return open(os.devnull, 'w')
+
+
+class _TimedLoader:
+    def __init__(self, loader, name, profiler):
+        self._loader = loader
+        self._name = name
+        self._profiler = profiler
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+    def create_module(self, spec):
+        self._profiler.enter(self._name)
+        create_module = getattr(self._loader, 'create_module', None)
+        return create_module(spec) if create_module is not None else None
+
+    def exec_module(self, module):
+        try:
+            module.__loader__ = module.__spec__.loader = self._loader
+            self._loader.exec_module(module)
+        finally:
+            self._profiler.leave(self._name)
+
+
+class ImportProfiler:
+    def __init__(self, stream=None):
+        self.stream = stream or _default_stream()
+        self.started = time.perf_counter()
+        self._stack = []
+        self._finding = False
+
+    def find_spec(self, fullname, path, target=None):
+        if self._finding:
+            return None
+        self._finding = True
+        try:
+            for finder in sys.meta_path:
+                if finder is self or not hasattr(finder, 'find_spec'):
+                    continue
+                spec = finder.find_spec(fullname, path, target)
+                if spec is not None:
+                    break
+            else:
+                return None
+        finally:
+            self._finding = False
+        if spec.loader is not None and hasattr(spec.loader, 'exec_module'):
+            spec.loader = _TimedLoader(spec.loader, fullname, self)
+        return spec
+
+    def enter(self, name):
+        self._stack.append([name, time.perf_counter(), 0.0])
+
+    def leave(self, name):
+        while self._stack:
+            entry_name, started, children = self._stack.pop()
+            cumulative = time.perf_counter() - started
+            if self._stack:
+                self._stack[-1][2] += cumulative
+            self.stream.write(f"import time: {int((cumulative - children) * 1e6):>9} | {int(cumulative * 1e6):>10} | {'  ' * len(self._stack)}{entry_name}\n")
+            if entry_name == name:
+                break
+
+    def mark(self, label):
+        self.stream.write(f"import time: {label} after {(time.perf_counter() - self.started) * 1000:.0f} ms, {len(sys.modules)} modules loaded\n")
+        self.stream.flush()
+
+
+_profiler = None
+
+
+def install(stream=None):
+    global _profiler
+    if _profiler is None:
+        _profiler = ImportProfiler(stream)
+        sys.meta_path.insert(0, _profiler)
+        _profiler.stream.write("import time: self [us] | cumulative | imported package\n")
+    return _profiler
+
+
+def mark(label):
+    if _profiler is not None:
+        _profiler.mark(label)
@@ -0,0 +1,185 @@
+import os
+import platform
+import threading
+import time
+from contextlib import contextmanager
+
+from mount_table import read_proc_mounts
+
+# Concurrent directory listings per device: a spinning disk seeks between every extra reader, while flash
+# and network mounts only reach their throughput with many requests in flight
+DEVICE_LIMITS = {'hdd': 2, 'ssd': 16, 'network': 32, 'unknown': 8}
+NETWORK_FS = {'nfs', 'nfs4', 'cifs', 'smb3', 'smbfs', 'fuse.sshfs', '9p', 'virtiofs', 'fakeowner', 'grpcfuse', 'fuse.grpcfuse',
+              'afs', 'ceph', 'glusterfs', 'fuse.glusterfs', 'davfs', 'fuse.rclone'}
+MEMORY_FS = {'tmpfs', 'ramfs'}
+# "hdd=2,ssd=16,/host/e=1": limits per device kind, or for the device holding a path
+LIMITS_ENV = 'ANALYZER_DEVICE_LIMITS'
+
+
+def parse_limits(spec):
+    kinds, paths = {}, {}
+    for item in (spec or '').split(','):
+        if not item.strip():
+            continue
+        name, _, value = item.rpartition('=')
+        name = name.strip()
+        try:
+            limit = max(int(value), 1)
+        except ValueError:
+            raise ValueError(f"Invalid device limit: {item.strip()}")
+        if name in DEVICE_LIMITS:
+            kinds[name] = limit
+        elif name:
+            paths[name] = limit
+        else:
+            raise ValueError(f"Invalid device limit: {item.strip()}")
+    return kinds, paths
+
+
+def parse_workers(value):
+    # Listing threads per scan: a number, or 'auto' for the limit of the device being scanned
+    if value == 'auto':
+        return value
+    workers = int(value)
+    if workers < 1:
+        raise ValueError(value)
+    return workers
+
+
+def resolve_workers(workers, scheduler, path):
+    if workers == 'auto':
+        return scheduler.workers_for(path) if scheduler is not None else DEVICE_LIMITS['unknown']
+    return workers
+
+
+def _mount_fs_type(path):
+    try:
+        mounts = read_proc_mounts()
+    except OSError:
+        return ''
+    path = os.path.realpath(path)
+    best, fs_type = '', ''
+    for mount in mounts:
+        point = mount['mount_point'].rstrip('/') or '/'
+        if (path == point or path.startswith(point.rstrip('/') + '/')) and len(point) >= len(best):
+            best, fs_type = point, mount['fs_type']
+    return fs_type
+
+
+def _sys_rotational(dev):
+    # Partitions have no queue of their own, the whole disk one level up does
+    block = os.path.realpath(f'/sys/dev/block/{os.major(dev)}:{os.minor(dev)}')
+    for folder in (block, os.path.dirname(block)):
+        try:
+            with open(os.path.join(folder, 'queue', 'rotational'), encoding='ascii') as f:
+                return f.read().strip() == '1'
+        except OSError:
+            continue
+    return None
+
+
+def _windows_kind(path):
+    import ctypes
+
+    drive = os.path.splitdrive(os.path.abspath(path))[0]
+    if ctypes.windll.kernel32.GetDriveTypeW(drive + '\\') == 4:
+        return 'network'
+    return 'unknown'
+
+
+def detect_device_kind(path, dev=None):
+    system = platform.system()
+    if system == 'Windows':
+        return _windows_kind(path)
+    if system != 'Linux':
+        return 'unknown'
+    fs_type = _mount_fs_type(path)
+    if fs_type in NETWORK_FS:
+        return 'network'
+    if fs_type in MEMORY_FS:
+        return 'ssd'
+    if dev is None:
+        dev = os.stat(path).st_dev
+    rotational = _sys_rotational(dev)
+    if rotational is None:
+        return 'unknown'
+    return 'hdd' if rotational else 'ssd'
+
+
+class DeviceQueue:
+    def __init__(self, dev, kind, limit, path):
+        self.dev = dev
+        self.kind = kind
+        self.limit = limit
+        self.path = path
+        self.listings = 0
+        self.in_flight = 0
+        self.peak = 0
+        self.wait_s = 0.0
+        self._semaphore = threading.BoundedSemaphore(limit)
+
+    def stats(self):
+        return {'device': self.dev, 'kind': self.kind, 'limit': self.limit, 'first_path': self.path, 'listings': self.listings,
+                'in_flight': self.in_flight, 'peak': self.peak, 'wait_s': round(self.wait_s, 3)}
+
+
+class IOScheduler:
+    # One bounded semaphore per st_dev, shared by every scan in the process, so two scans of the same disk
+    # split its limit while scans of different disks do not wait for each other
+    def __init__(self, limits=None, path_limits=None, detect=detect_device_kind):
+        self.limits = dict(DEVICE_LIMITS, **(limits or {}))
+        self.path_limits = dict(path_limits or {})
+        self.detect = detect
+        self._devices = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, spec=None):
+        kinds, paths = parse_limits(os.environ.get(LIMITS_ENV, '') if spec is None else spec)
+        return cls(kinds, paths)
+
+    def device(self, path, dev=None):
+        if dev is None:
+            dev = os.stat(path).st_dev
+        queue = self._devices.get(dev)
+        if queue is not None:
+            return queue
+        try:
+            kind = self.detect(path, dev)
+        except OSError:
+            kind = 'unknown'
+        limit = self.limits[kind]
+        for limit_path, path_limit in self.path_limits.items():
+            try:
+                if os.stat(limit_path).st_dev == dev:
+                    limit = path_limit
+            except OSError:
+                continue
+        with self._lock:
+            return self._devices.setdefault(dev, DeviceQueue(dev, kind, limit, path))
+
+    @contextmanager
+    def slot(self, path, dev=None):
+        queue = self.device(path, dev)
+        started = time.perf_counter()
+        queue._semaphore.acquire()
+        waited = time.perf_counter() - started
+        with self._lock:
+            queue.wait_s += waited
+            queue.listings += 1
+            queue.in_flight += 1
+            queue.peak = max(queue.peak, queue.in_flight)
+        try:
+            yield queue
+        finally:
+            with self._lock:
+                queue.in_flight -= 1
+            queue._semaphore.release()
+
+    def workers_for(self, path, dev=None):
+        # Listing threads worth starting for one scan of this device
+        return self.device(path, dev).limit
+
+    def stats(self):
+        with self._lock:
+            return [queue.stats() for queue in self._devices.values()]
@@ -0,0 +1,422 @@
+import ctypes
+import ctypes.util
+import errno
+import os
+import platform
+import select
+import stat
+import struct
+import threading
+import time
+
+import numpy as np
+
+from scan_engine import (DEFAULT_RULES, FILE_CATEGORIES, HAS_BLOCKS, OTHER_CATEGORY, SNAPSHOT_COLUMNS, Snapshot, category_codes, file_suffix,
+                         path_key, scan_tree)
+from scan_rules import compile_rules
+
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_DONT_FOLLOW = 0x02000000
+IN_EXCL_UNLINK = 0x04000000
+WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF
+              | IN_ONLYDIR | IN_DONT_FOLLOW | IN_EXCL_UNLINK)
+EVENT_HEADER = struct.Struct('iIII')
+
+
+class Inotify:
+    def __init__(self):
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error))
+
+    def add_watch(self, path, mask=WATCH_MASK):
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), ctypes.c_uint32(mask))
+        if wd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error), path)
+        return wd
+
+    def rm_watch(self, wd):
+        self._libc.inotify_rm_watch(self.fd, wd)
+
+    def read(self):
+        try:
+            data = os.read(self.fd, 1024 * 1024)
+        except BlockingIOError:
+            return []
+        events = []
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            events.append((wd, mask, os.fsdecode(data[offset:offset + length].rstrip(b'\0'))))
+            offset += length
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+
+def _rows(name, st, extension_categories):
+    extension = file_suffix(name)
+    return {
+        'name': np.array([name], dtype=object), 'parent': np.array([-1], dtype=np.int64), 'is_dir': np.array([False]),
+        'size': np.array([st.st_size], dtype=np.int64), 'allocated': np.array([st.st_blocks * 512 if HAS_BLOCKS else st.st_size], dtype=np.int64), 'mtime': np.array([st.st_mtime]), 'ctime': np.array([st.st_ctime]),
+        'ext': np.array([extension], dtype=object), 'category': np.array([extension_categories.get(extension, OTHER_CATEGORY)], dtype=np.int8),
+        'key': np.zeros(1, dtype=np.uint64), 'depth': np.array([0], dtype=np.int32)
+    }
+
+
+def subtree_mask(snapshot, indices):
+    mask = np.zeros(len(snapshot), dtype=bool)
+    mask[list(indices)] = True
+    for depth in range(1, snapshot.max_depth + 1):
+        level = snapshot.level(depth)
+        mask[level] |= mask[snapshot.parent[level]]
+    return mask
+
+
+def rebuild(snapshot, dropped, grafts):
+    # One structural update per debounced batch: drop removed subtrees, then append each added file or folder
+    # subtree (columns relative to its own root) under its parent and re-key it below that parent
+    kept = np.flatnonzero(~dropped)
+    remap = np.full(len(snapshot), -1, dtype=np.int64)
+    remap[kept] = np.arange(len(kept))
+    parts = {column: [getattr(snapshot, column)[kept]] for column in SNAPSHOT_COLUMNS}
+    parts['parent'][0] = np.where(kept == 0, -1, remap[snapshot.parent[kept]])
+    offset = len(kept)
+    for parent_index, name, columns in grafts:
+        parent = remap[parent_index]
+        if parent < 0:
+            continue
+        count = len(columns['name'])
+        names = columns['name'].copy()
+        names[0] = name
+        parents = columns['parent'] + offset
+        parents[0] = parent
+        keys = np.zeros(count, dtype=np.uint64)
+        keys[0] = path_key(int(snapshot.key[parent_index]), name)
+        # Added subtrees come from scan_tree in breadth-first order, so parents are always keyed first
+        for position in range(1, count):
+            keys[position] = path_key(int(keys[columns['parent'][position]]), names[position])
+        for column in SNAPSHOT_COLUMNS:
+            parts[column].append(columns[column])
+        parts['name'][-1], parts['parent'][-1], parts['key'][-1] = names, parents, keys
+        parts['depth'][-1] = columns['depth'] + snapshot.depth[parent_index] + 1
+        offset += count
+    return Snapshot(snapshot.root, {column: np.concatenate(values) for column, values in parts.items()}, snapshot.errors, time.time())
+
+
+def copy_snapshot(snapshot):
+    return Snapshot(snapshot.root, {column: getattr(snapshot, column).copy() for column in SNAPSHOT_COLUMNS}, list(snapshot.errors), snapshot.created)
+
+
+def watch_key(root, rules=DEFAULT_RULES):
+    # Scans of one folder with different rules hold different trees, so they never share a watcher
+    rules = compile_rules(rules)
+    return root, tuple(rules.lines) if rules is not None else ()
+
+
+class LiveWatch:
+    def __init__(self, snapshot, categories=FILE_CATEGORIES, rules=DEFAULT_RULES, debounce=0.5, max_delay=3.0, poll_interval=10.0, on_change=None, use_inotify=True):
+        # Private copy: deltas are applied in place and must not leak into snapshots other views still hold
+        self.snapshot = copy_snapshot(snapshot)
+        self.categories = categories
+        self.extension_categories = category_codes(categories)
+        self.rules = compile_rules(rules) or None
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.poll_interval = poll_interval
+        self.on_change = on_change
+        self.version = 0
+        self.events = 0
+        self.batches = 0
+        self.updated = time.time()
+        self.error = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._lookup = None
+        self._wds = {}
+        self._dirs = {}
+        self._unwatched = {}
+        self._exhausted = False
+        self._inotify = None
+        if use_inotify and platform.system() == 'Linux':
+            try:
+                self._inotify = Inotify()
+            except (OSError, AttributeError) as e:
+                self.error = f"inotify unavailable, polling instead: {e}"
+        self._watch(np.flatnonzero(self.snapshot.is_dir))
+        self._thread = threading.Thread(target=self._run, name='live-watch', daemon=True)
+        self._thread.start()
+
+    @property
+    def mode(self):
+        if self._inotify is None:
+            return 'poll'
+        return 'inotify+poll' if self._unwatched else 'inotify'
+
+    def stats(self):
+        return {'mode': self.mode, 'watches': len(self._wds), 'unwatched': len(self._unwatched), 'events': self.events,
+                'batches': self.batches, 'version': self.version, 'updated': self.updated, 'error': self.error}
+
+    def current(self):
+        # Copy of the tree and its version for views that keep it: batches change self.snapshot in place on the watcher thread
+        with self._lock:
+            return copy_snapshot(self.snapshot), self.version
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join(timeout=5)
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+
+    def _index(self, key):
+        if self._lookup is None:
+            order = np.argsort(self.snapshot.key, kind='stable')
+            self._lookup = order, self.snapshot.key[order]
+        order, keys = self._lookup
+        position = int(np.searchsorted(keys, np.uint64(key)))
+        if position < len(keys) and keys[position] == key:
+            return int(order[position])
+        return None
+
+    def _watch(self, indices):
+        snapshot = self.snapshot
+        for index in indices:
+            key, path = int(snapshot.key[index]), snapshot.path_of(index)
+            if self._inotify is not None and not self._exhausted:
+                try:
+                    wd = self._inotify.add_watch(path)
+                    self._wds[key] = wd
+                    self._dirs[wd] = key, path
+                    continue
+                except OSError as e:
+                    if e.errno in (errno.ENOSPC, errno.ENOMEM):
+                        self._exhausted = True
+                        self.error = f"inotify watch limit reached after {len(self._wds):,} folders, polling the rest (raise fs.inotify.max_user_watches)"
+            # Out of watches (or not watchable): compared against disk every poll_interval instead
+            self._unwatched[key] = path
+
+    def _unwatch(self, keys):
+        for key in keys:
+            self._unwatched.pop(key, None)
+            wd = self._wds.pop(key, None)
+            if wd is not None:
+                self._dirs.pop(wd, None)
+                if self._inotify is not None:
+                    self._inotify.rm_watch(wd)
+
+    def _read_events(self, pending):
+        for wd, mask, name in self._inotify.read():
+            self.events += 1
+            if mask & IN_Q_OVERFLOW:
+                # Kernel queue overflowed and events were lost: compare every folder against disk once
+                self._poll(list(self._dirs.values()) + list(self._unwatched.items()), pending)
+                continue
+            if mask & IN_IGNORED:
+                key, _ = self._dirs.pop(wd, (None, None))
+                self._wds.pop(key, None)
+                continue
+            if name and wd in self._dirs:
+                key, path = self._dirs[wd]
+                pending[(key, name)] = os.path.join(path, name)
+
+    def _poll(self, folders, pending):
+        # mtime-based incremental rescan: only folders without a watch are listed, and only entries whose
+        # presence, size or mtime differ from the snapshot are queued as changes
+        snapshot = self.snapshot
+        for key, path in folders:
+            index = self._index(key)
+            if index is None:
+                continue
+            known = {snapshot.name[child]: child for child in snapshot.children(index)}
+            try:
+                with os.scandir(path) as entries:
+                    for entry in entries:
+                        if self._excluded(index, entry.name, entry.is_dir(follow_symlinks=False)):
+                            continue
+                        child = known.pop(entry.name, None)
+                        try:
+                            if child is None:
+                                pending[(key, entry.name)] = entry.path
+                            elif not snapshot.is_dir[child]:
+                                st = entry.stat()
+                                if st.st_size != snapshot.size[child] or st.st_mtime != snapshot.mtime[child]:
+                                    pending[(key, entry.name)] = entry.path
+                        except OSError:
+                            pending[(key, entry.name)] = entry.path
+            except OSError:
+                continue
+            for name in known:
+                pending[(key, name)] = os.path.join(path, name)
+
+    def _run(self):
+        pending = {}
+        first = None
+        last_poll = time.monotonic()
+        while not self._stop.is_set():
+            try:
+                if self._inotify is not None:
+                    ready = select.select([self._inotify.fd], [], [], self.debounce if pending else 1.0)[0]
+                    if ready:
+                        self._read_events(pending)
+                else:
+                    ready = False
+                    self._stop.wait(self.debounce if pending else 1.0)
+                if self._unwatched and time.monotonic() - last_poll >= self.poll_interval:
+                    last_poll = time.monotonic()
+                    self._poll(list(self._unwatched.items()), pending)
+                if pending:
+                    first = first or time.monotonic()
+                    # Debounced: apply once the tree has been quiet for `debounce`, or after max_delay under constant churn
+                    if not ready or time.monotonic() - first >= self.max_delay:
+                        self._apply(pending)
+                        pending, first = {}, None
+            except Exception as e:
+                self.error = f"{type(e).__name__}: {e}"
+                pending, first = {}, None
+                self._stop.wait(self.poll_interval)
+
+    def _excluded(self, parent_index, name, is_dir):
+        # The scan's rules, matched relative to the watched root exactly as scan_tree matched them
+        if self.rules is None or (self.rules.max_depth is not None and self.snapshot.depth[parent_index] >= self.rules.max_depth):
+            return False
+        relative = self.snapshot.relative_paths()[parent_index]
+        return self.rules.excluded(os.path.join(relative, name) if relative else name, is_dir)
+
+    def _entry(self, path):
+        # Same rules as scan_tree: folders are not followed through symlinks, files are
+        try:
+            st = os.lstat(path)
+            if stat.S_ISDIR(st.st_mode):
+                return 'dir', st
+            if stat.S_ISLNK(st.st_mode):
+                st = os.stat(path)
+                if stat.S_ISDIR(st.st_mode):
+                    return None, None
+            return ('file', st) if stat.S_ISREG(st.st_mode) else (None, None)
+        except OSError:
+            return None, None
+
+    def _apply(self, pending):
+        with self._lock:
+            snapshot = self.snapshot
+            removed, grafts, new_dirs, changed = set(), [], 0, False
+            for (parent_key, name), path in pending.items():
+                parent_index = self._index(parent_key)
+                if parent_index is None:
+                    continue
+                key = path_key(parent_key, name)
+                index = self._index(key)
+                kind, st = self._entry(path)
+                if self._excluded(parent_index, name, kind == 'dir'):
+                    continue
+                # A folder that lost its watch was deleted and recreated in between, so it is rescanned
+                replaced = kind == 'dir' and key not in self._wds and key not in self._unwatched
+                if index is not None:
+                    if kind == ('dir' if snapshot.is_dir[index] else 'file') and not replaced:
+                        if kind == 'file' and st.st_size != snapshot.size[index]:
+                            changed = True
+                            delta = st.st_size - int(snapshot.size[index])
+                            snapshot.size[index] = st.st_size
+                            snapshot.allocated[index] = st.st_blocks * 512 if HAS_BLOCKS else st.st_size
+                            ancestor = index
+                            while ancestor >= 0:
+                                snapshot.total[ancestor] += delta
+                                ancestor = snapshot.parent[ancestor]
+                        changed = changed or st.st_mtime != snapshot.mtime[index]
+                        snapshot.mtime[index] = st.st_mtime
+                        continue
+                    removed.add(index)
+                if kind == 'file':
+                    grafts.append((parent_index, name, _rows(name, st, self.extension_categories)))
+                elif kind == 'dir':
+                    try:
+                        subtree = scan_tree(path, rules=self.rules, categories=self.categories, relative_to=snapshot.root)
+                    except OSError:
+                        continue
+                    grafts.append((parent_index, name, {column: getattr(subtree, column) for column in SNAPSHOT_COLUMNS}))
+                    new_dirs += int(subtree.is_dir.sum())
+            if removed or grafts:
+                dropped = subtree_mask(snapshot, removed)
+                self._unwatch(int(key) for key in snapshot.key[dropped & snapshot.is_dir])
+                first_new = len(snapshot) - int(dropped.sum())
+                self.snapshot = rebuild(snapshot, dropped, grafts)
+                self._lookup = None
+                if new_dirs:
+                    added = np.arange(first_new, len(self.snapshot))
+                    self._watch(added[self.snapshot.is_dir[added]])
+            elif changed:
+                snapshot.__dict__.pop('_query_cache', None)
+                snapshot._rollups = None
+            self.batches += 1
+            if not (removed or grafts or changed):
+                return
+            self.version += 1
+            self.updated = time.time()
+        if self.on_change is not None:
+            self.on_change(self)
+
+
+class WatchRegistry:
+    # One watcher per watch_key (folder and rules) shared by every session viewing it; stopped when the last holder lets go or goes quiet
+    def __init__(self, lease_seconds=300):
+        self.lease_seconds = lease_seconds
+        self._watches = {}
+        self._holders = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, key, snapshot, holder, **options):
+        with self._lock:
+            watch = self._watches.get(key)
+            if watch is None:
+                watch = self._watches[key] = LiveWatch(snapshot, **options)
+            self._holders.setdefault(key, {})[holder] = time.time()
+        self._expire()
+        return watch
+
+    def get(self, key):
+        with self._lock:
+            return self._watches.get(key)
+
+    def release(self, key, holder):
+        with self._lock:
+            holders = self._holders.get(key, {})
+            holders.pop(holder, None)
+            watch = None if holders else self._watches.pop(key, None)
+        if watch is not None:
+            watch.stop()
+
+    def watches(self):
+        with self._lock:
+            return {key: (watch, len(self._holders.get(key, ()))) for key, watch in self._watches.items()}
+
+    def _expire(self):
+        now = time.time()
+        stopped = []
+        with self._lock:
+            for key, holders in list(self._holders.items()):
+                for holder, touched in list(holders.items()):
+                    if now - touched > self.lease_seconds:
+                        del holders[holder]
+                if not holders:
+                    del self._holders[key]
+                    if key in self._watches:
+                        stopped.append(self._watches.pop(key))
+        for watch in stopped:
+            watch.stop()
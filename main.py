@@ -1,15 +1,22 @@
 import os
-import pandas as pd
+import sys
+if '--profile-imports' in sys.argv or os.environ.get('ANALYZER_PROFILE_IMPORTS'):
+    import import_profile
+    import_profile.install()
 from pathlib import Path
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
 from datetime import datetime
 from tkinterdnd2 import TkinterDnD, DND_FILES
-from fpdf import FPDF
 import webbrowser
-import matplotlib.pyplot as plt
-import seaborn as sns
-import numpy as np
+import base64
+import sqlite3
+import threading
+import importlib
+from run_profile import DEEP_PROFILE, RunProfile, report_path
+
+# pandas, numpy, fpdf ve matplotlib ilk kullanıldıkları yerde yüklenir; bu liste pencere açıldıktan sonra önceden yüklenir
+WARMUP_MODULES = ['numpy', 'scan_engine', 'snapshot_store', 'pandas', 'history_store', 'snapshot_diff', 'openpyxl', 'fpdf', 'chart_engine', 'tree_explorer', 'matplotlib.figure', 'matplotlib.backends.backend_agg']
 
 class FileSizeAnalyzer:
     def __init__(self):
@@ -81,6 +88,15 @@ class FileSizeAnalyzer:
                 'Brotli Compression': 0.35 
             }
         }
+        self.chart_engine = None
+        self.snapshot_key = None
+        self.snapshot = None
+        self.snapshot_path = None
+        self.snapshot_store = None
+        self.run_profile = None
+        self.scan_checkpoint = None
+        self.explorer = None
+        self.live_watch = None
         self.setup_ui()
         self.root.drop_target_register(DND_FILES)
         self.root.dnd_bind('<<Drop>>', self.handle_drop)
@@ -468,6 +484,59 @@ class FileSizeAnalyzer:
             activeforeground=self.colors['text_secondary']
         )
         self.search_exact_checkbox.grid(row=0, column=1, sticky="w", padx=(20, 0))
+        limits_frame = tk.Frame(self.filters_frame, bg=self.colors['bg'])
+        limits_frame.grid(row=5, column=0, sticky="ew", pady=(8, 0))
+        limits_label = tk.Label(
+            limits_frame,
+            text="⏱️ Scan Limits (empty = unlimited):",
+            font=("Segoe UI", 9, "bold"),
+            bg=self.colors['bg'],
+            fg=self.colors['fg']
+        )
+        limits_label.grid(row=0, column=0, columnspan=6, sticky="w", pady=(0, 4))
+        self.limit_entries = {}
+        for column, (name, text) in enumerate([('max_depth', "Max depth:"), ('max_entries', "Max entries:"), ('time_budget', "Time (s):")]):
+            label = tk.Label(
+                limits_frame,
+                text=text,
+                font=("Segoe UI", 8),
+                bg=self.colors['bg'],
+                fg=self.colors['text_secondary']
+            )
+            label.grid(row=1, column=column * 2, sticky="w", padx=(0 if column == 0 else 8, 0))
+            entry = tk.Entry(
+                limits_frame,
+                font=("Segoe UI", 8),
+                bg=self.colors['secondary_bg'],
+                fg=self.colors['fg'],
+                relief='flat',
+                insertbackground=self.colors['fg'],
+                width=10
+            )
+            entry.grid(row=1, column=column * 2 + 1, sticky="ew", padx=(4, 0))
+            self.limit_entries[name] = entry
+        rules_label = tk.Label(
+            limits_frame,
+            text="🚫 Exclude (gitignore rules, one per line):",
+            font=("Segoe UI", 8),
+            bg=self.colors['bg'],
+            fg=self.colors['text_secondary']
+        )
+        rules_label.grid(row=2, column=0, columnspan=6, sticky="w", pady=(6, 2))
+        self.rules_text = tk.Text(
+            limits_frame,
+            font=("Segoe UI", 8),
+            bg=self.colors['secondary_bg'],
+            fg=self.colors['fg'],
+            relief='flat',
+            insertbackground=self.colors['fg'],
+            height=3,
+            width=40
+        )
+        self.rules_text.grid(row=3, column=0, columnspan=6, sticky="ew")
+        from scan_engine import DEFAULT_RULES
+        self.rules_text.insert('1.0', '\n'.join(DEFAULT_RULES.lines))
+        self.rules_warning = []
         button_frame = tk.Frame(self.root, bg=self.colors['bg'])
         button_frame.grid(row=5, column=0, pady=10, sticky="ew")
         button_frame.grid_columnconfigure(0, weight=1)
@@ -476,6 +545,9 @@ class FileSizeAnalyzer:
         button_frame.grid_columnconfigure(3, weight=1)
         button_frame.grid_columnconfigure(4, weight=1)
         button_frame.grid_columnconfigure(5, weight=1)
+        button_frame.grid_columnconfigure(6, weight=1)
+        button_frame.grid_columnconfigure(7, weight=1)
+        button_frame.grid_columnconfigure(8, weight=1)
         self.select_button = tk.Button(
             button_frame,
             text="📂 Select Folder",
@@ -571,6 +643,54 @@ class FileSizeAnalyzer:
             activeforeground=self.colors['fg']
         )
         self.optimize_button.grid(row=0, column=5, padx=6, sticky="ew")
+        self.compare_button = tk.Button(
+            button_frame,
+            text="🔀 Compare",
+            command=self.show_comparison,
+            font=("Segoe UI", 10, "bold"),
+            bg='#20c997',
+            fg=self.colors['fg'],
+            relief='flat',
+            padx=12,
+            pady=6,
+            cursor='hand2',
+            state='disabled',
+            activebackground='#199d76',
+            activeforeground=self.colors['fg']
+        )
+        self.compare_button.grid(row=0, column=6, padx=6, sticky="ew")
+        self.live_button = tk.Button(
+            button_frame,
+            text="🔴 Live",
+            command=self.toggle_live_watch,
+            font=("Segoe UI", 10, "bold"),
+            bg='#dc3545',
+            fg=self.colors['fg'],
+            relief='flat',
+            padx=12,
+            pady=6,
+            cursor='hand2',
+            state='disabled',
+            activebackground='#b02a37',
+            activeforeground=self.colors['fg']
+        )
+        self.live_button.grid(row=0, column=7, padx=6, sticky="ew")
+        self.estimate_button = tk.Button(
+            button_frame,
+            text="⚡ Estimate",
+            command=self.quick_estimate,
+            font=("Segoe UI", 10, "bold"),
+            bg='#17a2b8',
+            fg=self.colors['fg'],
+            relief='flat',
+            padx=12,
+            pady=6,
+            cursor='hand2',
+            state='disabled',
+            activebackground='#117a8b',
+            activeforeground=self.colors['fg']
+        )
+        self.estimate_button.grid(row=0, column=8, padx=6, sticky="ew")
         self.progress = ttk.Progressbar(
             self.root,
             mode='indeterminate',
@@ -636,6 +756,10 @@ class FileSizeAnalyzer:
             self.html_button.config(state='normal')
             self.charts_button.config(state='normal')
             self.optimize_button.config(state='normal')
+            self.compare_button.config(state='normal')
+            self.live_button.config(state='normal')
+            self.estimate_button.config(state='normal')
+            self.stop_live_watch()
             self._update_status_message()
             
     def handle_drop(self, event):
@@ -652,6 +776,10 @@ class FileSizeAnalyzer:
             self.html_button.config(state='normal')
             self.charts_button.config(state='normal')
             self.optimize_button.config(state='normal')
+            self.compare_button.config(state='normal')
+            self.live_button.config(state='normal')
+            self.estimate_button.config(state='normal')
+            self.stop_live_watch()
             self._update_status_message()
             self.status_label.config(text="Folder selected via drag & drop. " + self.status_label.cget("text").replace("Folder selected. ", ""))
         else:
@@ -749,6 +877,38 @@ class FileSizeAnalyzer:
         except ValueError:
             return 0.0, 1000.0
     
+    def get_scan_rules(self):
+        from scan_rules import check_rules
+        rules, invalid = check_rules(self.rules_text.get('1.0', 'end').splitlines())
+        # Hatalı satırlar atlanır; aynı hatalar için uyarı bir kez gösterilir
+        if invalid and invalid != self.rules_warning:
+            messagebox.showwarning("Invalid Rules", "These exclusion rules are ignored:\n\n" + "\n".join(message.removeprefix('Invalid rule: ') for _, message in invalid))
+        self.rules_warning = invalid
+        return rules
+    
+    def get_scan_limits(self):
+        limits = {}
+        for name, entry in self.limit_entries.items():
+            try:
+                value = float(entry.get()) if name == 'time_budget' else int(entry.get())
+            except ValueError:
+                continue
+            if value > 0:
+                limits[name] = value
+        return limits
+    
+    def get_scan_checkpoint(self, folder_path):
+        # Uzun taramalar periyodik olarak kaydedilir; yarıda kalan tarama varsa kaldığı yerden devam etmek sorulur
+        from scan_checkpoint import ScanCheckpoint
+        checkpoint = ScanCheckpoint(folder_path)
+        info = checkpoint.info()
+        if info:
+            saved = datetime.fromtimestamp(info['saved']).strftime('%Y-%m-%d %H:%M')
+            checkpoint.resume = messagebox.askyesno("Resume Scan", f"An earlier scan of this folder stopped after {info['entries']:,} entries "
+                                                                   f"({info['pending']:,} folders left, saved {saved}).\n\nContinue from that checkpoint?")
+        self.scan_checkpoint = checkpoint
+        return checkpoint
+    
     def toggle_date_filter(self):
         self.date_filter_enabled = self.date_filter_var.get()
         self._update_status_message()
@@ -859,22 +1019,27 @@ class FileSizeAnalyzer:
         else:
             self.status_label.config(text="Folder selected. No filters active. Click button to create reports.")
             
+    def get_chart_engine(self):
+        if self.chart_engine is None:
+            from chart_engine import ChartEngine
+            self.chart_engine = ChartEngine()
+        return self.chart_engine
+    
+    def get_snapshot_store(self):
+        if self.snapshot_store is None:
+            from snapshot_store import SnapshotStore
+            self.snapshot_store = SnapshotStore()
+        return self.snapshot_store
+    
     def get_folder_size(self, folder_path):
-        total_size = 0
-        try:
-            for item in Path(folder_path).rglob('*'):
-                if item.is_file():
-                    total_size += item.stat().st_size
-        except PermissionError:
-            pass
-        return total_size
+        from scan_engine import get_folder_size
+        return get_folder_size(folder_path)
     
-    def analyze_folder_contents(self, folder_path, parent_folder=""):
+    def analyze_folder_contents(self, folder_path, parent_folder="", snapshot=None, estimate_budget=None):
         files_data = []
         
         try:
             selected_path = Path(folder_path)
-            system_folders = ['$RECYCLE.BIN', 'System Volume Information', 'RECYCLER', 'Thumbs.db']
             active_filters = self.get_active_filters()
             size_filter_enabled = self.size_filter_enabled
             min_size_gb, max_size_gb = self.get_size_filter_range()
@@ -892,79 +1057,112 @@ class FileSizeAnalyzer:
                     'Full Path': str(selected_path)
                 }]
             
+            # Tahmin modu: tam tarama yerine örneklenmiş boyutlar ve güven aralıkları
+            if snapshot is None and estimate_budget is not None:
+                from size_estimate import SizeEstimator
+                estimator = SizeEstimator(folder_path, rules=self.get_scan_rules(), categories=self.file_categories).run(estimate_budget)
+                for row in estimator.estimates():
+                    if search_filter_enabled and not self.matches_search(row['name']):
+                        continue
+                    if not row['is_dir']:
+                        size_gb = row['estimate'] / (1024 * 1024 * 1024)
+                        if active_filters and row['extension'] not in active_filters:
+                            continue
+                        if size_filter_enabled and not min_size_gb <= size_gb <= max_size_gb:
+                            continue
+                        if date_filter_enabled and not start_date <= datetime.fromtimestamp(row['ctime']) <= end_date:
+                            continue
+                    files_data.append({
+                        'Name': row['name'],
+                        'Type': 'Folder' if row['is_dir'] else 'File',
+                        'Size (GB)': round(row['estimate'] / (1024 * 1024 * 1024), 2),
+                        'Low (GB)': round(row['low'] / (1024 * 1024 * 1024), 2),
+                        'High (GB)': round(row['high'] / (1024 * 1024 * 1024), 2) if row['high'] != float('inf') else None,
+                        'Exact': row['exact'],
+                        'Extension': '📁' if row['is_dir'] else row['extension'],
+                        'Full Path': row['path']
+                    })
+                return files_data
+            
+            # Tüm ağaç tek geçişte taranır, alt klasör boyutları snapshot'tan okunur
+            from scan_engine import scan_tree
+            # Canlı izleme kendi snapshot'ını verir; yalnızca yeni taramaların profili çıkarılır
+            profile = self.run_profile if snapshot is None else None
+            if snapshot is None:
+                snapshot = scan_tree(folder_path, rules=self.get_scan_rules(), categories=self.file_categories, profile=profile,
+                                     checkpoint=self.get_scan_checkpoint(folder_path), **self.get_scan_limits())
+            self.snapshot = snapshot
+            filter_phase = profile.start('filter') if profile is not None else None
+            
             # Seçilen klasörün doğrudan altındaki öğeleri analiz et
-            for item in selected_path.iterdir():
-                # Sistem klasörlerini atla
-                if item.name in system_folders:
-                    continue
+            for index in snapshot.children(0):
+                item_name = snapshot.name[index]
                 
-                if item.is_dir():
-                    # Alt klasörün boyutunu hesapla
-                    folder_size = self.get_folder_size(item)
-                    folder_size_mb = folder_size / (1024 * 1024)
-                    folder_size_gb = folder_size_mb / 1024
+                if snapshot.is_dir[index]:
+                    folder_size_gb = snapshot.total[index] / (1024 * 1024 * 1024)
                     
                     # Arama filtresini kontrol et
                     folder_passed_search_filter = True
                     if search_filter_enabled:
-                        folder_passed_search_filter = self.matches_search(item.name)
+                        folder_passed_search_filter = self.matches_search(item_name)
                     
                     if folder_passed_search_filter:
                         files_data.append({
-                            'Name': item.name,
+                            'Name': item_name,
                             'Type': 'Folder',
                             'Size (GB)': round(folder_size_gb, 2),
                             'Extension': '📁',
-                            'Full Path': str(item)
+                            'Full Path': snapshot.path_of(index)
                         })
+                        # Bütçe dolduysa alt ağacı tam taranmamış klasörler işaretlenir
+                        if snapshot.partial is not None:
+                            files_data[-1]['Complete'] = not snapshot.incomplete[index]
                 
-                elif item.is_file():
+                else:
+                    file_extension = snapshot.ext[index]
+                    size_gb = snapshot.size[index] / (1024 * 1024 * 1024)
+                    
                     # Dosya filtrelerini kontrol et
                     file_passed_type_filter = True
                     if active_filters:
-                        file_extension = item.suffix.lower()
                         file_passed_type_filter = file_extension in active_filters
                     
                     file_passed_size_filter = True
                     if size_filter_enabled:
-                        size_bytes = item.stat().st_size
-                        size_gb = size_bytes / (1024 * 1024 * 1024)
                         file_passed_size_filter = min_size_gb <= size_gb <= max_size_gb
                     
                     file_passed_date_filter = True
                     if date_filter_enabled:
-                        from datetime import datetime
-                        file_creation_time = datetime.fromtimestamp(item.stat().st_ctime)
+                        file_creation_time = datetime.fromtimestamp(snapshot.ctime[index])
                         file_passed_date_filter = start_date <= file_creation_time <= end_date
                     
                     file_passed_search_filter = True
                     if search_filter_enabled:
-                        file_passed_search_filter = self.matches_search(item.name)
+                        file_passed_search_filter = self.matches_search(item_name)
                     
                     # Tüm filtreleri geçerse dosyayı ekle
                     if file_passed_type_filter and file_passed_size_filter and file_passed_date_filter and file_passed_search_filter:
-                        size_bytes = item.stat().st_size
-                        size_mb = size_bytes / (1024 * 1024)
-                        size_gb = size_mb / 1024
-                        
                         files_data.append({
-                            'Name': item.name,
+                            'Name': item_name,
                             'Type': 'File',
                             'Size (GB)': round(size_gb, 2),
-                            'Extension': item.suffix.lower(),
-                            'Full Path': str(item)
+                            'Extension': file_extension,
+                            'Full Path': snapshot.path_of(index)
                         })
                     
                     # Debug için: Filtre geçmeyen dosyaları da göster
                     else:
-                        print(f"File filtered out: {item.name} - Type: {file_passed_type_filter}, Size: {file_passed_size_filter}, Date: {file_passed_date_filter}, Search: {file_passed_search_filter}")
+                        print(f"File filtered out: {item_name} - Type: {file_passed_type_filter}, Size: {file_passed_size_filter}, Date: {file_passed_date_filter}, Search: {file_passed_search_filter}")
                         print(f"Active filters: {active_filters}")
-                        print(f"File extension: {item.suffix.lower()}")
+                        print(f"File extension: {file_extension}")
             
+            if filter_phase is not None:
+                profile.stop(filter_phase, len(snapshot))
             return files_data
             
         except Exception as e:
-            return [{
+            # Hatadan önce toplanan satırlar korunur, hata ayrı bir satır olarak eklenir
+            return files_data + [{
                 'Name': f'Error: {str(e)}',
                 'Type': 'Error',
                 'Size (GB)': 0,
@@ -977,7 +1175,20 @@ class FileSizeAnalyzer:
             self.progress.start()
             self.status_label.config(text="Analyzing folder contents and subfolders...")
             self.root.update()
+            self.run_profile = RunProfile(self.selected_folder, deep=DEEP_PROFILE or '--profile-run' in sys.argv)
+            self.stop_live_watch()
             all_data = self.analyze_folder_contents(self.selected_folder)
+            if self.snapshot is not None:
+                try:
+                    self.snapshot_path = self.get_snapshot_store().save(self.snapshot)
+                except OSError:
+                    self.snapshot_path = None
+                try:
+                    from history_store import HistoryStore
+                    HistoryStore().record(self.snapshot)
+                except (OSError, sqlite3.Error) as e:
+                    print(f"Could not record scan history: {e}")
+            self.update_explorer()
             total_size_gb = sum(item['Size (GB)'] for item in all_data if item['Type'] in ['File', 'Folder'])
             self.progress.stop()
             return all_data, total_size_gb
@@ -986,13 +1197,144 @@ class FileSizeAnalyzer:
             self.progress.stop()
             raise e
     
+    def quick_estimate(self):
+        # Tam tarama yapılmaz: örneklenmiş boyutlar gösterilir, raporlar ve canlı izleme son tam analizi kullanmaya devam eder
+        if not self.selected_folder:
+            messagebox.showwarning("Warning", "Please select a folder first!")
+            return
+        try:
+            budget = float(os.environ.get('ANALYZER_ESTIMATE_S', '2'))
+            if not budget > 0:
+                raise ValueError(budget)
+        except ValueError:
+            messagebox.showwarning("Warning", f"Invalid ANALYZER_ESTIMATE_S value: {os.environ.get('ANALYZER_ESTIMATE_S')}\nUsing 2 seconds.")
+            budget = 2.0
+        self.progress.start()
+        self.status_label.config(text=f"Estimating sizes for {budget:g} s...")
+        self.root.update()
+        try:
+            rows = self.analyze_folder_contents(self.selected_folder, estimate_budget=budget)
+        finally:
+            self.progress.stop()
+        # Hata satırları tahmin sütunlarını taşımaz, özetten ayrı tutulur
+        errors = [row for row in rows if row['Type'] == 'Error']
+        rows = [row for row in rows if row['Type'] != 'Error']
+        if errors and not rows:
+            messagebox.showerror("Error", errors[0]['Name'])
+            return
+        total_gb = sum(row['Size (GB)'] for row in rows)
+        lines = [f"{'📁' if row['Type'] == 'Folder' else '📄'} {row['Name']}: ~{row['Size (GB)']:.2f} GB" +
+                 ("" if row['Exact'] else f" ({row['Low (GB)']:.2f}-{row['High (GB)']:.2f} GB)" if row['High (GB)'] is not None else f" (≥ {row['Low (GB)']:.2f} GB)")
+                 for row in rows[:10]]
+        self.result_label.config(text=f"""
+⚡ ESTIMATE: {os.path.basename(self.selected_folder) or self.selected_folder}
+
+💾 Estimated Size: ~{total_gb:.2f} GB
+📁 Top-level Items: {len(rows)} ({sum(row['Exact'] for row in rows)} exact)
+
+""" + "\n".join(lines))
+        self.status_label.config(text="Estimate ready. Sizes in brackets are 95% intervals; run a full analysis for exact sizes."
+                                      + (f"  ⚠️ {errors[0]['Name']}" if errors else ""))
+    
+    def update_explorer(self):
+        # Sonuç ağacı bellekteki snapshot'tan çizilir: klasörler açıldıkça yüklenir, sıralama ve alt klasöre inme yeniden tarama yapmaz
+        if self.snapshot is None:
+            if self.explorer is not None:
+                self.explorer.grid_remove()
+            return
+        if self.explorer is None:
+            from tree_explorer import SnapshotExplorer
+            self.explorer = SnapshotExplorer(self.result_frame, self.colors)
+            self.result_frame.grid_rowconfigure(1, weight=1)
+        self.explorer.grid(row=1, column=0, pady=(8, 0), sticky="nsew")
+        self.explorer.load(self.snapshot)
+    
+    def toggle_live_watch(self):
+        if self.live_watch is not None:
+            self.stop_live_watch()
+            self.status_label.config(text="Live watch stopped.")
+            return
+        if self.snapshot is None or not self.files_data:
+            messagebox.showinfo("Info", "Please run analysis first by creating Excel report!")
+            return
+        if self.snapshot.partial is not None:
+            messagebox.showinfo("Info", "Live watch needs a complete scan.\nClear the scan limits and analyze again.")
+            return
+        from live_watch import LiveWatch
+        self.live_watch = LiveWatch(self.snapshot, categories=self.file_categories, rules=self.get_scan_rules())
+        self.live_version = None
+        self.live_button.config(text="⏹️ Stop Live")
+        self.poll_live_watch(self.live_watch)
+    
+    def stop_live_watch(self):
+        if self.live_watch is not None:
+            self.live_watch.stop()
+            self.live_watch = None
+            self.live_button.config(text="🔴 Live")
+    
+    def poll_live_watch(self, watch):
+        # Tk iş parçacığında çalışır: değişiklikler arka planda uygulanır, burada yalnızca üst seviye yeniden filtrelenir
+        if watch is None or watch is not self.live_watch:
+            return
+        if watch.version != self.live_version:
+            snapshot, self.live_version = watch.current()
+            self.files_data = self.analyze_folder_contents(self.selected_folder, snapshot=snapshot)
+            # Grafikler yeni ağaçtan yeniden hesaplanır
+            self.snapshot_key = None
+            self.update_explorer()
+            self.result_label.config(text=f"""
+🔴 LIVE: {os.path.basename(self.selected_folder) or self.selected_folder}
+
+💾 Total Size: {snapshot.total_size / (1024 ** 3):.2f} GB
+📄 File Count: {int(snapshot.file_count[0]):,}
+📂 Folder Count: {int(snapshot.is_dir.sum()) - 1:,}
+📁 Top-level Items: {len(self.files_data)}
+🕒 Updated: {datetime.fromtimestamp(watch.updated).strftime('%H:%M:%S')}
+            """)
+        stats = watch.stats()
+        self.status_label.config(text=f"🔴 Live ({stats['mode']}): {stats['watches']:,} folders watched, {stats['unwatched']:,} polled, {stats['events']:,} events, {stats['batches']:,} updates"
+                                      + (f" - {stats['error']}" if stats['error'] else ""))
+        self.root.after(1000, lambda: self.poll_live_watch(watch))
+    
+    def start_run_phase(self, name):
+        if self.run_profile is None:
+            self.run_profile = RunProfile(self.selected_folder, deep=DEEP_PROFILE or '--profile-run' in sys.argv)
+        return self.run_profile.start(name)
+    
+    def finish_run_phase(self, state, status_text):
+        self.run_profile.stop(state, len(self.files_data))
+        if self.snapshot is not None and self.snapshot.partial is not None:
+            status_text += f"  ⚠️ Partial scan ({self.snapshot.partial}): {len(self.snapshot.unlisted):,} folders not opened"
+        if self.snapshot is not None and self.scan_checkpoint is not None and self.scan_checkpoint.resumed:
+            status_text += f"  ♻️ Resumed after {self.scan_checkpoint.resumed:,} entries"
+        if self.snapshot is not None and self.scan_checkpoint is not None and self.scan_checkpoint.error:
+            status_text += f"  ⚠️ {self.scan_checkpoint.error}"
+        if self.snapshot is not None and self.snapshot.errors:
+            status_text += f"  ⚠️ {len(self.snapshot.errors):,} unreadable entries skipped"
+        excluded = [hit for hit in (self.snapshot.rule_hits if self.snapshot is not None else []) if hit['action'] == 'exclude']
+        if any(hit['dirs'] or hit['files'] for hit in excluded):
+            # Kural bazında dökümün tamamı çalışma raporunda; durum satırında en etkili üç kural gösterilir
+            top = sorted((hit for hit in excluded if hit['dirs'] or hit['files']), key=lambda hit: hit['dirs'] + hit['files'], reverse=True)[:3]
+            status_text += (f"  🚫 Excluded: {sum(hit['dirs'] for hit in excluded):,} folders, {sum(hit['files'] for hit in excluded):,} files ("
+                            + ", ".join(f"{hit['rule']}: {hit['dirs'] + hit['files']:,}" for hit in top) + ")")
+        self.status_label.config(text=f"{status_text}  ⏱️ {self.run_profile.summary()}")
+        if self.run_profile.deep:
+            try:
+                print(f"Run report: {self.run_profile.save(report_path(self.selected_folder))}")
+            except OSError as e:
+                print(f"Could not save run report: {e}")
+    
     def export_to_excel(self):
         if not self.selected_folder:
             messagebox.showwarning("Warning", "Please select a folder first!")
             return
             
         try:
+            import pandas as pd
+            from chart_engine import snapshot_hash
             self.files_data, total_size = self.get_file_sizes()
+            self.snapshot_key = snapshot_hash(self.files_data, self.snapshot)
+            export = self.start_run_phase('export_excel')
             
             if not self.files_data:
                 messagebox.showinfo("Info", "No files or folders found in selected location!")
@@ -1286,7 +1628,7 @@ class FileSizeAnalyzer:
             """
             
             self.result_label.config(text=result_text)
-            self.status_label.config(text="Detailed Excel file created successfully!")
+            self.finish_run_phase(export, "Detailed Excel file created successfully!")
             
             messagebox.showinfo(
                 "Success", 
@@ -1313,6 +1655,7 @@ class FileSizeAnalyzer:
             return
             
         try:
+            export = self.start_run_phase('export_pdf')
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             selected_folder_name = os.path.basename(self.selected_folder)
             drive_letter = os.path.splitdrive(self.selected_folder)[0]
@@ -1328,6 +1671,7 @@ class FileSizeAnalyzer:
             output_filename = f"{drive_name}_{selected_folder_name}_analysis_{timestamp}.pdf"
             current_dir = os.path.dirname(os.path.abspath(__file__))
             output_path = os.path.join(current_dir, output_filename)
+            from fpdf import FPDF
             pdf = FPDF()
             pdf.add_page()
             pdf.set_font("Helvetica", 'B', 16)
@@ -1379,7 +1723,7 @@ class FileSizeAnalyzer:
             """
             
             self.result_label.config(text=result_text)
-            self.status_label.config(text="PDF report created successfully!")
+            self.finish_run_phase(export, "PDF report created successfully!")
             messagebox.showinfo(
                 "Success", 
                 f"PDF report created!\n\n"
@@ -1403,6 +1747,7 @@ class FileSizeAnalyzer:
             return
             
         try:
+            export = self.start_run_phase('export_html')
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             selected_folder_name = os.path.basename(self.selected_folder)
             drive_letter = os.path.splitdrive(self.selected_folder)[0]
@@ -1422,6 +1767,7 @@ class FileSizeAnalyzer:
             folders_count = len([item for item in self.files_data if item['Type'] == 'Folder'])
             error_count = len([item for item in self.files_data if item['Type'] == 'Error'])
             total_size_gb = sum(item['Size (GB)'] for item in self.files_data if item['Type'] in ['File', 'Folder'])
+            import pandas as pd
             df = pd.DataFrame(self.files_data)
             html_content = f"""
 <!DOCTYPE html>
@@ -1597,7 +1943,7 @@ class FileSizeAnalyzer:
             """
             
             self.result_label.config(text=result_text)
-            self.status_label.config(text="HTML report created successfully!")
+            self.finish_run_phase(export, "HTML report created successfully!")
             
             messagebox.showinfo(
                 "Success", 
@@ -1624,139 +1970,92 @@ class FileSizeAnalyzer:
             return
             
         try:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             selected_folder_name = os.path.basename(self.selected_folder)
             drive_letter = os.path.splitdrive(self.selected_folder)[0]
             
             try:
+                import shutil
                 total, used, free = shutil.disk_usage(self.selected_folder)
                 drive_size_gb = total // (1024**3)
                 drive_name = f"{drive_letter} ({drive_size_gb}GB)"
             except:
                 drive_name = drive_letter
             
-            current_dir = os.path.dirname(os.path.abspath(__file__))
-            
-            plt.style.use('seaborn-v0_8')
-            sns.set_palette("husl")
-            fig, (ax1, ax2, ax3) = plt.subplots(1, 3, figsize=(20, 6))
-            fig.suptitle(f'📁 {drive_name} - {selected_folder_name}\nFile Analysis Charts', 
-                        fontsize=16, fontweight='bold', y=0.95)
-            
-            df = pd.DataFrame(self.files_data)
-            file_types = df[df['Type'] == 'File']['Extension'].value_counts()
-            
-            if len(file_types) > 0:
-                if len(file_types) > 8:
-                    top_types = file_types.head(8)
-                    other_count = file_types.iloc[8:].sum()
-                    top_types['Others'] = other_count
-                    plot_data = top_types
-                else:
-                    plot_data = file_types
-                
-                colors = plt.cm.Set3(np.linspace(0, 1, len(plot_data)))
-                wedges, texts, autotexts = ax1.pie(plot_data.values, labels=plot_data.index, 
-                                                  autopct='%1.1f%%', startangle=90, colors=colors)
-                ax1.set_title('📄 File Types Distribution', fontsize=14, fontweight='bold', pad=20)
-                
-                for autotext in autotexts:
-                    autotext.set_color('white')
-                    autotext.set_fontweight('bold')
-            else:
-                ax1.text(0.5, 0.5, 'No files found', ha='center', va='center', 
-                        transform=ax1.transAxes, fontsize=12)
-                ax1.set_title('📄 File Types Distribution', fontsize=14, fontweight='bold', pad=20)
-            
-            folder_data = df[df['Type'] == 'Folder'].sort_values('Size (GB)', ascending=False).head(10)
-            
-            if len(folder_data) > 0:
-                bars = ax2.barh(range(len(folder_data)), folder_data['Size (GB)'], 
-                               color=plt.cm.viridis(np.linspace(0, 1, len(folder_data))))
-                ax2.set_yticks(range(len(folder_data)))
-                ax2.set_yticklabels([name[:20] + '...' if len(name) > 20 else name 
-                                   for name in folder_data['Name']])
-                ax2.set_xlabel('Size (GB)', fontweight='bold')
-                ax2.set_title('📂 Top 10 Largest Folders', fontsize=14, fontweight='bold', pad=20)
-                
-                for i, (bar, size) in enumerate(zip(bars, folder_data['Size (GB)'])):
-                    ax2.text(bar.get_width() + 0.01, bar.get_y() + bar.get_height()/2, 
-                            f'{size:.2f} GB', va='center', fontweight='bold')
-                
-                ax2.invert_yaxis()
-            else:
-                ax2.text(0.5, 0.5, 'No folders found', ha='center', va='center', 
-                        transform=ax2.transAxes, fontsize=12)
-                ax2.set_title('📂 Top 10 Largest Folders', fontsize=14, fontweight='bold', pad=20)
-            
-            folder_data_all = df[df['Type'] == 'Folder'].sort_values('Size (GB)', ascending=False)
-            
-            if len(folder_data_all) > 0:
-                max_folders = min(20, len(folder_data_all))
-                grid_size = int(np.ceil(np.sqrt(max_folders)))
-                heatmap_data = np.zeros((grid_size, grid_size))
-                folder_names = []
-                
-                for i in range(max_folders):
-                    row = i // grid_size
-                    col = i % grid_size
-                    heatmap_data[row, col] = folder_data_all.iloc[i]['Size (GB)']
-                    folder_names.append(folder_data_all.iloc[i]['Name'][:15] + '...' 
-                                      if len(folder_data_all.iloc[i]['Name']) > 15 
-                                      else folder_data_all.iloc[i]['Name'])
-                
-                im = ax3.imshow(heatmap_data, cmap='magma', aspect='auto')
-                ax3.set_title('🔥 Folder Size Heat Map', fontsize=14, fontweight='bold', pad=20)
-                cbar = plt.colorbar(im, ax=ax3, shrink=0.8)
-                cbar.set_label('Size (GB)', fontweight='bold')
-                
-                for i in range(max_folders):
-                    row = i // grid_size
-                    col = i % grid_size
-                    size = heatmap_data[row, col]
-                    if size > 0:
-                        ax3.text(col, row, f'{folder_names[i]}\n{size:.2f} GB', 
-                                ha='center', va='center', fontsize=8, fontweight='bold',
-                                color='white' if size > heatmap_data.max() * 0.5 else 'black')
-                
-                ax3.set_xticks([])
-                ax3.set_yticks([])
-                
-            else:
-                ax3.text(0.5, 0.5, 'No folders found', ha='center', va='center', 
-                        transform=ax3.transAxes, fontsize=12)
-                ax3.set_title('🔥 Folder Size Heat Map', fontsize=14, fontweight='bold', pad=20)
-            
-            plt.tight_layout()
-            chart_filename = f"{drive_name}_{selected_folder_name}_charts_{timestamp}.png"
-            chart_path = os.path.join(current_dir, chart_filename)
-            plt.savefig(chart_path, dpi=300, bbox_inches='tight', facecolor='white')
-            plt.show()
+            if self.snapshot_key is None:
+                from chart_engine import snapshot_hash
+                self.snapshot_key = snapshot_hash(self.files_data, self.snapshot)
+            chart_title = f'📁 {drive_name} - {selected_folder_name}'
+            # Tarama sırasında hesaplanan özetler varsa dosya türleri tüm ağaçtan okunur
+            rollups = self.snapshot.rollups if self.snapshot is not None else None
+            image_data = self.get_chart_engine().render_png(self.snapshot_key, self.files_data, chart_title, target='screen', rollups=rollups)
+            aggregates = self.get_chart_engine().get_aggregates(self.snapshot_key, self.files_data, rollups)
+            self.show_chart_window(chart_title, image_data, drive_name, selected_folder_name, rollups)
             result_text = f"""
 📈 Charts Generated Successfully!
 
 📁 Total Items: {len(self.files_data)}
-📄 File Types: {len(df[df['Type'] == 'File']['Extension'].unique())}
-📂 Folders Analyzed: {len(df[df['Type'] == 'Folder'])}
-📊 Chart File: {chart_filename}
-📍 Location: {current_dir}
+📄 File Types: {aggregates['extension_count']}{' (whole tree)' if rollups is not None else ''}
+📂 Folders Analyzed: {aggregates['folder_count']}
+📍 Use "Save PNG" in the chart window to export a print-quality image
             """
             
             self.result_label.config(text=result_text)
             self.status_label.config(text="Charts generated and displayed successfully!")
-            messagebox.showinfo(
-                "Success", 
-                f"Charts generated successfully!\n\n"
-                f"File: {chart_filename}\n"
-                f"Location: {current_dir}\n\n"
-                f"Charts displayed in new window.\n"
-                f"Chart saved as PNG file."
-            )
             
         except Exception as e:
             messagebox.showerror("Error", f"An error occurred while creating charts:\n{str(e)}")
             self.status_label.config(text="Chart creation failed!")
     
+    def show_chart_window(self, chart_title, image_data, drive_name, selected_folder_name, rollups=None):
+        chart_window = tk.Toplevel(self.root)
+        chart_window.title("📈 File Analysis Charts")
+        chart_window.geometry("1100x560")
+        chart_window.configure(bg=self.colors['bg'])
+        chart_window.transient(self.root)
+        chart_frame = tk.Frame(chart_window, bg=self.colors['bg'])
+        chart_frame.pack(fill='both', expand=True, padx=10, pady=(10, 0))
+        chart_frame.grid_rowconfigure(0, weight=1)
+        chart_frame.grid_columnconfigure(0, weight=1)
+        canvas = tk.Canvas(chart_frame, bg='white', highlightthickness=0)
+        x_scrollbar = ttk.Scrollbar(chart_frame, orient="horizontal", command=canvas.xview)
+        y_scrollbar = ttk.Scrollbar(chart_frame, orient="vertical", command=canvas.yview)
+        canvas.configure(xscrollcommand=x_scrollbar.set, yscrollcommand=y_scrollbar.set)
+        canvas.grid(row=0, column=0, sticky="nsew")
+        y_scrollbar.grid(row=0, column=1, sticky="ns")
+        x_scrollbar.grid(row=1, column=0, sticky="ew")
+        chart_image = tk.PhotoImage(data=base64.b64encode(image_data))
+        canvas.create_image(0, 0, image=chart_image, anchor="nw")
+        canvas.configure(scrollregion=(0, 0, chart_image.width(), chart_image.height()))
+        canvas.image = chart_image
+        
+        def save_chart():
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            chart_filename = f"{drive_name}_{selected_folder_name}_charts_{timestamp}.png"
+            current_dir = os.path.dirname(os.path.abspath(__file__))
+            chart_path = os.path.join(current_dir, chart_filename)
+            try:
+                self.get_chart_engine().save_png(self.snapshot_key, self.files_data, chart_title, chart_path, target='print', rollups=rollups)
+                self.status_label.config(text=f"Chart saved: {chart_filename}")
+                messagebox.showinfo("Success", f"Chart saved as PNG file!\n\nFile: {chart_filename}\nLocation: {current_dir}", parent=chart_window)
+            except Exception as e:
+                messagebox.showerror("Error", f"An error occurred while saving chart:\n{str(e)}", parent=chart_window)
+        
+        save_btn = tk.Button(
+            chart_window,
+            text="💾 Save PNG (300 DPI)",
+            command=save_chart,
+            font=("Segoe UI", 10, "bold"),
+            bg='#6f42c1',
+            fg=self.colors['fg'],
+            relief='flat',
+            padx=12,
+            pady=6,
+            cursor='hand2',
+            activebackground='#5a32a3',
+            activeforeground=self.colors['fg']
+        )
+        save_btn.pack(pady=10)
+    
     def get_file_category(self, file_extension):
         for category, extensions in self.file_categories.items():
             if file_extension.lower() in extensions:
@@ -1844,25 +2143,39 @@ class FileSizeAnalyzer:
             files_list = [item for item in self.files_data if item['Type'] == 'File']
             folders_list = [item for item in self.files_data if item['Type'] == 'Folder']
             
-            for item in files_list:
-                file_size = item['Size (GB)']
-                total_original_size += file_size
-                
-                file_category = self.get_file_category(item['Extension'])
-                savings = self.calculate_compression_savings(file_size, file_category)
+            if self.snapshot is not None:
+                # Kategori toplamları taramada hazırlandı: tüm ağaç için kategori başına tek hesap
+                for row in self.snapshot.rollups.categories(0):
+                    category_size = row['bytes'] / (1024 * 1024 * 1024)
+                    total_original_size += category_size
+                    for algorithm, data in self.calculate_compression_savings(category_size, row['category']).items():
+                        total_potential_savings[algorithm] = total_potential_savings.get(algorithm, 0) + data['savings_gb']
+            else:
+                for item in files_list:
+                    file_size = item['Size (GB)']
+                    total_original_size += file_size
+                    
+                    file_category = self.get_file_category(item['Extension'])
+                    savings = self.calculate_compression_savings(file_size, file_category)
+                    
+                    for algorithm, data in savings.items():
+                        if algorithm not in total_potential_savings:
+                            total_potential_savings[algorithm] = 0
+                        total_potential_savings[algorithm] += data['savings_gb']
                 
-                for algorithm, data in savings.items():
-                    if algorithm not in total_potential_savings:
-                        total_potential_savings[algorithm] = 0
-                    total_potential_savings[algorithm] += data['savings_gb']
-            
-            for item in folders_list:
-                total_folder_size += item['Size (GB)']
+                for item in folders_list:
+                    total_folder_size += item['Size (GB)']
             
             summary_text = f"📁 Total Items: {len(self.files_data)}\n"
-            summary_text += f"📄 Files: {len(files_list)} ({total_original_size:.2f} GB)\n"
-            summary_text += f"📂 Folders: {len(folders_list)} ({total_folder_size:.2f} GB)\n"
-            summary_text += f"💾 Total Size: {total_original_size + total_folder_size:.2f} GB\n\n"
+            if self.snapshot is not None:
+                allocated = sum(row['allocated'] for row in self.snapshot.rollups.categories(0)) / (1024 * 1024 * 1024)
+                summary_text += f"📄 Files (whole tree): {int(self.snapshot.file_count[0]):,} ({total_original_size:.2f} GB, {allocated:.2f} GB on disk)\n"
+                summary_text += f"📂 Folders: {len(folders_list)}\n"
+                summary_text += f"💾 Total Size: {total_original_size:.2f} GB\n\n"
+            else:
+                summary_text += f"📄 Files: {len(files_list)} ({total_original_size:.2f} GB)\n"
+                summary_text += f"📂 Folders: {len(folders_list)} ({total_folder_size:.2f} GB)\n"
+                summary_text += f"💾 Total Size: {total_original_size + total_folder_size:.2f} GB\n\n"
             summary_text += "🔥 Top 5 Potential Savings:\n"
             sorted_algorithms = sorted(total_potential_savings.items(), key=lambda x: x[1], reverse=True)
             
@@ -1991,6 +2304,97 @@ class FileSizeAnalyzer:
             messagebox.showerror("Error", f"An error occurred during optimization analysis:\n{str(e)}")
             self.status_label.config(text="Optimization analysis failed!")
     
+    def show_comparison(self):
+        if self.snapshot is None:
+            messagebox.showinfo("Info", "Please run analysis first by creating Excel report!")
+            return
+        
+        previous = [meta for meta in self.get_snapshot_store().list_snapshots(self.snapshot.root) if meta['path'] != self.snapshot_path]
+        if not previous:
+            messagebox.showinfo("Info", "No earlier snapshot of this folder yet.\nAnalyze it again later to see what changed.")
+            return
+        
+        compare_window = tk.Toplevel(self.root)
+        compare_window.title("🔀 Compare With Earlier Scan")
+        compare_window.geometry("1000x700")
+        compare_window.configure(bg=self.colors['bg'])
+        compare_window.transient(self.root)
+        controls_frame = tk.Frame(compare_window, bg=self.colors['bg'])
+        controls_frame.pack(fill='x', padx=20, pady=(20, 10))
+        baseline_label = tk.Label(
+            controls_frame,
+            text="Compare with:",
+            font=("Segoe UI", 10, "bold"),
+            bg=self.colors['bg'],
+            fg=self.colors['fg']
+        )
+        baseline_label.pack(side='left')
+        options = {
+            f"{datetime.fromtimestamp(meta['created']).strftime('%d.%m.%Y %H:%M:%S')} - {meta['entries']} entries, {meta['total_size'] / (1024 ** 3):.2f} GB{' (partial)' if meta.get('partial') else ''}": meta['path']
+            for meta in previous
+        }
+        baseline_var = tk.StringVar(value=next(iter(options)))
+        baseline_combo = ttk.Combobox(controls_frame, textvariable=baseline_var, values=list(options), state='readonly', width=60)
+        baseline_combo.pack(side='left', padx=10)
+        summary_label = tk.Label(
+            compare_window,
+            text="",
+            font=("Segoe UI", 10),
+            bg=self.colors['bg'],
+            fg=self.colors['fg'],
+            justify='left',
+            anchor='w'
+        )
+        summary_label.pack(fill='x', padx=20)
+        tables_frame = tk.Frame(compare_window, bg=self.colors['bg'])
+        tables_frame.pack(fill='both', expand=True, padx=20, pady=10)
+        tables_frame.grid_columnconfigure(0, weight=1)
+        tables_frame.grid_columnconfigure(1, weight=1)
+        tables_frame.grid_rowconfigure(0, weight=1)
+        tables_frame.grid_rowconfigure(1, weight=1)
+        
+        def make_table(row, column, columnspan, headings):
+            tree = ttk.Treeview(tables_frame, columns=headings, show='headings', height=8)
+            for heading in headings:
+                tree.heading(heading, text=heading)
+                tree.column(heading, width=120 if heading != headings[0] else 220, anchor='w' if heading == headings[0] else 'e')
+            tree.grid(row=row, column=column, columnspan=columnspan, sticky="nsew", padx=4, pady=4)
+            return tree
+        
+        folder_table = make_table(0, 0, 1, ('Folder', 'Net (GB)', 'Added (GB)', 'Removed (GB)', 'Changed Files'))
+        category_table = make_table(0, 1, 1, ('Category', 'Net (GB)', 'Added (GB)', 'Removed (GB)', 'Changed Files'))
+        entries_table = make_table(1, 0, 2, ('Path', 'Status', 'Old (GB)', 'New (GB)', 'Delta (GB)'))
+        
+        def gb(value, signed=True):
+            return f"{value / (1024 ** 3):+.3f}" if signed else f"{value / (1024 ** 3):.3f}"
+        
+        def run_comparison(event=None):
+            from snapshot_diff import DIFF_STATUSES, diff_snapshots
+            try:
+                self.status_label.config(text="Comparing snapshots...")
+                self.root.update()
+                diff = diff_snapshots(self.get_snapshot_store().load(options[baseline_var.get()]), self.snapshot)
+                summary = diff.summary()
+                summary_text = f"📊 Net change: {diff.net_delta / (1024 ** 3):+.2f} GB\n"
+                summary_text += "   ".join(f"{status}: {summary[status]['count']} ({summary[status]['bytes'] / (1024 ** 3):+.2f} GB)" for status in DIFF_STATUSES)
+                if diff.unknown:
+                    summary_text += f"\n⚠️ Not compared, unopened in a partial scan: {', '.join(diff.unknown[:5])}" + (f" and {len(diff.unknown) - 5} more" if len(diff.unknown) > 5 else "")
+                summary_label.config(text=summary_text)
+                for tree, table, key in ((folder_table, diff.by_folder, 'Folder'), (category_table, diff.by_category, 'Category')):
+                    tree.delete(*tree.get_children())
+                    for row in table.head(200).itertuples(index=False):
+                        tree.insert('', 'end', values=(getattr(row, key), gb(row[1]), gb(row[2]), gb(row[3]), row[6]))
+                entries_table.delete(*entries_table.get_children())
+                for row in diff.top(n=500).itertuples(index=False):
+                    entries_table.insert('', 'end', values=(row.Path, row.Status, gb(row[2], False), gb(row[3], False), gb(row.Delta)))
+                self.status_label.config(text="Snapshot comparison completed!")
+            except Exception as e:
+                messagebox.showerror("Error", f"An error occurred while comparing snapshots:\n{str(e)}", parent=compare_window)
+                self.status_label.config(text="Snapshot comparison failed!")
+        
+        baseline_combo.bind('<<ComboboxSelected>>', run_comparison)
+        run_comparison()
+    
     def export_optimization_report(self, parent_window):
         try:
             if not self.files_data:
@@ -2027,6 +2431,7 @@ class FileSizeAnalyzer:
                             'Savings (%)': 0
                         })
             
+            import pandas as pd
             df = pd.DataFrame(optimization_data)
             current_dir = os.path.dirname(os.path.abspath(__file__))
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -2095,7 +2500,23 @@ class FileSizeAnalyzer:
         except Exception as e:
             messagebox.showerror("Error", f"An error occurred while exporting optimization report:\n{str(e)}")
     
+    def warm_up(self):
+        # Ağır modüller arayüz dışında önceden yüklenir, böylece ilk rapor veya grafik beklemez
+        def load():
+            for name in WARMUP_MODULES:
+                try:
+                    importlib.import_module(name)
+                except ImportError as e:
+                    # Eksik modül ilk kullanımda raporlanır; yalnızca içe aktarma profiline not düşülür
+                    if 'import_profile' in sys.modules:
+                        sys.modules['import_profile'].mark(f"warm-up skipped {name} ({e})")
+        threading.Thread(target=load, name='import-warmup', daemon=True).start()
+    
     def run(self):
+        if 'import_profile' in sys.modules:
+            self.root.after_idle(lambda: sys.modules['import_profile'].mark('window shown'))
+        if '--no-warmup' not in sys.argv and os.environ.get('ANALYZER_WARMUP', '1') != '0':
+            self.root.after(500, self.warm_up)
         self.root.mainloop()
 
 if __name__ == "__main__":
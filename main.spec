@@ -14,7 +14,6 @@ a = Analysis(
         'openpyxl',
         'fpdf',
         'matplotlib',
-        'seaborn',
         'numpy',
         'pathlib',
         'datetime',
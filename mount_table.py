@@ -0,0 +1,125 @@
+import os
+import platform
+import threading
+import time
+
+HOST_MOUNT_ROOT = os.environ.get('ANALYZER_HOST_ROOT', '/host')
+DEFAULT_TTL = 60
+
+
+def _unescape(field):
+    # /proc/mounts escapes spaces, tabs, newlines and backslashes as octal
+    return field.replace('\\040', ' ').replace('\\011', '\t').replace('\\012', '\n').replace('\\134', '\\')
+
+
+def read_proc_mounts(path='/proc/mounts'):
+    mounts = []
+    with open(path, encoding='utf-8', errors='surrogateescape') as f:
+        for line in f:
+            fields = line.split()
+            if len(fields) >= 3:
+                mounts.append({'device': _unescape(fields[0]), 'mount_point': _unescape(fields[1]), 'fs_type': fields[2]})
+    return mounts
+
+
+def _linux_drives(host_root):
+    drives = {}
+    prefix = host_root.rstrip('/') + '/'
+    try:
+        for mount in read_proc_mounts():
+            name = mount['mount_point'][len(prefix):]
+            if mount['mount_point'].startswith(prefix) and len(name) == 1 and name.isalpha():
+                drives[name.upper()] = {'path': mount['mount_point'], 'fs_type': mount['fs_type'], 'device': mount['device']}
+    except OSError:
+        pass
+    # Plain directories under the host root count too (bind mounts are not always listed separately)
+    try:
+        with os.scandir(host_root) as entries:
+            for entry in entries:
+                if len(entry.name) == 1 and entry.name.isalpha() and entry.is_dir():
+                    drives.setdefault(entry.name.upper(), {'path': entry.path, 'fs_type': '', 'device': ''})
+    except OSError:
+        pass
+    return drives
+
+
+def _windows_drives():
+    import ctypes
+
+    kernel32 = ctypes.windll.kernel32
+    drive_types = {2: 'removable', 3: 'fixed', 4: 'network', 5: 'cdrom', 6: 'ramdisk'}
+    # GetLogicalDrives is a bitmask lookup; unlike os.path.exists it never waits on an empty or offline drive
+    bitmask = kernel32.GetLogicalDrives()
+    drives = {}
+    for bit in range(26):
+        if bitmask & (1 << bit):
+            letter = chr(ord('A') + bit)
+            drives[letter] = {'path': f'{letter}:\\', 'fs_type': drive_types.get(kernel32.GetDriveTypeW(f'{letter}:\\'), 'unknown'), 'device': ''}
+    return drives
+
+
+class MountTable:
+    def __init__(self, ttl=DEFAULT_TTL, host_root=HOST_MOUNT_ROOT):
+        self.ttl = ttl
+        self.host_root = host_root
+        self.system = platform.system()
+        self._drives = {}
+        self._refreshed = 0.0
+        self._refreshing = False
+        self._lock = threading.Lock()
+        self.refresh()
+
+    def refresh(self):
+        if self.system == 'Linux':
+            drives = _linux_drives(self.host_root)
+        elif self.system == 'Windows':
+            drives = _windows_drives()
+        else:
+            drives = {}
+        with self._lock:
+            self._drives = dict(sorted(drives.items()))
+            self._refreshed = time.time()
+            self._refreshing = False
+        return self._drives
+
+    def _maybe_refresh(self):
+        # Stale entries are served while a background thread rediscovers the drives
+        with self._lock:
+            if self._refreshing or time.time() - self._refreshed < self.ttl:
+                return
+            self._refreshing = True
+        threading.Thread(target=self.refresh, name='mount-refresh', daemon=True).start()
+
+    @property
+    def age(self):
+        return time.time() - self._refreshed
+
+    def drives(self):
+        self._maybe_refresh()
+        return list(self._drives)
+
+    def info(self):
+        self._maybe_refresh()
+        return dict(self._drives)
+
+    def drive_path(self, letter):
+        drive = self.info().get(letter.upper())
+        return drive['path'] if drive else None
+
+    def normalize(self, path):
+        if not path: return path
+        if self.system == 'Linux':
+            if len(path) >= 2 and path[1] == ':' and path[0].isalpha():
+                mount_point = self.drive_path(path[0])
+                if mount_point is None: return None
+                normalized_path = path[3:].replace('\\', '/').replace('//', '/')
+                return f'{mount_point}/{normalized_path}'
+            if path.startswith(self.host_root.rstrip('/') + '/'): return path
+        elif self.system == 'Windows':
+            if path.endswith('\\') and len(path) == 2:
+                normalized = path.rstrip('\\')
+                if len(normalized) == 1: return normalized + ":\\"
+                return normalized
+            path = path.replace('\\\\', '\\')
+            if len(path) >= 2 and path[1] == ':' and len(path) == 2: path = path + "\\"
+        return path.strip()
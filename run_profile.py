@@ -0,0 +1,183 @@
+import json
+import os
+import platform
+import threading
+import time
+from contextlib import contextmanager
+
+# Extra detail (cProfile per phase, tracemalloc peaks) costs 2-3x run time, so it is opt-in
+DEEP_PROFILE = os.environ.get('ANALYZER_DEEP_PROFILE', '') not in ('', '0')
+TOP_FUNCTIONS = 15
+
+
+def _linux_io():
+    # Per-thread counters where the kernel has them, so concurrent scans in the web server do not count each other's I/O
+    for path in ('/proc/thread-self/io', '/proc/self/io'):
+        try:
+            with open(path, encoding='ascii') as f:
+                counters = {key: int(value) for key, value in (line.split(': ') for line in f)}
+            return {'read_syscalls': counters['syscr'], 'write_syscalls': counters['syscw']}
+        except (OSError, KeyError, ValueError):
+            continue
+    return {}
+
+
+def _windows_io():
+    import ctypes
+
+    class IO_COUNTERS(ctypes.Structure):
+        _fields_ = [(name, ctypes.c_ulonglong) for name in ('ReadOperationCount', 'WriteOperationCount', 'OtherOperationCount',
+                                                            'ReadTransferCount', 'WriteTransferCount', 'OtherTransferCount')]
+
+    counters = IO_COUNTERS()
+    kernel32 = ctypes.windll.kernel32
+    if not kernel32.GetProcessIoCounters(kernel32.GetCurrentProcess(), ctypes.byref(counters)):
+        return {}
+    # Directory listings and metadata queries land in "other" on Windows
+    return {'read_syscalls': counters.ReadOperationCount, 'write_syscalls': counters.WriteOperationCount, 'other_syscalls': counters.OtherOperationCount}
+
+
+def _windows_peak_rss():
+    import ctypes
+
+    class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+        _fields_ = [('cb', ctypes.c_ulong), ('PageFaultCount', ctypes.c_ulong)] + [(name, ctypes.c_size_t) for name in (
+            'PeakWorkingSetSize', 'WorkingSetSize', 'QuotaPeakPagedPoolUsage', 'QuotaPagedPoolUsage',
+            'QuotaPeakNonPagedPoolUsage', 'QuotaNonPagedPoolUsage', 'PagefileUsage', 'PeakPagefileUsage')]
+
+    counters = PROCESS_MEMORY_COUNTERS()
+    counters.cb = ctypes.sizeof(counters)
+    if not ctypes.windll.psapi.GetProcessMemoryInfo(ctypes.windll.kernel32.GetCurrentProcess(), ctypes.byref(counters), counters.cb):
+        return None
+    return counters.PeakWorkingSetSize
+
+
+SYSTEM = platform.system()
+
+
+def io_counters():
+    if SYSTEM == 'Linux':
+        return _linux_io()
+    if SYSTEM == 'Windows':
+        return _windows_io()
+    return {}
+
+
+def peak_rss_bytes():
+    if SYSTEM == 'Windows':
+        return _windows_peak_rss()
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if SYSTEM == 'Darwin' else peak * 1024
+
+
+class RunProfile:
+    def __init__(self, label='', deep=DEEP_PROFILE):
+        self.label = label
+        self.deep = deep
+        self.started = time.time()
+        self.phases = []
+        self.profiles = {}
+        self._lock = threading.Lock()
+
+    def start(self, name):
+        state = {'name': name, 'io': io_counters(), 'wall': time.perf_counter(), 'cpu': time.thread_time(), 'profiler': None}
+        if self.deep:
+            import cProfile
+            import tracemalloc
+
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+            state['profiler'] = cProfile.Profile()
+            try:
+                state['profiler'].enable()
+            except ValueError:
+                # Another profiler is already active on this thread (nested phase or an outer debugger)
+                state['profiler'] = None
+        return state
+
+    def stop(self, state, entries=None, error=None, **counters):
+        if state['profiler'] is not None:
+            state['profiler'].disable()
+        wall = time.perf_counter() - state['wall']
+        cpu = time.thread_time() - state['cpu']
+        io_after = io_counters()
+        record = {'phase': state['name'], 'wall_s': round(wall, 4), 'cpu_s': round(cpu, 4), 'entries': entries,
+                  'entries_per_s': round(entries / wall) if entries is not None and wall > 0 else None}
+        for key, value in io_after.items():
+            record[key] = value - state['io'].get(key, 0)
+        peak = peak_rss_bytes()
+        record['peak_rss_mb'] = round(peak / (1024 ** 2), 1) if peak is not None else None
+        record.update(counters)
+        if error is not None:
+            record['error'] = f"{type(error).__name__}: {error}"
+        if state['profiler'] is not None:
+            import pstats
+            import tracemalloc
+
+            record['peak_alloc_mb'] = round(tracemalloc.get_traced_memory()[1] / (1024 ** 2), 1)
+            stats = pstats.Stats(state['profiler'])
+            record['top_functions'] = [
+                {'function': f"{os.path.basename(filename)}:{line}({function})", 'calls': calls, 'own_s': round(own, 4), 'cumulative_s': round(cumulative, 4)}
+                for (filename, line, function), (_, calls, own, cumulative, _) in sorted(stats.stats.items(), key=lambda item: -item[1][3])[:TOP_FUNCTIONS]
+            ]
+            with self._lock:
+                self.profiles.setdefault(state['name'], []).append(state['profiler'])
+        with self._lock:
+            self.phases.append(record)
+        return record
+
+    @contextmanager
+    def phase(self, name, entries=None, **counters):
+        state = self.start(name)
+        record = {'entries': entries, **counters}
+        try:
+            yield record
+        except BaseException as e:
+            self.stop(state, error=e, **record)
+            raise
+        self.stop(state, **record)
+
+    def summary(self):
+        return ' · '.join(f"{record['phase']} {record['wall_s']:.2f} s" for record in self.phases)
+
+    def report(self):
+        with self._lock:
+            phases = list(self.phases)
+        return {
+            'label': self.label,
+            'started': self.started,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'deep': self.deep,
+            'phases': phases,
+            'total': {
+                'wall_s': round(sum(record['wall_s'] for record in phases), 4),
+                'cpu_s': round(sum(record['cpu_s'] for record in phases), 4),
+                'peak_rss_mb': max((record['peak_rss_mb'] for record in phases if record['peak_rss_mb'] is not None), default=None)
+            }
+        }
+
+    def to_json(self):
+        return json.dumps(self.report(), indent=2, default=str)
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(self.to_json())
+        # cProfile dumps sit next to the report, one per phase, for snakeviz or pstats
+        for name, profilers in self.profiles.items():
+            for number, profiler in enumerate(profilers):
+                profiler.dump_stats(f"{os.path.splitext(path)[0]}.{name}{'' if number == 0 else f'.{number}'}.prof")
+        return path
+
+
+def report_path(label, data_dir=None):
+    from snapshot_store import DEFAULT_DATA_DIR, root_slug
+
+    stamp = time.strftime('%Y%m%d_%H%M%S')
+    return os.path.join(data_dir or DEFAULT_DATA_DIR, 'run_reports', f"{root_slug(label or 'run')}_{stamp}.json")
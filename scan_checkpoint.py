@@ -0,0 +1,73 @@
+import json
+import os
+import pickle
+import sys
+import time
+
+from snapshot_store import DEFAULT_DATA_DIR, root_slug
+
+CHECKPOINT_VERSION = 1
+# Seconds between checkpoints: each one pickles every column collected so far, so long scans write a few per minute at most
+CHECKPOINT_INTERVAL = float(os.environ.get('ANALYZER_CHECKPOINT_S', '30'))
+
+
+class ScanCheckpoint:
+    # Walker state of one long scan on local disk: the folders still to list plus every entry collected so far.
+    # scan_tree saves it every `interval` seconds and when it is cancelled or fails, and removes it once the scan
+    # finishes. With resume set, a scan of the same root with the same rules continues from the saved frontier.
+    def __init__(self, root, path=None, interval=CHECKPOINT_INTERVAL, resume=True, data_dir=None):
+        self.root = os.path.abspath(root)
+        self.path = path or os.path.join(data_dir or DEFAULT_DATA_DIR, 'checkpoints', f"{root_slug(self.root)}.checkpoint")
+        self.interval = interval
+        self.resume = resume
+        self.saved = 0
+        self.resumed = 0
+        # Last save or load problem, for the run profile and the apps' status line
+        self.error = None
+        self.last_saved = time.monotonic()
+
+    def due(self):
+        return time.monotonic() - self.last_saved >= self.interval
+
+    def save(self, state):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'wb') as f:
+            pickle.dump({'version': CHECKPOINT_VERSION, 'root': self.root, 'saved': time.time(), 'state': state}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        # Replaced in one step, so a crash while writing leaves the previous checkpoint intact
+        os.replace(temp_path, self.path)
+        with open(self.path + '.json', 'w', encoding='utf-8') as f:
+            json.dump({'root': self.root, 'saved': time.time(), 'entries': len(state['names']) - 1, 'pending': len(state['frontier']),
+                       'errors': len(state['errors'])}, f)
+        self.saved += 1
+        self.last_saved = time.monotonic()
+
+    def load(self):
+        try:
+            with open(self.path, 'rb') as f:
+                checkpoint = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            # pickle reports a damaged file as almost any exception type
+            self.error = f"Ignoring unreadable checkpoint {self.path}: {e}"
+            print(self.error, file=sys.stderr)
+            return None
+        if not isinstance(checkpoint, dict) or checkpoint.get('version') != CHECKPOINT_VERSION or checkpoint.get('root') != self.root:
+            return None
+        return checkpoint['state']
+
+    def info(self):
+        # Entries, pending folders and save time of the last checkpoint, without loading the columns
+        try:
+            with open(self.path + '.json', encoding='utf-8') as f:
+                return json.load(f) if os.path.exists(self.path) else None
+        except (OSError, ValueError):
+            return None
+
+    def clear(self):
+        for path in (self.path, self.path + '.json', self.path + '.tmp'):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
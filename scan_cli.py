@@ -0,0 +1,356 @@
+import time
+
+_started = time.perf_counter()
+
+import argparse
+import csv
+import json
+import os
+import sys
+
+import numpy as np
+
+from io_scheduler import IOScheduler, parse_workers, resolve_workers
+from run_profile import DEEP_PROFILE, RunProfile
+from scan_engine import CATEGORY_NAMES, DEFAULT_RULES, FILE_CATEGORIES, SCAN_ENGINES, SYSTEM_FOLDERS, run_scan
+from scan_rules import ScanRules
+
+_imported = time.perf_counter()
+
+FORMATS = ['json', 'csv', 'parquet', 'snapshot']
+COLUMNS = ['Path', 'Type', 'Size', 'Files', 'Extension', 'Category', 'Depth', 'Modified', 'Complete']
+SIZE_UNITS = {'': 1, 'k': 1024, 'm': 1024 ** 2, 'g': 1024 ** 3, 't': 1024 ** 4}
+
+
+def parse_size(value):
+    text = value.strip().lower().rstrip('b')
+    unit = text[-1] if text and text[-1] in SIZE_UNITS else ''
+    try:
+        return int(float(text[:len(text) - len(unit)]) * SIZE_UNITS[unit])
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid size: {value}")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m scan_cli', description='Scan a folder without the GUI and write the results.')
+    parser.add_argument('path', help='folder to scan')
+    parser.add_argument('-f', '--format', choices=FORMATS, default='json', help='output format (default: json)')
+    parser.add_argument('-o', '--output', help='output file (json/csv default to stdout)')
+    parser.add_argument('--kind', choices=['all', 'file', 'folder'], default='all', help='entry types to write')
+    parser.add_argument('--type', dest='categories', action='append', choices=list(FILE_CATEGORIES) + ['Other'], help='only files of this category (repeatable)')
+    parser.add_argument('--ext', dest='extensions', action='append', help='only files with this extension, e.g. .mp4 (repeatable)')
+    parser.add_argument('--search', help='case-insensitive name filter')
+    parser.add_argument('--min-size', type=parse_size, default=0, help='minimum size, e.g. 500M or 2G')
+    parser.add_argument('--max-depth', type=int, help='only entries up to this depth below the folder')
+    parser.add_argument('--top', type=int, help='only the N largest matching entries')
+    parser.add_argument('--scan-depth', type=int, help='do not open folders deeper than this (partial result)')
+    parser.add_argument('--max-entries', type=int, help='stop opening folders after this many entries (partial result)')
+    parser.add_argument('--time-budget', type=float, metavar='SECONDS', help='stop opening folders after this many seconds (partial result)')
+    parser.add_argument('--exclude', action='append', metavar='PATTERN', help="gitignore-style rule, e.g. 'node_modules/' or '!keep.log' (repeatable)")
+    parser.add_argument('--rules', metavar='FILE', help='read gitignore-style rules from this file')
+    parser.add_argument('--no-exclude', action='store_true', help='also scan system folders (' + ', '.join(SYSTEM_FOLDERS) + ')')
+    parser.add_argument('--store', action='store_true', help='also save the snapshot and scan history for the GUI apps')
+    parser.add_argument('-q', '--quiet', action='store_true', help='no progress or summary on stderr')
+    parser.add_argument('--timings', action='store_true', help='report startup, scan and write times on stderr')
+    parser.add_argument('--report', help='write a JSON run report with per-phase time, CPU, syscalls and memory to this file')
+    parser.add_argument('--estimate', type=float, metavar='SECONDS', help='sampled size estimate of each top-level item within this many seconds instead of a full scan (json/csv)')
+    parser.add_argument('--workers', type=parse_workers, metavar='N|auto', help="list this many folders at once, 'auto' uses the device's limit (default: one)")
+    parser.add_argument('--device-limits', metavar='SPEC', help="concurrent listings per device, e.g. 'hdd=2,ssd=16,/mnt/archive=1' (default: ANALYZER_DEVICE_LIMITS)")
+    parser.add_argument('--engine', choices=SCAN_ENGINES, help='async keeps many listings and stats in flight, for high-latency network or bind mounts (default: ANALYZER_SCAN_ENGINE or sync)')
+    parser.add_argument('--concurrency', type=int, metavar='N', help='listings and stat batches in flight with --engine async (default: ANALYZER_ASYNC_CONCURRENCY or 64)')
+    parser.add_argument('--checkpoint', nargs='?', const='', metavar='FILE', help='save the walk every ANALYZER_CHECKPOINT_S seconds (default 30) and when interrupted, to FILE or the data folder')
+    parser.add_argument('--resume', action='store_true', help='continue from the checkpoint of an interrupted scan of the same folder and rules (implies --checkpoint)')
+    parser.add_argument('--memory-budget', type=parse_size, metavar='SIZE', help='out-of-core scan: spill sorted entry chunks to a temp folder beyond this much memory, e.g. 512M (json/csv)')
+    parser.add_argument('--spill-dir', help='temp folder for --memory-budget chunks (default: system temp)')
+    parser.add_argument('--cprofile', action='store_true', help='also run each phase under cProfile (report lists top functions, .prof files are written next to it)')
+    return parser
+
+
+def build_rules(args):
+    lines = [] if args.no_exclude else list(DEFAULT_RULES.lines)
+    if args.rules:
+        with open(args.rules, encoding='utf-8') as f:
+            lines.extend(f.read().splitlines())
+    return ScanRules(lines + (args.exclude or []))
+
+
+def print_rule_hits(rule_hits):
+    for hit in rule_hits:
+        if hit['dirs'] or hit['files']:
+            print(f"  {hit['action']} {hit['rule']}: {hit['dirs']:,} folders, {hit['files']:,} files", file=sys.stderr)
+
+
+def select_entries(snapshot, args):
+    mask = np.ones(len(snapshot), dtype=bool)
+    mask[0] = False
+    if args.kind == 'file' or args.categories or args.extensions:
+        mask &= ~snapshot.is_dir
+    elif args.kind == 'folder':
+        mask &= snapshot.is_dir
+    if args.categories:
+        mask &= np.isin(snapshot.category, [CATEGORY_NAMES.index(category) for category in args.categories])
+    if args.extensions:
+        extensions = {extension.lower() if extension.startswith('.') else '.' + extension.lower() for extension in args.extensions}
+        mask &= np.fromiter((extension in extensions for extension in snapshot.ext), dtype=bool, count=len(snapshot))
+    if args.search:
+        search = args.search.lower()
+        mask &= np.fromiter((search in name.lower() for name in snapshot.name), dtype=bool, count=len(snapshot))
+    if args.min_size:
+        mask &= snapshot.total >= args.min_size
+    if args.max_depth is not None:
+        mask &= snapshot.depth <= args.max_depth
+    indices = np.flatnonzero(mask)
+    if args.top:
+        indices = indices[np.argsort(snapshot.total[indices], kind='stable')[::-1][:args.top]]
+    return indices
+
+
+def iter_rows(snapshot, indices):
+    paths = snapshot.relative_paths()
+    category_names = np.asarray(CATEGORY_NAMES, dtype=object)
+    incomplete = snapshot.incomplete
+    for index in indices:
+        yield (paths[index], 'Folder' if snapshot.is_dir[index] else 'File', int(snapshot.total[index]), int(snapshot.file_count[index]),
+               snapshot.ext[index], category_names[snapshot.category[index]], int(snapshot.depth[index]), float(snapshot.mtime[index]), not incomplete[index])
+
+
+def write_json(snapshot, indices, f):
+    json.dump({
+        'root': snapshot.root,
+        'created': snapshot.created,
+        'total_size': snapshot.total_size,
+        'partial': snapshot.partial,
+        'unlisted': len(snapshot.unlisted),
+        'rules': snapshot.rule_hits,
+        'entries': [dict(zip(COLUMNS, row)) for row in iter_rows(snapshot, indices)],
+        'errors': [{'path': path, 'error': message} for path, message in snapshot.errors]
+    }, f, ensure_ascii=False)
+    f.write('\n')
+
+
+def write_csv(snapshot, indices, f):
+    writer = csv.writer(f)
+    writer.writerow(COLUMNS)
+    writer.writerows(iter_rows(snapshot, indices))
+
+
+def write_parquet(snapshot, indices, path):
+    frame = snapshot.to_frame().iloc[indices]
+    frame = frame.assign(Files=snapshot.file_count[indices], Complete=~snapshot.incomplete[indices])[COLUMNS]
+    frame.to_parquet(path, index=False)
+
+
+ESTIMATE_COLUMNS = ['Path', 'Type', 'Estimate', 'Low', 'High', 'Exact', 'Probes']
+
+
+def write_estimate(args, rules):
+    from size_estimate import SizeEstimator
+
+    try:
+        estimator = SizeEstimator(args.path, rules=rules).run(args.estimate)
+    except OSError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    rows = [(row['name'], 'Folder' if row['is_dir'] else 'File', round(row['estimate']), round(row['low']), round(row['high']) if row['high'] != float('inf') else None,
+             row['exact'], row['probes']) for row in estimator.estimates()]
+    f = open(args.output, 'w', encoding='utf-8', newline='') if args.output else sys.stdout
+    try:
+        if args.format == 'csv':
+            writer = csv.writer(f)
+            writer.writerow(ESTIMATE_COLUMNS)
+            writer.writerows(rows)
+        else:
+            total, low, high = estimator.total()
+            json.dump({'root': estimator.root, 'confidence': estimator.confidence, 'complete': estimator.complete, 'total': round(total), 'low': round(low),
+                       'high': round(high) if high != float('inf') else None, 'entries': [dict(zip(ESTIMATE_COLUMNS, row)) for row in rows],
+                       'errors': [{'path': path, 'error': message} for path, message in estimator.errors]}, f, ensure_ascii=False)
+            f.write('\n')
+    finally:
+        if f is not sys.stdout:
+            f.close()
+    if not args.quiet:
+        stats = estimator.stats()
+        print(f"{estimator.root}: ~{estimator.total()[0] / (1024 ** 3):.2f} GB, {stats['exact']}/{stats['children']} exact, "
+              f"{stats['listed']:,} folders listed in {stats['elapsed']:.1f} s", file=sys.stderr)
+    return 0
+
+
+def spilled_filter(args):
+    extensions = {extension.lower() if extension.startswith('.') else '.' + extension.lower() for extension in args.extensions or []}
+    kind = 'File' if args.kind == 'file' or args.categories or args.extensions else 'Folder' if args.kind == 'folder' else None
+    search = args.search.lower() if args.search else None
+
+    def keep(row):
+        path, entry_type, size, _, extension, category, depth, _ = row
+        return ((kind is None or entry_type == kind) and (not args.categories or category in args.categories)
+                and (not extensions or extension in extensions) and (search is None or search in os.path.basename(path).lower())
+                and size >= args.min_size and (args.max_depth is None or depth <= args.max_depth))
+    return keep
+
+
+def write_spilled(args, rules, progress, profile):
+    from spill_scan import spill_scan
+
+    try:
+        scan = spill_scan(args.path, args.memory_budget, rules=rules, progress=progress, profile=profile, spill_dir=args.spill_dir)
+    except OSError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    if progress is not None:
+        print(file=sys.stderr)
+    written = 0
+    with scan, profile.phase(f'export_{args.format}') as record:
+        rows = filter(spilled_filter(args), scan.iter_entries())
+        if args.top:
+            rows = scan.top(args.top, 'All', rows)
+        # Rows stream from the merged chunks straight to the output; only --top keeps N of them in memory
+        f = open(args.output, 'w', encoding='utf-8', newline='') if args.output else sys.stdout
+        try:
+            if args.format == 'csv':
+                writer = csv.writer(f)
+                writer.writerow(COLUMNS)
+                for row in rows:
+                    writer.writerow(row + (True,))
+                    written += 1
+            else:
+                header = json.dumps({'root': scan.root, 'created': scan.created, 'total_size': scan.total_size, 'partial': None, 'unlisted': 0,
+                                     'rules': scan.rule_hits}, ensure_ascii=False)
+                f.write(header[:-1] + ', "entries": [')
+                for row in rows:
+                    f.write((', ' if written else '') + json.dumps(dict(zip(COLUMNS, row + (True,))), ensure_ascii=False))
+                    written += 1
+                f.write('], "errors": ' + json.dumps([{'path': path, 'error': message} for path, message in scan.errors], ensure_ascii=False) + '}\n')
+        finally:
+            if f is not sys.stdout:
+                f.close()
+        record['entries'] = written
+        if not args.quiet:
+            print(f"{scan.root}: {scan.entries:,} entries, {scan.total_size / (1024 ** 3):.2f} GB, {written:,} written, {len(scan.errors):,} errors, "
+                  f"{len(scan.entry_chunks)} chunks ({scan.spilled_bytes / (1024 ** 2):.1f} MB spilled)", file=sys.stderr)
+            print_rule_hits(scan.rule_hits)
+    return 0
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.memory_budget is not None:
+        # The out-of-core walk is sequential and unlimited, with no checkpoints, so these would be silently ignored
+        ignored = [flag for flag, value in (('--scan-depth', args.scan_depth), ('--max-entries', args.max_entries), ('--time-budget', args.time_budget),
+                                            ('--workers', args.workers), ('--device-limits', args.device_limits), ('--engine', args.engine),
+                                            ('--concurrency', args.concurrency), ('--checkpoint', args.checkpoint), ('--resume', args.resume or None))
+                   if value is not None]
+        if ignored:
+            parser.error(f"--memory-budget cannot be combined with {', '.join(ignored)}")
+    try:
+        rules = build_rules(args)
+    except OSError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+    except ValueError as e:
+        parser.error(str(e))
+    if args.estimate is not None:
+        if args.format not in ('json', 'csv'):
+            print("error: --estimate writes json or csv", file=sys.stderr)
+            return 2
+        return write_estimate(args, rules)
+    if args.format in ('parquet', 'snapshot') and not args.output:
+        print(f"error: --output is required for {args.format} output", file=sys.stderr)
+        return 2
+    progress = None
+    if not args.quiet and sys.stderr.isatty():
+        progress = lambda entries, total_bytes, largest: print(f"\r{entries:,} entries, {total_bytes / (1024 ** 3):.2f} GB", end='', file=sys.stderr, flush=True)
+
+    scheduler = None
+    if args.workers is not None or args.device_limits is not None:
+        try:
+            scheduler = IOScheduler.from_env(args.device_limits)
+            workers = resolve_workers(args.workers, scheduler, args.path)
+        except (OSError, ValueError) as e:
+            print(f"error: {e}", file=sys.stderr)
+            return 2
+    profile = RunProfile(args.path, deep=args.cprofile or DEEP_PROFILE)
+    if args.memory_budget is not None:
+        if args.format not in ('json', 'csv') or args.store:
+            print("error: --memory-budget writes json or csv and cannot --store (snapshots live in memory)", file=sys.stderr)
+            return 2
+        status = write_spilled(args, rules, progress, profile)
+        if args.timings:
+            print(profile.summary(), file=sys.stderr)
+        if args.report:
+            try:
+                profile.save(args.report)
+            except OSError as e:
+                print(f"warning: could not write run report: {e}", file=sys.stderr)
+        return status
+    scan_started = time.perf_counter()
+    checkpoint = None
+    if args.checkpoint is not None or args.resume:
+        from scan_checkpoint import ScanCheckpoint
+
+        checkpoint = ScanCheckpoint(args.path, path=args.checkpoint or None, resume=args.resume)
+    options = dict(rules=rules, progress=progress, profile=profile, max_depth=args.scan_depth, max_entries=args.max_entries,
+                   time_budget=args.time_budget, scheduler=scheduler, checkpoint=checkpoint)
+    try:
+        snapshot = run_scan(args.path, args.engine, workers=workers if scheduler is not None else None, concurrency=args.concurrency, **options)
+    except (OSError, ValueError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        if checkpoint is not None:
+            print(f"\ninterrupted, continue with --resume (checkpoint: {checkpoint.path})", file=sys.stderr)
+        return 130
+    if progress is not None:
+        print(file=sys.stderr)
+    with profile.phase('filter', len(snapshot)):
+        indices = select_entries(snapshot, args)
+
+    write_started = time.perf_counter()
+    with profile.phase(f'export_{args.format}', len(indices)):
+        if args.format == 'snapshot':
+            snapshot.save(args.output)
+        elif args.format == 'parquet':
+            write_parquet(snapshot, indices, args.output)
+        elif args.output:
+            with open(args.output, 'w', encoding='utf-8', newline='') as f:
+                (write_json if args.format == 'json' else write_csv)(snapshot, indices, f)
+        else:
+            (write_json if args.format == 'json' else write_csv)(snapshot, indices, sys.stdout)
+    finished = time.perf_counter()
+
+    if args.store:
+        import sqlite3
+
+        from history_store import HistoryStore
+        from snapshot_store import SnapshotStore
+
+        try:
+            SnapshotStore().save(snapshot)
+            HistoryStore().record(snapshot)
+        except (OSError, sqlite3.Error) as e:
+            print(f"warning: could not store snapshot: {e}", file=sys.stderr)
+    if not args.quiet:
+        print(f"{snapshot.root}: {len(snapshot) - 1:,} entries, {snapshot.total_size / (1024 ** 3):.2f} GB, "
+              f"{len(indices):,} written, {len(snapshot.errors):,} errors", file=sys.stderr)
+        if snapshot.partial is not None:
+            print(f"partial scan: stopped by {snapshot.partial}, {len(snapshot.unlisted):,} folders not opened (Complete=false rows are lower bounds)", file=sys.stderr)
+        if checkpoint is not None and checkpoint.resumed:
+            print(f"resumed from checkpoint after {checkpoint.resumed:,} entries", file=sys.stderr)
+        print_rule_hits(snapshot.rule_hits)
+        for device in scheduler.stats() if scheduler is not None else []:
+            print(f"  device {device['device']} ({device['kind']}, limit {device['limit']}): {device['listings']:,} listings, "
+                  f"peak {device['peak']} in flight, waited {device['wait_s']:.2f} s", file=sys.stderr)
+    if args.timings:
+        print(f"startup {(_imported - _started) * 1000:.0f} ms, scan {(write_started - scan_started) * 1000:.0f} ms, "
+              f"write {(finished - write_started) * 1000:.0f} ms", file=sys.stderr)
+        print(profile.summary(), file=sys.stderr)
+    if args.report:
+        try:
+            profile.save(args.report)
+        except OSError as e:
+            print(f"warning: could not write run report: {e}", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
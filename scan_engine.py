@@ -0,0 +1,639 @@
+import hashlib
+import heapq
+import os
+import pickle
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from scan_rules import ScanRules, compile_rules
+
+FILE_CATEGORIES = {
+    'Documents': ['.pdf', '.doc', '.docx', '.txt', '.rtf', '.odt', '.pages'],
+    'Images': ['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff', '.svg', '.webp'],
+    'Videos': ['.mp4', '.avi', '.mkv', '.mov', '.wmv', '.flv', '.webm', '.m4v'],
+    'Audio': ['.mp3', '.wav', '.flac', '.aac', '.ogg', '.wma', '.m4a'],
+    'Archives': ['.zip', '.rar', '.7z', '.tar', '.gz', '.bz2', '.xz'],
+    'Code': ['.py', '.js', '.html', '.css', '.java', '.cpp', '.c', '.php', '.sql'],
+    'Spreadsheets': ['.xlsx', '.xls', '.csv', '.ods', '.numbers'],
+    'Presentations': ['.pptx', '.ppt', '.odp', '.key']
+}
+CATEGORY_NAMES = list(FILE_CATEGORIES) + ['Other', 'Folder']
+OTHER_CATEGORY = CATEGORY_NAMES.index('Other')
+FOLDER_CATEGORY = CATEGORY_NAMES.index('Folder')
+SYSTEM_FOLDERS = ['$RECYCLE.BIN', 'System Volume Information', 'RECYCLER', 'Thumbs.db']
+# System folders are only skipped directly under the scanned folder, as they always were
+DEFAULT_RULES = ScanRules('/' + name for name in SYSTEM_FOLDERS)
+SNAPSHOT_VERSION = 1
+SCAN_LIMITS = ('max_depth', 'max_entries', 'time_budget')
+SCAN_ENGINES = ('sync', 'async')
+# async keeps many listings and stats in flight, for network shares and bind mounts where every metadata call waits on a round trip
+DEFAULT_ENGINE = os.environ.get('ANALYZER_SCAN_ENGINE', 'sync')
+SNAPSHOT_COLUMNS = ('name', 'parent', 'is_dir', 'size', 'allocated', 'mtime', 'ctime', 'ext', 'category', 'key', 'depth')
+# st_blocks is in 512-byte units on every platform that has it; elsewhere allocated falls back to the size
+HAS_BLOCKS = hasattr(os.stat_result, 'st_blocks')
+
+
+class ScanCancelled(Exception):
+    pass
+
+
+def get_file_category(file_extension, categories=FILE_CATEGORIES):
+    for category, extensions in categories.items():
+        if file_extension.lower() in extensions:
+            return category
+    return "Other"
+
+
+def file_suffix(name):
+    # Path.suffix semantics without building a Path per entry
+    i = name.rfind('.')
+    if 0 < i < len(name) - 1:
+        return name[i:].lower()
+    return ''
+
+
+def category_codes(categories=FILE_CATEGORIES):
+    codes = {}
+    for code, category in enumerate(CATEGORY_NAMES[:OTHER_CATEGORY]):
+        for extension in categories.get(category, []):
+            codes.setdefault(extension, code)
+    return codes
+
+
+def path_key(parent_key, name):
+    digest = hashlib.blake2b(parent_key.to_bytes(8, 'little') + name.encode('utf-8', 'surrogatepass'), digest_size=8)
+    return int.from_bytes(digest.digest(), 'little')
+
+
+def size_bin_label(bin_index):
+    # Bin 0 holds empty files, bin k holds sizes in [2**(k-1), 2**k)
+    if bin_index == 0:
+        return '0 B'
+    low = 1 << (bin_index - 1)
+    for unit in ('B', 'KB', 'MB', 'GB', 'TB'):
+        if low < 1024:
+            return f"{low} {unit}+"
+        low //= 1024
+    return f"{low} PB+"
+
+
+class Rollups:
+    # Per-folder and whole-tree aggregates, built once per snapshot with a few bincounts and one bottom-up pass,
+    # so charts and summaries read O(categories) tables instead of walking every file again
+    def __init__(self, snapshot):
+        files = np.flatnonzero(~snapshot.is_dir)
+        sizes = snapshot.size[files]
+        allocated = snapshot.allocated[files]
+        categories = snapshot.category[files].astype(np.int64)
+        width = len(CATEGORY_NAMES)
+        self.folders = np.flatnonzero(snapshot.is_dir)
+        self._row = np.full(len(snapshot), -1, dtype=np.int64)
+        self._row[self.folders] = np.arange(len(self.folders))
+        # Files directly inside each folder, one row per folder and one column per category
+        cells = self._row[snapshot.parent[files]] * width + categories
+        length = len(self.folders) * width
+        self.direct_count = np.bincount(cells, minlength=length).reshape(-1, width)
+        self.direct_bytes = np.bincount(cells, weights=sizes, minlength=length).astype(np.int64).reshape(-1, width)
+        self.direct_allocated = np.bincount(cells, weights=allocated, minlength=length).astype(np.int64).reshape(-1, width)
+        self.count, self.bytes, self.allocated = self.direct_count.copy(), self.direct_bytes.copy(), self.direct_allocated.copy()
+        for depth in range(snapshot.max_depth, 0, -1):
+            level = snapshot.level(depth)
+            level = level[snapshot.is_dir[level]]
+            rows, parents = self._row[level], self._row[snapshot.parent[level]]
+            for table in (self.count, self.bytes, self.allocated):
+                np.add.at(table, parents, table[rows])
+        extensions, codes = np.unique(snapshot.ext[files].astype(str), return_inverse=True) if len(files) else (np.array([], dtype=str), np.zeros(0, dtype=np.int64))
+        self.extensions = extensions.astype(object)
+        self.extension_count = np.bincount(codes, minlength=len(extensions))
+        self.extension_bytes = np.bincount(codes, weights=sizes, minlength=len(extensions)).astype(np.int64)
+        self.extension_allocated = np.bincount(codes, weights=allocated, minlength=len(extensions)).astype(np.int64)
+        # Log2 size histogram: frexp's exponent is the bit length of the size
+        bins = np.frexp(sizes.astype(np.float64))[1]
+        self.histogram_count = np.bincount(bins, minlength=1)
+        self.histogram_bytes = np.bincount(bins, weights=sizes, minlength=1).astype(np.int64)
+
+    def categories(self, index=0, subtree=True):
+        row = self._row[index]
+        count, size, allocated = (self.count, self.bytes, self.allocated) if subtree else (self.direct_count, self.direct_bytes, self.direct_allocated)
+        return [{'category': name, 'files': int(count[row, code]), 'bytes': int(size[row, code]), 'allocated': int(allocated[row, code])}
+                for code, name in enumerate(CATEGORY_NAMES) if count[row, code]]
+
+    def extension_table(self, limit=None):
+        order = np.argsort(self.extension_count, kind='stable')[::-1][:limit]
+        return [{'extension': self.extensions[code], 'files': int(self.extension_count[code]), 'bytes': int(self.extension_bytes[code]),
+                 'allocated': int(self.extension_allocated[code])} for code in order]
+
+    def histogram(self):
+        return [{'bin': size_bin_label(bin_index), 'files': int(count), 'bytes': int(self.histogram_bytes[bin_index])}
+                for bin_index, count in enumerate(self.histogram_count) if count]
+
+
+class Snapshot:
+    def __init__(self, root, columns, errors=None, created=None, partial=None, unlisted=None, rule_hits=None):
+        self.root = root
+        self.created = created if created is not None else time.time()
+        self.errors = errors if errors is not None else []
+        # Budget-limited scans: which limit stopped the walk and the folders that were recorded but never listed
+        self.partial = partial
+        self.unlisted = np.asarray(unlisted if unlisted is not None else [], dtype=np.int64)
+        self.rule_hits = rule_hits if rule_hits is not None else []
+        self.name = columns['name']
+        self.parent = columns['parent']
+        self.is_dir = columns['is_dir']
+        self.size = columns['size']
+        # Snapshots saved before allocated sizes were recorded report the logical size
+        self.allocated = columns['allocated'] if 'allocated' in columns else columns['size'].copy()
+        self.mtime = columns['mtime']
+        self.ctime = columns['ctime']
+        self.ext = columns['ext']
+        self.category = columns['category']
+        self.key = columns['key']
+        self.depth = columns['depth']
+        self._level_order = np.argsort(self.depth, kind='stable')
+        self._level_bounds = np.searchsorted(self.depth[self._level_order], np.arange(int(self.depth.max()) + 2))
+        self.total = self.subtree_sum(self.size)
+        self.file_count = self.subtree_sum((~self.is_dir).astype(np.int64))
+        self._child_order = None
+        self._child_bounds = None
+        self._relative_paths = None
+        self._incomplete = None
+        self._rollups = None
+
+    def __len__(self):
+        return len(self.name)
+
+    @property
+    def total_size(self):
+        return int(self.total[0])
+
+    @property
+    def incomplete(self):
+        # True for every folder whose subtree holds an unlisted folder: its totals are what was found so far
+        if self._incomplete is None:
+            flags = np.zeros(len(self), dtype=np.int64)
+            flags[self.unlisted] = 1
+            self._incomplete = self.subtree_sum(flags) > 0
+        return self._incomplete
+
+    @property
+    def rollups(self):
+        if self._rollups is None:
+            self._rollups = Rollups(self)
+        return self._rollups
+
+    @property
+    def max_depth(self):
+        return len(self._level_bounds) - 2
+
+    def level(self, depth):
+        if depth > self.max_depth:
+            return self._level_order[:0]
+        return self._level_order[self._level_bounds[depth]:self._level_bounds[depth + 1]]
+
+    def subtree_sum(self, values):
+        totals = np.array(values, dtype=np.int64, copy=True)
+        for depth in range(self.max_depth, 0, -1):
+            level = self.level(depth)
+            np.add.at(totals, self.parent[level], totals[level])
+        return totals
+
+    def ancestor_at_depth(self, indices, max_depth):
+        indices = np.asarray(indices, dtype=np.int64)
+        target = np.minimum(np.maximum(self.depth[indices] - 1, 0), max_depth)
+        ancestors = np.where(self.depth[indices] > 0, self.parent[indices], 0)
+        pending = self.depth[ancestors] > target
+        while pending.any():
+            ancestors[pending] = self.parent[ancestors[pending]]
+            pending = self.depth[ancestors] > target
+        return ancestors
+
+    def children(self, index):
+        if self._child_order is None:
+            self._child_order = np.argsort(self.parent, kind='stable')
+            self._child_bounds = np.searchsorted(self.parent[self._child_order], np.arange(len(self) + 1))
+        return self._child_order[self._child_bounds[index]:self._child_bounds[index + 1]]
+
+    def relative_paths(self):
+        if self._relative_paths is None:
+            paths = np.empty(len(self), dtype=object)
+            paths[0] = ''
+            first = self.level(1)
+            paths[first] = self.name[first]
+            for depth in range(2, self.max_depth + 1):
+                level = self.level(depth)
+                paths[level] = paths[self.parent[level]] + os.sep + self.name[level]
+            self._relative_paths = paths
+        return self._relative_paths
+
+    def path_of(self, index):
+        relative = self.relative_paths()[index]
+        return os.path.join(self.root, relative) if relative else self.root
+
+    def find(self, path):
+        relative = os.path.relpath(os.path.abspath(path), self.root)
+        if relative == os.curdir:
+            return 0
+        if relative.startswith(os.pardir):
+            return None
+        index = 0
+        for part in relative.split(os.sep):
+            matches = [child for child in self.children(index) if self.name[child] == part]
+            if not matches:
+                return None
+            index = matches[0]
+        return index
+
+    def subtree(self, index, rules=DEFAULT_RULES):
+        # Re-rooted copy of one folder, keyed and filtered as if that folder had been scanned directly
+        if index == 0:
+            return self
+        mask = np.zeros(len(self), dtype=bool)
+        mask[index] = True
+        base_depth = int(self.depth[index])
+        rules = compile_rules(rules) or None
+        prefix = len(self.relative_paths()[index]) + 1
+        for depth in range(base_depth + 1, self.max_depth + 1):
+            level = self.level(depth)
+            mask[level] = mask[self.parent[level]]
+            if rules is not None and (rules.max_depth is None or depth - base_depth <= rules.max_depth):
+                level = level[mask[level]]
+                paths = self.name[level] if rules.names_only else [path[prefix:] for path in self.relative_paths()[level]]
+                mask[level[[rules.excluded(path, is_dir) for path, is_dir in zip(paths, self.is_dir[level])]]] = False
+        members = np.flatnonzero(mask)
+        remap = np.full(len(self), -1, dtype=np.int64)
+        remap[members] = np.arange(len(members))
+        parent = remap[self.parent[members]]
+        parent[0] = -1
+        name = self.name[members].copy()
+        name[0] = ''
+        key = np.zeros(len(members), dtype=np.uint64)
+        for position in range(1, len(members)):
+            key[position] = path_key(int(key[parent[position]]), name[position])
+        columns = {
+            'name': name,
+            'parent': parent,
+            'is_dir': self.is_dir[members],
+            'size': self.size[members],
+            'allocated': self.allocated[members],
+            'mtime': self.mtime[members],
+            'ctime': self.ctime[members],
+            'ext': self.ext[members],
+            'category': self.category[members],
+            'key': key,
+            'depth': self.depth[members] - base_depth
+        }
+        root = self.path_of(index)
+        prefix = root + os.sep
+        errors = [(path, message) for path, message in self.errors if path == root or path.startswith(prefix)]
+        unlisted = remap[self.unlisted]
+        unlisted = unlisted[unlisted >= 0]
+        return Snapshot(root, columns, errors, self.created, self.partial if len(unlisted) else None, unlisted)
+
+    def to_frame(self):
+        import pandas as pd
+
+        return pd.DataFrame({
+            'Path': self.relative_paths(),
+            'Name': self.name,
+            'Type': np.where(self.is_dir, 'Folder', 'File'),
+            'Size': self.total,
+            'Extension': self.ext,
+            'Category': np.asarray(CATEGORY_NAMES, dtype=object)[self.category],
+            'Depth': self.depth,
+            'Modified': self.mtime
+        })
+
+    def save(self, path):
+        state = {
+            'version': SNAPSHOT_VERSION,
+            'root': self.root,
+            'created': self.created,
+            'errors': self.errors,
+            'partial': self.partial,
+            'unlisted': self.unlisted,
+            'rule_hits': self.rule_hits,
+            'columns': {column: getattr(self, column) for column in SNAPSHOT_COLUMNS}
+        }
+        with open(path, 'wb') as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            state = pickle.load(f)
+        if state.get('version') != SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported snapshot version: {state.get('version')}")
+        return cls(state['root'], state['columns'], state['errors'], state['created'], state.get('partial'), state.get('unlisted'), state.get('rule_hits'))
+
+
+def _read_dir(path, rules, prefix):
+    # One folder's entries as (name, path, is_dir, stat, rule); rules are matched before any stat, so an
+    # excluded entry comes back without one. Entries that fail carry the error in place of the stat.
+    listing = []
+    with os.scandir(path) as entries:
+        for entry in entries:
+            try:
+                directory = entry.is_dir(follow_symlinks=False)
+                rule = rules.match(entry.name if rules.names_only else entry.path[prefix:], directory) if rules is not None else -1
+                if rule >= 0 and not rules.negated[rule]:
+                    listing.append((entry.name, entry.path, directory, None, rule))
+                elif directory:
+                    listing.append((entry.name, entry.path, True, entry.stat(follow_symlinks=False), rule))
+                elif entry.is_file():
+                    listing.append((entry.name, entry.path, False, entry.stat(), rule))
+            except Exception as e:
+                # Recorded like an unreadable entry, so one odd name or broken link never aborts a long scan
+                listing.append((entry.name, entry.path, None, e, -1))
+    return listing
+
+
+class TreeBuilder:
+    # Columns of a scan in the making. Walkers hand it one folder listing at a time in frontier order (breadth-first),
+    # so every engine, sequential, threaded or asyncio, produces the same snapshot for the same tree.
+    def __init__(self, root, rules=DEFAULT_RULES, categories=FILE_CATEGORIES, progress=None, progress_interval=0.5, top_n=10,
+                 max_depth=None, max_entries=None, time_budget=None, relative_to=None, checkpoint=None):
+        self.root = os.path.abspath(root)
+        # Rules see paths relative to `relative_to` (default: the scanned folder), so a rescanned sub-folder is filtered like the whole tree
+        self.rules = compile_rules(rules) or None
+        self.hits = [[0, 0] for _ in self.rules.lines] if self.rules is not None else None
+        base = os.path.abspath(relative_to) if relative_to else self.root
+        self.prefix = len(os.path.join(base, ''))
+        self.base_depth = self.root[self.prefix:].count(os.sep) + 1 if self.root != base else 0
+        self.progress = progress
+        self.progress_interval = progress_interval
+        self.top_n = top_n
+        self.max_depth = max_depth
+        self.max_entries = max_entries
+        self.deadline = time.monotonic() + time_budget if time_budget is not None else None
+        root_stat = os.stat(self.root)
+        self.extension_categories = category_codes(categories)
+        self.extension_pool = {}
+        self.names, self.parents, self.is_dir, self.sizes, self.allocated = [''], [-1], [True], [0], [0]
+        self.mtimes, self.ctimes, self.exts, self.cats = [root_stat.st_mtime], [root_stat.st_ctime], [''], [FOLDER_CATEGORY]
+        self.keys, self.depths = [0], [0]
+        self.errors = []
+        self.largest = []
+        self.total_bytes = 0
+        self.last_report = time.monotonic()
+        # (index, path, key, depth, st_dev) of every folder still to be listed
+        self.frontier = deque([(0, self.root, 0, 0, root_stat.st_dev)])
+        self.dirs_listed = 0
+        self.partial = None
+        self.unlisted = []
+        self._undo = None
+        # Same root, rules, categories and depth limit: anything else would mix two different trees in one snapshot
+        self.signature = (self.root, self.prefix, tuple(self.rules.lines) if self.rules is not None else (),
+                          tuple(sorted(self.extension_categories.items())), max_depth)
+        self.checkpoint = checkpoint
+        if checkpoint is not None and checkpoint.resume:
+            self.restore(checkpoint.load())
+
+    COLUMNS = ('names', 'parents', 'is_dir', 'sizes', 'allocated', 'mtimes', 'ctimes', 'exts', 'cats', 'keys', 'depths')
+    STATE = COLUMNS + ('errors', 'largest', 'total_bytes', 'dirs_listed', 'unlisted', 'hits')
+
+    def state(self):
+        # Every finished folder is in the columns and every other one is still in the frontier. A folder interrupted
+        # halfway through add() is left out again, so a resumed scan lists it from the start.
+        state = {name: getattr(self, name) for name in self.STATE}
+        frontier = list(self.frontier)
+        if self._undo is not None:
+            rows, pending, errors, state['hits'], state['total_bytes'], state['largest'], state['dirs_listed'] = self._undo
+            state.update({name: getattr(self, name)[:rows] for name in self.COLUMNS})
+            state['errors'] = self.errors[:errors]
+            frontier = frontier[:pending]
+        state['frontier'] = frontier
+        state['signature'] = self.signature
+        return state
+
+    def restore(self, state):
+        if state is None or state.get('signature') != self.signature:
+            return False
+        for name in self.STATE:
+            setattr(self, name, state[name])
+        self.frontier = deque(state['frontier'])
+        self.checkpoint.resumed = len(self.names) - 1
+        return True
+
+    def save_checkpoint(self, force=False):
+        checkpoint = self.checkpoint
+        if checkpoint is None or not (force or checkpoint.due()):
+            return
+        try:
+            checkpoint.save(self.state())
+        except OSError as e:
+            # A full or read-only data folder costs the resume point, not the scan. Reported once on stderr (stdout may be
+            # the CLI's json/csv) and in the run profile, which is all the windowed app has.
+            error = f"Could not save scan checkpoint: {e}"
+            if error != checkpoint.error:
+                print(error, file=sys.stderr)
+            checkpoint.error = error
+
+    def rules_at(self, depth):
+        # Rules for the entries of a folder at this depth, or None once no rule can match that deep
+        rules = self.rules
+        return rules if rules is not None and (rules.max_depth is None or self.base_depth + depth < rules.max_depth) else None
+
+    def listable(self, item):
+        return self.max_depth is None or item[3] < self.max_depth
+
+    def out_of_budget(self):
+        # Budgets are checked between folders, so every folder is either listed completely or not at all
+        if self.max_entries is not None and len(self.names) - 1 >= self.max_entries:
+            self.partial = 'max_entries'
+        elif self.deadline is not None and time.monotonic() >= self.deadline:
+            self.partial = 'time_budget'
+        if self.partial is None:
+            return False
+        self.unlisted.extend(item[0] for item in self.frontier)
+        return True
+
+    # Walkers read the next folder at frontier[0]; skip, fail and add take it off only once it is accounted for,
+    # so a checkpoint saved while a listing is still in flight keeps that folder pending
+    def skip(self, item):
+        self.unlisted.append(item[0])
+        self.frontier.popleft()
+
+    def fail(self, item, error):
+        self.dirs_listed += 1
+        self.errors.append((item[1], str(error)))
+        self.frontier.popleft()
+
+    def add(self, item, listing):
+        index, _, key, depth, dev = item
+        rules, hits, frontier, largest, top_n = self.rules, self.hits, self.frontier, self.largest, self.top_n
+        self._undo = (len(self.names), len(frontier), len(self.errors), [counts[:] for counts in hits] if hits else hits,
+                      self.total_bytes, largest[:], self.dirs_listed)
+        self.dirs_listed += 1
+        track_largest = self.progress is not None and top_n
+        extension_pool, extension_categories = self.extension_pool, self.extension_categories
+        names, parents, is_dir, sizes, allocated = self.names, self.parents, self.is_dir, self.sizes, self.allocated
+        for name, entry_path, directory, st, rule in listing:
+            if rule >= 0:
+                hits[rule][0 if directory else 1] += 1
+                # Excluded entries were never stat'ed, and excluded folders are never opened
+                if not rules.negated[rule]:
+                    continue
+            if directory is None:
+                self.errors.append((entry_path, str(st)))
+                continue
+            child_key = path_key(key, name)
+            if directory:
+                frontier.append((len(names), entry_path, child_key, depth + 1, st.st_dev or dev))
+                extension, category, size, blocks = '', FOLDER_CATEGORY, 0, 0
+            else:
+                extension = file_suffix(name)
+                extension = extension_pool.setdefault(extension, extension)
+                category = extension_categories.get(extension, OTHER_CATEGORY)
+                size = st.st_size
+                blocks = st.st_blocks * 512 if HAS_BLOCKS else size
+                self.total_bytes += size
+                if track_largest and (len(largest) < top_n or size > largest[0][0]):
+                    (heapq.heappush if len(largest) < top_n else heapq.heapreplace)(largest, (size, entry_path))
+            names.append(name)
+            parents.append(index)
+            is_dir.append(directory)
+            sizes.append(size)
+            allocated.append(blocks)
+            self.mtimes.append(st.st_mtime)
+            self.ctimes.append(st.st_ctime)
+            self.exts.append(extension)
+            self.cats.append(category)
+            self.keys.append(child_key)
+            self.depths.append(depth + 1)
+        frontier.popleft()
+        self._undo = None
+        if self.progress is not None and time.monotonic() - self.last_report >= self.progress_interval:
+            self.last_report = time.monotonic()
+            self.progress(len(names), self.total_bytes, sorted(largest, reverse=True))
+
+    def snapshot(self, profile=None, walk=None, **counters):
+        rules, hits = self.rules, self.hits
+        rule_hits = rules.report(hits) if rules is not None else None
+        if rule_hits:
+            # Per-rule breakdown in the run report, which is all the windowed app has
+            counters['rule_hits'] = [hit for hit in rule_hits if hit['dirs'] or hit['files']]
+        if self.checkpoint is not None:
+            counters.update(checkpoints=self.checkpoint.saved, resumed=self.checkpoint.resumed)
+            if self.checkpoint.error is not None:
+                counters['checkpoint_error'] = self.checkpoint.error
+        if profile is not None:
+            # Every kept entry cost one stat; listing a directory is one open plus its getdents calls
+            profile.stop(walk, len(self.names), dirs_listed=self.dirs_listed, stat_calls=len(self.names) - 1, errors=len(self.errors), **counters,
+                         excluded_dirs=sum(dirs for (dirs, _), negated in zip(hits, rules.negated) if not negated) if hits else 0,
+                         excluded_files=sum(files for (_, files), negated in zip(hits, rules.negated) if not negated) if hits else 0)
+            aggregate = profile.start('aggregate')
+        columns = {
+            'name': np.array(self.names, dtype=object),
+            'parent': np.array(self.parents, dtype=np.int64),
+            'is_dir': np.array(self.is_dir, dtype=bool),
+            'size': np.array(self.sizes, dtype=np.int64),
+            'allocated': np.array(self.allocated, dtype=np.int64),
+            'mtime': np.array(self.mtimes, dtype=np.float64),
+            'ctime': np.array(self.ctimes, dtype=np.float64),
+            'ext': np.array(self.exts, dtype=object),
+            'category': np.array(self.cats, dtype=np.int8),
+            'key': np.array(self.keys, dtype=np.uint64),
+            'depth': np.array(self.depths, dtype=np.int32)
+        }
+        partial = self.partial
+        if partial is None and self.unlisted:
+            partial = 'max_depth'
+        snapshot = Snapshot(self.root, columns, self.errors, partial=partial, unlisted=np.sort(np.array(self.unlisted, dtype=np.int64)),
+                            rule_hits=rule_hits)
+        # Built while the columns are hot so every view afterwards reads the per-category and per-extension tables
+        snapshot.rollups
+        if self.checkpoint is not None:
+            self.checkpoint.clear()
+        if profile is not None:
+            profile.stop(aggregate, len(self.names))
+        if self.progress is not None:
+            self.progress(len(self.names), self.total_bytes, sorted(self.largest, reverse=True))
+        return snapshot
+
+
+def scan_tree(root, rules=DEFAULT_RULES, categories=FILE_CATEGORIES, progress=None, progress_interval=0.5, cancel=None, top_n=10, profile=None,
+              max_depth=None, max_entries=None, time_budget=None, relative_to=None, workers=None, scheduler=None, checkpoint=None):
+    walk = profile.start('walk') if profile is not None else None
+    tree = TreeBuilder(root, rules, categories, progress, progress_interval, top_n, max_depth, max_entries, time_budget, relative_to, checkpoint)
+    frontier = tree.frontier
+
+    def list_folder(item):
+        if scheduler is None:
+            return _read_dir(item[1], tree.rules_at(item[3]), tree.prefix)
+        with scheduler.slot(item[1], item[4]):
+            return _read_dir(item[1], tree.rules_at(item[3]), tree.prefix)
+
+    # With workers, the next folders of the frontier are listed ahead on a thread pool (scandir and stat release
+    # the GIL) and consumed in frontier order, so the columns come out exactly as in a sequential walk
+    executor = ThreadPoolExecutor(workers, thread_name_prefix='scan-list') if workers is not None and workers > 1 else None
+    window = workers * 4 if executor is not None else 0
+    ahead = deque()
+    try:
+        while frontier:
+            if cancel is not None and cancel.is_set():
+                raise ScanCancelled(tree.root)
+            tree.save_checkpoint()
+            if tree.out_of_budget():
+                break
+            while len(ahead) < min(len(frontier), window):
+                item = frontier[len(ahead)]
+                ahead.append(executor.submit(list_folder, item) if tree.listable(item) else None)
+            future = ahead.popleft() if executor is not None else None
+            item = frontier[0]
+            if not tree.listable(item):
+                tree.skip(item)
+                continue
+            try:
+                listing = future.result() if future is not None else list_folder(item)
+            except Exception as e:
+                tree.fail(item, e)
+                continue
+            tree.add(item, listing)
+    except BaseException:
+        # Cancelled, interrupted or failed: keep the progress so far for a resumed run
+        tree.save_checkpoint(force=True)
+        raise
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+    return tree.snapshot(profile, walk, workers=workers or 1, devices=scheduler.stats() if scheduler is not None else None)
+
+
+def run_scan(root, engine=None, workers=None, concurrency=None, **options):
+    # Same snapshot from either engine: workers size the sync engine's listing pool, concurrency the async engine's calls in flight
+    engine = engine or DEFAULT_ENGINE
+    if engine not in SCAN_ENGINES:
+        raise ValueError(f"Invalid scan engine: {engine}")
+    if engine == 'async':
+        from async_scan import async_scan_tree
+
+        return async_scan_tree(root, concurrency=concurrency, **options)
+    return scan_tree(root, workers=workers, **options)
+
+
+def change_token(root):
+    # Cheap root-level fingerprint: the root's own stat plus the mtime of every direct child
+    st = os.stat(root)
+    digest = hashlib.blake2b(f"{st.st_ino}:{st.st_mtime_ns}:{st.st_ctime_ns}".encode(), digest_size=12)
+    try:
+        with os.scandir(root) as entries:
+            for entry in entries:
+                try:
+                    digest.update(f"{entry.name}:{entry.stat(follow_symlinks=False).st_mtime_ns}\n".encode('utf-8', 'surrogatepass'))
+                except OSError:
+                    digest.update(entry.name.encode('utf-8', 'surrogatepass'))
+    except OSError:
+        pass
+    return digest.hexdigest()
+
+
+def get_folder_size(folder_path, max_depth=None, max_entries=None, time_budget=None, rules=None):
+    try:
+        return scan_tree(folder_path, rules=rules, max_depth=max_depth, max_entries=max_entries, time_budget=time_budget).total_size
+    except OSError:
+        return 0
@@ -0,0 +1,182 @@
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from scan_engine import ScanCancelled
+
+JOB_STATES = ['queued', 'running', 'done', 'cancelled', 'failed']
+FINISHED_STATES = ('done', 'cancelled', 'failed')
+
+
+class ScanJob:
+    def __init__(self, job_id, key, root):
+        self.id = job_id
+        self.key = key
+        self.root = root
+        self.state = 'queued'
+        self.entries = 0
+        self.bytes = 0
+        self.largest = []
+        self.result = None
+        self.error = None
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+        self.cancel_event = threading.Event()
+        self.done_event = threading.Event()
+
+    @property
+    def done(self):
+        return self.state in FINISHED_STATES
+
+    @property
+    def elapsed(self):
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.time()) - self.started
+
+    def progress(self, entries, total_bytes, largest):
+        self.entries = entries
+        self.bytes = total_bytes
+        self.largest = largest
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def wait(self, timeout=None):
+        return self.done_event.wait(timeout)
+
+
+class JobManager:
+    def __init__(self, max_workers=2, keep_finished=32):
+        self.keep_finished = keep_finished
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='scan-job')
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, key, root, work):
+        job = ScanJob(uuid.uuid4().hex[:12], key, root)
+        with self._lock:
+            self._jobs[job.id] = job
+        self._executor.submit(self._run, job, work)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self):
+        with self._lock:
+            return list(self._jobs.values())
+
+    def cancel(self, job_id):
+        job = self.get(job_id)
+        if job is not None:
+            job.cancel()
+        return job
+
+    def _run(self, job, work):
+        job.started = time.time()
+        try:
+            if job.cancel_event.is_set():
+                raise ScanCancelled(job.root)
+            job.state = 'running'
+            job.result = work(job)
+            job.state = 'done'
+        except ScanCancelled:
+            job.state = 'cancelled'
+        except Exception as e:
+            job.error = e
+            job.state = 'failed'
+        finally:
+            job.finished = time.time()
+            job.done_event.set()
+            self._prune()
+
+    def _prune(self):
+        with self._lock:
+            finished = [job_id for job_id, job in self._jobs.items() if job.done]
+            for job_id in finished[:max(len(finished) - self.keep_finished, 0)]:
+                del self._jobs[job_id]
+
+
+class Flight:
+    def __init__(self, root):
+        self.root = root
+        self.jobs = []
+        self.result = None
+        self.error = None
+        self.done_event = threading.Event()
+
+    def is_set(self):
+        # The shared walk is only abandoned once every attached caller has cancelled
+        return bool(self.jobs) and all(job is not None and job.cancel_event.is_set() for job in self.jobs)
+
+    def progress(self, entries, total_bytes, largest):
+        for job in list(self.jobs):
+            if job is not None:
+                job.progress(entries, total_bytes, largest)
+
+
+def is_within(path, root):
+    return path == root or path.startswith(root.rstrip(os.sep) + os.sep)
+
+
+class SingleFlight:
+    def __init__(self):
+        self._flights = {}
+        self._lock = threading.Lock()
+        self.coalesced = 0
+        self.sliced = 0
+
+    def run(self, root, scan, store, job=None):
+        root = os.path.abspath(root)
+        while True:
+            with self._lock:
+                flight = self._flights.get(root) or next((running for running in self._flights.values() if is_within(root, running.root)), None)
+                leader = flight is None
+                if leader:
+                    flight = self._flights[root] = Flight(root)
+                flight.jobs.append(job)
+            if leader:
+                return self._lead(flight, scan, store, job)
+            try:
+                while not flight.done_event.wait(0.2):
+                    if job is not None and job.cancel_event.is_set():
+                        raise ScanCancelled(root)
+            finally:
+                with self._lock:
+                    flight.jobs.remove(job)
+            if isinstance(flight.error, ScanCancelled):
+                continue
+            if flight.error is not None:
+                raise flight.error
+            snapshot, snapshot_path = flight.result
+            if flight.root == root:
+                self.coalesced += 1
+                return snapshot, snapshot_path
+            index = snapshot.find(root)
+            if index is None or not snapshot.is_dir[index]:
+                raise FileNotFoundError(root)
+            self.sliced += 1
+            subtree = snapshot.subtree(index)
+            return subtree, store(subtree)
+
+    def _lead(self, flight, scan, store, job):
+        try:
+            snapshot = scan(flight.root, flight.progress, flight)
+            flight.result = snapshot, store(snapshot)
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[flight.root]
+                flight.jobs.remove(job)
+            flight.done_event.set()
+        if job is not None and job.cancel_event.is_set():
+            raise ScanCancelled(flight.root)
+        return flight.result
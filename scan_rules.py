@@ -0,0 +1,142 @@
+import os
+import re
+
+
+def _translate(pattern):
+    # gitignore glob to regex: '*' and '?' stay inside one path segment, '**' crosses segments
+    out, i, n = [], 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        if c == '*':
+            if pattern.startswith('**/', i):
+                out.append('(?:.*/)?')
+                i += 3
+                continue
+            if pattern.startswith('**', i):
+                out.append('.*')
+                i += 2
+                continue
+            out.append('[^/]*')
+        elif c == '?':
+            out.append('[^/]')
+        elif c == '[':
+            # As in fnmatch: a ']' right after '[' or '[!' is a member, and a '[' without a closing ']' is literal
+            start = i + 2 if pattern.startswith(('[!', '[^'), i) else i + 1
+            end = pattern.find(']', start + 1 if pattern.startswith(']', start) else start)
+            if end < 0:
+                out.append(re.escape(c))
+            else:
+                body = pattern[start:end].replace('\\', '\\\\').replace('[', '\\[').replace(']', '\\]')
+                out.append(('[^' if start > i + 1 else '[') + body + ']')
+                i = end + 1
+                continue
+        elif c == '\\' and i + 1 < n:
+            out.append(re.escape(pattern[i + 1]))
+            i += 2
+            continue
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return ''.join(out)
+
+
+class ScanRules:
+    # Patterns match paths relative to the scanned folder with '/' separators. As in .gitignore: '#' comments,
+    # '!' re-includes, a trailing '/' matches folders only, a pattern with a '/' is anchored to the scanned folder,
+    # otherwise it matches the name at any depth, and the last matching rule wins. Excluded folders are never opened,
+    # so nothing below them can be re-included.
+    def __init__(self, lines=()):
+        self.lines = []
+        self.negated = []
+        parsed = []
+        for line in lines:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            negated = line.startswith('!')
+            pattern = line[1:] if negated else line
+            dir_only = pattern.endswith('/')
+            pattern = pattern.rstrip('/')
+            if not pattern:
+                continue
+            parsed.append(('/' in pattern, pattern.lstrip('/'), dir_only))
+            self.lines.append(line)
+            self.negated.append(negated)
+        # Only unanchored rules: the entry name alone decides, so the walk never builds relative paths
+        self.names_only = not any(anchored for anchored, _, _ in parsed)
+        # Rules anchored without '**' cannot match below their own depth, so deeper entries skip the matcher entirely
+        self.max_depth = 0
+        for anchored, pattern, _ in parsed:
+            if not anchored or '**' in pattern:
+                self.max_depth = None
+                break
+            self.max_depth = max(self.max_depth, pattern.count('/') + 1)
+        alternatives, invalid = [], []
+        for number, (anchored, pattern, dir_only) in enumerate(parsed):
+            body = _translate(pattern)
+            if not anchored and not self.names_only:
+                body = '(?:.*/)?' + body
+            alternatives.append(f"(?P<r{number}>{body}{'/' if dir_only else '/?'})")
+            # Each rule on its own, so a typo such as a reversed range '[z-a]' is reported by its line
+            try:
+                re.compile(alternatives[-1])
+            except re.error as e:
+                invalid.append(f"{self.lines[number]} ({e.msg})")
+        if invalid:
+            raise ValueError(f"Invalid rule: {'; '.join(invalid)}")
+        # One alternation, last rule first: the first alternative that matches is the rule that decides
+        self._regex = re.compile('|'.join(reversed(alternatives)), re.DOTALL) if alternatives else None
+
+    def __bool__(self):
+        return bool(self.lines)
+
+    def __eq__(self, other):
+        return isinstance(other, ScanRules) and self.lines == other.lines
+
+    def __hash__(self):
+        return hash(tuple(self.lines))
+
+    def match(self, relative_path, is_dir):
+        # Index of the deciding rule, or -1; `relative_path` is the bare name when names_only is set
+        if self._regex is None:
+            return -1
+        if os.sep != '/':
+            relative_path = relative_path.replace(os.sep, '/')
+        match = self._regex.fullmatch(relative_path + '/' if is_dir else relative_path)
+        return int(match.lastgroup[1:]) if match else -1
+
+    def excluded(self, relative_path, is_dir):
+        if self.names_only:
+            relative_path = os.path.basename(relative_path)
+        rule = self.match(relative_path, is_dir)
+        return rule >= 0 and not self.negated[rule]
+
+    def report(self, hits):
+        return [{'rule': line, 'action': 'include' if negated else 'exclude', 'dirs': dirs, 'files': files}
+                for line, negated, (dirs, files) in zip(self.lines, self.negated, hits)]
+
+
+def compile_rules(rules):
+    if rules is None or isinstance(rules, ScanRules):
+        return rules
+    if isinstance(rules, str):
+        rules = rules.splitlines()
+    return ScanRules(rules)
+
+
+def check_rules(lines):
+    # Usable lines and (line, reason) for the rest, for the apps that warn about a typo instead of refusing the scan
+    valid, invalid = [], []
+    for line in lines:
+        try:
+            ScanRules([line])
+        except ValueError as e:
+            invalid.append((line.strip(), str(e)))
+        else:
+            valid.append(line)
+    return valid, invalid
+
+
+def load_rules(path):
+    with open(path, encoding='utf-8') as f:
+        return ScanRules(f.read().splitlines())
@@ -0,0 +1,369 @@
+import argparse
+import json
+import os
+import sqlite3
+import sys
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+from io_scheduler import IOScheduler, parse_workers, resolve_workers
+from scan_checkpoint import ScanCheckpoint
+from scan_cli import COLUMNS, iter_rows
+from scan_engine import CATEGORY_NAMES, DEFAULT_ENGINE, SCAN_ENGINES, SCAN_LIMITS, change_token, run_scan
+from scan_jobs import JobManager, SingleFlight
+from scan_rules import compile_rules
+from snapshot_cache import SnapshotCache, estimate_nbytes
+from snapshot_query import GROUP_BY, SORT_COLUMNS, group_entries, query_indices
+
+DEFAULT_PORT = 8765
+NDJSON = 'application/x-ndjson'
+STREAM_BATCH = 1000
+EXTENSION_LIMIT = 20
+
+
+class ServiceError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _count(value):
+    # Row counts and offsets: a negative one would slice from the end of the result
+    count = int(value)
+    if count < 0:
+        raise ValueError(value)
+    return count
+
+
+def _json_default(value):
+    if isinstance(value, np.integer):
+        return int(value)
+    if isinstance(value, np.floating):
+        return float(value)
+    return str(value)
+
+
+def job_info(job):
+    return {
+        'id': job.id,
+        'root': job.root,
+        'state': job.state,
+        'entries': job.entries,
+        'bytes': job.bytes,
+        'elapsed': round(job.elapsed, 3),
+        'submitted': job.submitted,
+        'error': f"{type(job.error).__name__}: {job.error}" if job.error is not None else None,
+        'largest': [{'path': path, 'size': size} for size, path in job.largest]
+    }
+
+
+class ScanService:
+    def __init__(self, max_workers=2, max_queued=16, cache_mb=None, store=False, scan_threads=None, device_limits=None, engine=None):
+        self.engine = engine or DEFAULT_ENGINE
+        if self.engine not in SCAN_ENGINES:
+            raise ValueError(f"Invalid scan engine: {self.engine}")
+        self.jobs = JobManager(max_workers=max_workers)
+        # Shared by every job, so concurrent scans of one disk split its limit and scans of different disks do not wait on each other
+        self.scheduler = IOScheduler.from_env(device_limits)
+        self.scan_threads = scan_threads
+        self.cache = SnapshotCache(cache_mb * 1024 * 1024 if cache_mb else None)
+        self.flights = SingleFlight()
+        self.max_queued = max_queued
+        self.store = store
+
+    def _store(self, snapshot):
+        if not self.store:
+            return None
+        from history_store import HistoryStore
+        from snapshot_store import SnapshotStore
+
+        try:
+            snapshot_path = SnapshotStore().save(snapshot)
+            HistoryStore().record(snapshot)
+            return snapshot_path
+        except (OSError, sqlite3.Error) as e:
+            print(f"Snapshot could not be stored: {e}", file=sys.stderr)
+            return None
+
+    def _scan(self, job):
+        if job.key in self.cache:
+            return job.key
+        options = {name: value for name, value in zip(SCAN_LIMITS, job.key[2]) if value is not None}
+        if job.key[3] is not None:
+            options['rules'] = job.key[3]
+        io = {'scheduler': self.scheduler, 'engine': self.engine, 'workers': resolve_workers(self.scan_threads, self.scheduler, job.root)}
+        if options:
+            # Budget-limited or custom-rule scans see a different tree, so they neither join nor serve a shared full walk
+            snapshot = run_scan(job.root, progress=job.progress, cancel=job.cancel_event, **options, **io)
+            self._store(snapshot)
+        else:
+            # Full walks checkpoint their progress, so a restarted service continues an interrupted scan of the same root
+            snapshot, _ = self.flights.run(job.root, lambda root, progress, cancel: run_scan(root, progress=progress, cancel=cancel, checkpoint=ScanCheckpoint(root), **io),
+                                           self._store, job)
+        self.cache.put(job.key, snapshot, estimate_nbytes(snapshot))
+        return job.key
+
+    def submit(self, path, max_depth=None, max_entries=None, time_budget=None, rules=None):
+        if not path:
+            raise ServiceError(400, "'path' is required")
+        limits = (max_depth, max_entries, time_budget)
+        for name, value in zip(SCAN_LIMITS, limits):
+            if value is not None and (isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0):
+                raise ServiceError(400, f"Invalid value for {name}: {value}")
+        if rules is not None and (not isinstance(rules, list) or not all(isinstance(line, str) for line in rules)):
+            raise ServiceError(400, "'rules' must be a list of gitignore-style lines")
+        try:
+            compile_rules(rules)
+        except ValueError as e:
+            raise ServiceError(400, str(e))
+        root = os.path.abspath(path)
+        if not os.path.isdir(root):
+            raise ServiceError(404, f"Folder not found: {root}")
+        if sum(job.state == 'queued' for job in self.jobs.jobs()) >= self.max_queued:
+            raise ServiceError(429, "Too many queued scans, try again later")
+        # Same folder, unchanged since the last scan: the job resolves to the warm snapshot without walking
+        return self.jobs.submit((root, change_token(root), limits, tuple(rules) if rules is not None else None), root, self._scan)
+
+    def job(self, job_id):
+        job = self.jobs.get(job_id)
+        if job is None:
+            raise ServiceError(404, f"Unknown scan: {job_id}")
+        return job
+
+    def snapshot(self, job_id):
+        job = self.job(job_id)
+        if job.state != 'done':
+            raise ServiceError(409, f"Scan is {job.state}" + (f": {job.error}" if job.error is not None else ''))
+        snapshot = self.cache.acquire(job.key)
+        if snapshot is None:
+            raise ServiceError(410, "Snapshot was evicted from memory, submit the scan again")
+        return snapshot
+
+    def summary(self, job_id):
+        snapshot = self.snapshot(job_id)
+        children = snapshot.children(0)
+        children = children[np.argsort(snapshot.total[children], kind='stable')[::-1]]
+        return {
+            'root': snapshot.root,
+            'created': snapshot.created,
+            'total_size': snapshot.total_size,
+            'entries': len(snapshot) - 1,
+            'files': int(snapshot.file_count[0]),
+            'folders': int(snapshot.is_dir.sum()) - 1,
+            'errors': len(snapshot.errors),
+            'partial': snapshot.partial,
+            'unlisted': len(snapshot.unlisted),
+            'rules': snapshot.rule_hits,
+            'categories': snapshot.rollups.categories(0),
+            'extensions': snapshot.rollups.extension_table(EXTENSION_LIMIT),
+            'size_histogram': snapshot.rollups.histogram(),
+            'top_level': [dict(zip(COLUMNS, row)) for row in iter_rows(snapshot, children)]
+        }
+
+    def entries(self, job_id, kind='All', category='All', search=None, sort='Size', descending=True, offset=0, limit=100):
+        snapshot = self.snapshot(job_id)
+        if kind not in ('All', 'File', 'Folder'):
+            raise ServiceError(400, f"Invalid kind: {kind}")
+        if category != 'All' and category not in CATEGORY_NAMES:
+            raise ServiceError(400, f"Invalid category: {category}")
+        if sort not in SORT_COLUMNS:
+            raise ServiceError(400, f"Invalid sort, use one of: {', '.join(SORT_COLUMNS)}")
+        matches, mask = query_indices(snapshot, kind, category, search, sort, descending)
+        page = matches[offset:offset + limit] if limit else matches[offset:]
+        return snapshot, matches, page
+
+    def groups(self, job_id, by='Category', kind='All', category='All', search=None):
+        if by not in GROUP_BY:
+            raise ServiceError(400, f"Invalid group, use one of: {', '.join(GROUP_BY)}")
+        table = group_entries(self.snapshot(job_id), by, kind, category, search)
+        return table.to_dict('records')
+
+    def diff(self, old_id, new_id, status=None, n=100):
+        from snapshot_diff import DIFF_STATUSES, diff_snapshots
+
+        if status is not None and status not in DIFF_STATUSES:
+            raise ServiceError(400, f"Invalid status, use one of: {', '.join(DIFF_STATUSES)}")
+        old, new = self.snapshot(old_id), self.snapshot(new_id)
+        if old.root != new.root:
+            raise ServiceError(400, f"Scans of different folders cannot be compared: {old.root} and {new.root}")
+        diff = diff_snapshots(old, new)
+        return {
+            'old': old_id,
+            'new': new_id,
+            'net_delta': diff.net_delta,
+            'summary': diff.summary(),
+            'unknown': diff.unknown[:n],
+            'by_folder': diff.by_folder.head(n).to_dict('records'),
+            'by_category': diff.by_category.to_dict('records'),
+            'changes': diff.top(status, n).to_dict('records')
+        }
+
+
+class ScanRequestHandler(BaseHTTPRequestHandler):
+    server_version = 'FileSizeAnalyzer'
+    service = None
+    quiet = False
+
+    def log_message(self, format, *args):
+        if not self.quiet:
+            super().log_message(format, *args)
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False, default=_json_default).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_ndjson(self, records):
+        # HTTP/1.0 without Content-Length: lines go out in batches and the connection closes at the end
+        self.send_response(200)
+        self.send_header('Content-Type', NDJSON)
+        self.end_headers()
+        batch = []
+        for record in records:
+            batch.append(json.dumps(record, ensure_ascii=False, default=_json_default))
+            if len(batch) >= STREAM_BATCH:
+                self.wfile.write(('\n'.join(batch) + '\n').encode('utf-8'))
+                batch = []
+        if batch:
+            self.wfile.write(('\n'.join(batch) + '\n').encode('utf-8'))
+
+    def _wants_ndjson(self, query):
+        return query.get('format', [''])[0] == 'ndjson' or NDJSON in self.headers.get('Accept', '')
+
+    def _param(self, query, name, default=None, cast=str):
+        values = query.get(name)
+        if not values or values[0] == '':
+            return default
+        try:
+            return cast(values[0])
+        except ValueError:
+            raise ServiceError(400, f"Invalid value for {name}: {values[0]}")
+
+    def _flag(self, value):
+        return value.lower() in ('1', 'true', 'yes')
+
+    def _handle(self, method):
+        url = urlsplit(self.path)
+        parts = [part for part in url.path.split('/') if part]
+        query = parse_qs(url.query)
+        try:
+            if method == 'GET' and parts == ['health']:
+                stats = self.service.cache.stats()
+                stats.pop('items')
+                return self._send_json(200, {'status': 'ok', 'jobs': len(self.service.jobs.jobs()), 'cache': stats,
+                                             'coalesced': self.service.flights.coalesced, 'sliced': self.service.flights.sliced,
+                                             'devices': self.service.scheduler.stats()})
+            if parts == ['scans'] and method == 'GET':
+                return self._send_json(200, [job_info(job) for job in self.service.jobs.jobs()])
+            if parts == ['scans'] and method == 'POST':
+                length = int(self.headers.get('Content-Length') or 0)
+                try:
+                    body = json.loads(self.rfile.read(length) or b'{}')
+                except ValueError:
+                    raise ServiceError(400, "Request body must be JSON")
+                if not isinstance(body, dict):
+                    raise ServiceError(400, "Request body must be a JSON object")
+                job = self.service.submit(body.get('path'), body.get('max_depth'), body.get('max_entries'), body.get('time_budget'), body.get('rules'))
+                return self._send_json(202, job_info(job))
+            if len(parts) == 2 and parts[0] == 'scans':
+                if method == 'DELETE':
+                    job = self.service.job(parts[1])
+                    job.cancel()
+                    return self._send_json(200, job_info(job))
+                job = self.service.job(parts[1])
+                wait = self._param(query, 'wait', 0.0, float)
+                if wait:
+                    job.wait(min(wait, 300))
+                return self._send_json(200, job_info(job))
+            if len(parts) == 3 and parts[0] == 'scans' and method == 'GET':
+                job_id, view = parts[1], parts[2]
+                if view == 'summary':
+                    return self._send_json(200, self.service.summary(job_id))
+                if view in ('entries', 'top', 'search'):
+                    search = self._param(query, 'q') if view == 'search' else self._param(query, 'search')
+                    if view == 'search' and not search:
+                        raise ServiceError(400, "'q' is required")
+                    limit = self._param(query, 'n', 20, _count) if view == 'top' else self._param(query, 'limit', 100, _count)
+                    snapshot, matches, page = self.service.entries(
+                        job_id, self._param(query, 'kind', 'All'), self._param(query, 'category', 'All'), search,
+                        self._param(query, 'sort', 'Size'), self._flag(self._param(query, 'desc', '1')), self._param(query, 'offset', 0, _count), limit)
+                    records = (dict(zip(COLUMNS, row)) for row in iter_rows(snapshot, page))
+                    if self._wants_ndjson(query):
+                        return self._send_ndjson(records)
+                    return self._send_json(200, {'count': len(matches), 'entries': list(records)})
+                if view == 'groups':
+                    records = self.service.groups(job_id, self._param(query, 'by', 'Category'), self._param(query, 'kind', 'All'),
+                                                  self._param(query, 'category', 'All'), self._param(query, 'search'))
+                    return self._send_ndjson(records) if self._wants_ndjson(query) else self._send_json(200, records)
+            if parts == ['diff'] and method == 'GET':
+                old_id, new_id = self._param(query, 'old'), self._param(query, 'new')
+                if not old_id or not new_id:
+                    raise ServiceError(400, "'old' and 'new' scan ids are required")
+                return self._send_json(200, self.service.diff(old_id, new_id, self._param(query, 'status'), self._param(query, 'n', 100, _count)))
+            raise ServiceError(404, f"No route for {method} {url.path}")
+        except ServiceError as e:
+            self._send_json(e.status, {'error': str(e)})
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        except Exception as e:
+            self._send_json(500, {'error': f"{type(e).__name__}: {e}"})
+
+    def do_GET(self):
+        self._handle('GET')
+
+    def do_POST(self):
+        self._handle('POST')
+
+    def do_DELETE(self):
+        self._handle('DELETE')
+
+
+def make_server(service, host='127.0.0.1', port=DEFAULT_PORT, quiet=False):
+    handler = type('Handler', (ScanRequestHandler,), {'service': service, 'quiet': quiet})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m scan_service', description='Serve scans as a local HTTP/JSON API.')
+    parser.add_argument('--host', default='127.0.0.1', help='address to bind (default: 127.0.0.1, localhost only)')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f'port to listen on, 0 picks a free one (default: {DEFAULT_PORT})')
+    parser.add_argument('--workers', type=int, default=2, help='concurrent scans (default: 2)')
+    parser.add_argument('--max-queued', type=int, default=16, help='queued scans before new ones are refused with 429 (default: 16)')
+    parser.add_argument('--cache-mb', type=int, help='memory for warm snapshots (default: ANALYZER_CACHE_MB or 1024)')
+    parser.add_argument('--store', action='store_true', help='also save snapshots and scan history for the GUI apps')
+    parser.add_argument('--scan-threads', type=parse_workers, metavar='N|auto', help="listing threads per scan, 'auto' uses the device's limit (default: one)")
+    parser.add_argument('--device-limits', metavar='SPEC', help="concurrent listings per device, e.g. 'hdd=2,ssd=16,/host/e=1' (default: ANALYZER_DEVICE_LIMITS)")
+    parser.add_argument('--engine', choices=SCAN_ENGINES, help='scan engine, async for high-latency network or bind mounts (default: ANALYZER_SCAN_ENGINE or sync)')
+    parser.add_argument('-q', '--quiet', action='store_true', help='no request log')
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.host not in ('127.0.0.1', 'localhost', '::1'):
+        print(f"warning: the API has no authentication and is reachable on {args.host}", file=sys.stderr)
+    try:
+        service = ScanService(args.workers, args.max_queued, args.cache_mb, args.store, args.scan_threads, args.device_limits, args.engine)
+    except ValueError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+    server = make_server(service, args.host, args.port, args.quiet)
+    print(f"Scan service listening on http://{server.server_address[0]}:{server.server_address[1]}", file=sys.stderr, flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,220 @@
+import math
+import os
+import random
+import threading
+import time
+from collections import deque
+from statistics import NormalDist
+
+from scan_engine import DEFAULT_RULES, FILE_CATEGORIES, get_file_category, file_suffix
+from scan_rules import compile_rules
+
+# Listing budget per refinement step: small enough that probes keep running between exact walks
+WALK_BATCH = 64
+MIN_PROBES = 3
+
+
+class ChildEstimate:
+    def __init__(self, name, path, is_dir, size=0, mtime=0.0, ctime=0.0):
+        self.name = name
+        self.path = path
+        self.is_dir = is_dir
+        self.mtime = mtime
+        self.ctime = ctime
+        self.probes = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        # Bytes of the folders listed so far inside this child: a hard lower bound on its size
+        self.known = size
+        self.seen = set()
+        self.frontier = None
+        self.exact = None if is_dir else size
+
+    def add(self, value):
+        # Welford running mean and variance of the probe results
+        self.probes += 1
+        delta = value - self.mean
+        self.mean += delta / self.probes
+        self.m2 += delta * (value - self.mean)
+
+    def interval(self, z):
+        if self.exact is not None:
+            return self.exact, self.exact, self.exact
+        if self.probes == 0:
+            return float(self.known), float(self.known), math.inf
+        if self.probes < 2:
+            return max(self.mean, self.known), float(self.known), math.inf
+        error = z * math.sqrt(self.m2 / (self.probes - 1) / self.probes)
+        estimate = max(self.mean, self.known)
+        return estimate, max(self.mean - error, self.known), max(self.mean + error, estimate)
+
+
+class SizeEstimator:
+    # Random descent (Knuth): each probe follows one path down a child folder and scales the bytes it meets by the
+    # inverse probability of the branches taken, which is an unbiased estimate of the whole subtree. Branches are
+    # weighted by sub-folder count (st_nlink), and refinement walks the widest interval exactly until all are exact.
+    def __init__(self, root, rules=DEFAULT_RULES, categories=FILE_CATEGORIES, confidence=0.95, seed=None):
+        self.root = os.path.abspath(root)
+        self.rules = compile_rules(rules) or None
+        self._prefix = len(os.path.join(self.root, ''))
+        self.categories = categories
+        self.confidence = confidence
+        self.z = NormalDist().inv_cdf((1 + confidence) / 2)
+        self.errors = []
+        self.listed = 0
+        self.started = time.monotonic()
+        self.elapsed = 0.0
+        self._random = random.Random(seed)
+        self._listings = {}
+        self._lock = threading.Lock()
+        self.children = []
+        with os.scandir(self.root) as entries:
+            for entry in entries:
+                try:
+                    if self._excluded(entry, 1):
+                        continue
+                    if entry.is_dir(follow_symlinks=False):
+                        st = entry.stat(follow_symlinks=False)
+                        self.children.append(ChildEstimate(entry.name, entry.path, True, 0, st.st_mtime, st.st_ctime))
+                    elif entry.is_file():
+                        st = entry.stat()
+                        self.children.append(ChildEstimate(entry.name, entry.path, False, st.st_size, st.st_mtime, st.st_ctime))
+                except OSError as e:
+                    self.errors.append((entry.path, str(e)))
+        self.listed += 1
+
+    @property
+    def complete(self):
+        return all(child.exact is not None for child in self.children)
+
+    def _list(self, path):
+        listing = self._listings.get(path)
+        if listing is not None:
+            return listing
+        files_bytes, subdirs = 0, []
+        depth = path[self._prefix:].count(os.sep) + 2
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    try:
+                        if self._excluded(entry, depth):
+                            continue
+                        if entry.is_dir(follow_symlinks=False):
+                            # A folder links to itself, its parent and each of its sub-folders
+                            subdirs.append((entry.path, max(entry.stat(follow_symlinks=False).st_nlink - 1, 1)))
+                        elif entry.is_file():
+                            files_bytes += entry.stat().st_size
+                    except OSError as e:
+                        self.errors.append((entry.path, str(e)))
+        except OSError as e:
+            self.errors.append((path, str(e)))
+        self.listed += 1
+        listing = self._listings[path] = (files_bytes, subdirs)
+        return listing
+
+    def _excluded(self, entry, depth):
+        rules = self.rules
+        if rules is None or (rules.max_depth is not None and depth > rules.max_depth):
+            return False
+        return rules.excluded(entry.name if rules.names_only else entry.path[self._prefix:], entry.is_dir(follow_symlinks=False))
+
+    def _visit(self, child, path):
+        files_bytes, subdirs = self._list(path)
+        if path not in child.seen:
+            child.seen.add(path)
+            child.known += files_bytes
+        return files_bytes, subdirs
+
+    def _finish(self, child):
+        child.exact = child.known
+        for path in child.seen:
+            self._listings.pop(path, None)
+        child.seen = set()
+        child.frontier = None
+
+    def probe(self, child):
+        estimate, weight, path = 0.0, 1.0, child.path
+        while True:
+            files_bytes, subdirs = self._visit(child, path)
+            estimate += weight * files_bytes
+            if not subdirs:
+                break
+            total = sum(prior for _, prior in subdirs)
+            pick = self._random.uniform(0, total)
+            for path, prior in subdirs:
+                pick -= prior
+                if pick <= 0:
+                    break
+            weight *= total / prior
+        with self._lock:
+            child.add(estimate)
+            if path == child.path:
+                # No sub-folders: the single listing already is the exact size
+                self._finish(child)
+
+    def walk(self, child, limit=WALK_BATCH):
+        if child.frontier is None:
+            child.frontier = deque([child.path])
+        for _ in range(limit):
+            if not child.frontier:
+                break
+            _, subdirs = self._visit(child, child.frontier.popleft())
+            child.frontier.extend(path for path, _ in subdirs)
+        if not child.frontier:
+            with self._lock:
+                self._finish(child)
+
+    def step(self):
+        pending = [child for child in self.children if child.exact is None]
+        if not pending:
+            return False
+        unsampled = [child for child in pending if child.probes < MIN_PROBES]
+        if unsampled:
+            self.probe(min(unsampled, key=lambda child: child.probes))
+            return True
+        # One probe where the estimate is least certain, then a slice of exact walking where the interval is widest
+        self.probe(max(pending, key=lambda child: child.m2 / (child.probes - 1) / child.probes))
+        pending = [child for child in pending if child.exact is None]
+        if pending:
+            self.walk(max(pending, key=lambda child: self._width(child)))
+        return True
+
+    def _width(self, child):
+        estimate, low, high = child.interval(self.z)
+        return (high - low, estimate)
+
+    def run(self, budget=None, cancel=None):
+        deadline = time.monotonic() + budget if budget is not None else None
+        while not (cancel is not None and cancel.is_set()) and (deadline is None or time.monotonic() < deadline):
+            if not self.step():
+                break
+            self.elapsed = time.monotonic() - self.started
+        self.elapsed = time.monotonic() - self.started
+        return self
+
+    def estimates(self):
+        rows = []
+        with self._lock:
+            for child in self.children:
+                estimate, low, high = child.interval(self.z)
+                extension = '' if child.is_dir else file_suffix(child.name)
+                rows.append({
+                    'name': child.name, 'path': child.path, 'is_dir': child.is_dir, 'extension': extension,
+                    'category': 'Folder' if child.is_dir else get_file_category(extension, self.categories),
+                    'estimate': estimate, 'low': low, 'high': high, 'probes': child.probes, 'exact': child.exact is not None,
+                    'mtime': child.mtime, 'ctime': child.ctime
+                })
+        rows.sort(key=lambda row: -row['estimate'])
+        return rows
+
+    def total(self):
+        rows = self.estimates()
+        return sum(row['estimate'] for row in rows), sum(row['low'] for row in rows), sum(row['high'] for row in rows)
+
+    def stats(self):
+        return {'listed': self.listed, 'exact': sum(child.exact is not None for child in self.children), 'children': len(self.children),
+                'probes': sum(child.probes for child in self.children), 'elapsed': self.elapsed, 'errors': len(self.errors)}
+
+
+def estimate_folder_contents(root, budget=1.0, **options):
+    return SizeEstimator(root, **options).run(budget)
@@ -0,0 +1,118 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_CACHE_MB = int(os.environ.get('ANALYZER_CACHE_MB', '1024'))
+LEASE_SECONDS = 30 * 60
+
+
+def estimate_nbytes(snapshot, files_data=()):
+    # numpy columns are exact; names are one str object each, extensions are pooled
+    columns = sum(getattr(snapshot, column).nbytes for column in ('name', 'parent', 'is_dir', 'size', 'allocated', 'mtime', 'ctime', 'ext', 'category', 'key', 'depth', 'total', 'file_count'))
+    names = sum(map(len, snapshot.name)) + 49 * len(snapshot)
+    rollups = snapshot.__dict__.get('_rollups')
+    if rollups is not None:
+        columns += sum(table.nbytes for table in (rollups.count, rollups.bytes, rollups.allocated, rollups.direct_count, rollups.direct_bytes, rollups.direct_allocated, rollups._row))
+    return columns + names + 640 * len(files_data)
+
+
+class CacheEntry:
+    def __init__(self, key, value, nbytes):
+        self.key = key
+        self.value = value
+        self.nbytes = nbytes
+        self.created = time.time()
+        self.last_used = self.created
+        self.hits = 0
+        self.holders = {}
+
+    def refcount(self, now=None):
+        now = now or time.time()
+        return sum(1 for touched in self.holders.values() if now - touched < LEASE_SECONDS)
+
+
+class SnapshotCache:
+    def __init__(self, max_bytes=None):
+        self.max_bytes = max_bytes if max_bytes is not None else DEFAULT_CACHE_MB * 1024 * 1024
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def acquire(self, key, holder=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            entry.hits += 1
+            entry.last_used = time.time()
+            if holder is not None:
+                entry.holders[holder] = entry.last_used
+            self._entries.move_to_end(key)
+            return entry.value
+
+    def release(self, key, holder):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.holders.pop(holder, None)
+                self._evict()
+
+    def put(self, key, value, nbytes, holder=None):
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.nbytes -= previous.nbytes
+            entry = CacheEntry(key, value, nbytes)
+            if previous is not None:
+                entry.holders.update(previous.holders)
+            if holder is not None:
+                entry.holders[holder] = entry.created
+            self._entries[key] = entry
+            self.nbytes += nbytes
+            self._evict()
+        return value
+
+    def _evict(self):
+        # Least recently used first; snapshots still referenced by a live session are never dropped
+        now = time.time()
+        for key in list(self._entries):
+            if self.nbytes <= self.max_bytes:
+                break
+            entry = self._entries[key]
+            if entry.refcount(now):
+                continue
+            del self._entries[key]
+            self.nbytes -= entry.nbytes
+            self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            now = time.time()
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self.nbytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'pinned': sum(1 for entry in self._entries.values() if entry.refcount(now)),
+                'items': [
+                    {'key': entry.key, 'nbytes': entry.nbytes, 'hits': entry.hits, 'refs': entry.refcount(now), 'created': entry.created, 'last_used': entry.last_used}
+                    for entry in reversed(self._entries.values())
+                ]
+            }
@@ -0,0 +1,130 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from scan_engine import CATEGORY_NAMES
+
+DIFF_STATUSES = ['Added', 'Removed', 'Grown', 'Shrunk']
+
+
+class SnapshotDiff:
+    def __init__(self, old, new, entries, by_folder, by_category, unknown=()):
+        self.old = old
+        self.new = new
+        self.entries = entries
+        self.by_folder = by_folder
+        self.by_category = by_category
+        # Folders a budget-limited scan did not open on either side: their contents are left out of the comparison
+        self.unknown = list(unknown)
+
+    @property
+    def net_delta(self):
+        if self.unknown:
+            return int(self.entries['Delta'].sum())
+        return self.new.total_size - self.old.total_size
+
+    def summary(self):
+        counts = self.entries['Status'].value_counts()
+        deltas = self.entries.groupby('Status', observed=False)['Delta'].sum()
+        return {status: {'count': int(counts.get(status, 0)), 'bytes': int(deltas.get(status, 0))} for status in DIFF_STATUSES}
+
+    def top(self, status=None, n=20):
+        entries = self.entries if status is None else self.entries[self.entries['Status'] == status]
+        order = entries['Delta'].abs().sort_values(ascending=False).index[:n]
+        return entries.loc[order]
+
+
+def _side(snapshot, indices, rollup_depth):
+    folders = snapshot.relative_paths()[snapshot.ancestor_at_depth(indices, rollup_depth)]
+    folders[folders == ''] = '.'
+    return folders
+
+
+def _inside(snapshot, keys):
+    # Entries below a folder whose path key is in `keys`, found level by level from the top
+    marked = np.isin(snapshot.key, keys) & snapshot.is_dir
+    inside = np.zeros(len(snapshot), dtype=bool)
+    for depth in range(1, snapshot.max_depth + 1):
+        level = snapshot.level(depth)
+        parents = snapshot.parent[level]
+        inside[level] = marked[parents] | inside[parents]
+    return inside
+
+
+def _unknown_paths(old, new):
+    paths = sorted(set(old.relative_paths()[old.unlisted]) | set(new.relative_paths()[new.unlisted]))
+    top = []
+    for path in paths:
+        if not top or not path.startswith(top[-1] + os.sep):
+            top.append(path)
+    return top
+
+
+def diff_snapshots(old, new, rollup_depth=1):
+    # A folder left unopened by a budget-limited scan has no contents on that side, which would read as every file
+    # below it being removed or added; such subtrees are left out on both sides and reported as unknown
+    unknown_keys = np.concatenate([old.key[old.unlisted], new.key[new.unlisted]])
+    old_known = ~_inside(old, unknown_keys) if len(unknown_keys) else np.ones(len(old), dtype=bool)
+    new_known = ~_inside(new, unknown_keys) if len(unknown_keys) else np.ones(len(new), dtype=bool)
+    old_files = np.flatnonzero(~old.is_dir & old_known)
+    new_files = np.flatnonzero(~new.is_dir & new_known)
+    # Joined on 64-bit path hashes; intersect1d sorts both key sets once instead of matching strings
+    _, old_pos, new_pos = np.intersect1d(old.key[old_files], new.key[new_files], assume_unique=True, return_indices=True)
+    removed = np.ones(len(old_files), dtype=bool)
+    removed[old_pos] = False
+    added = np.ones(len(new_files), dtype=bool)
+    added[new_pos] = False
+
+    common_old = old_files[old_pos]
+    common_new = new_files[new_pos]
+    delta = new.size[common_new] - old.size[common_old]
+    changed = delta != 0
+    common_old, common_new, delta = common_old[changed], common_new[changed], delta[changed]
+    removed_idx = old_files[removed]
+    added_idx = new_files[added]
+
+    category_names = np.asarray(CATEGORY_NAMES, dtype=object)
+    old_paths = old.relative_paths()
+    new_paths = new.relative_paths()
+    status = np.concatenate([
+        np.full(len(added_idx), 0, dtype=np.int8),
+        np.full(len(removed_idx), 1, dtype=np.int8),
+        np.where(delta > 0, 2, 3).astype(np.int8)
+    ])
+    entries = pd.DataFrame({
+        'Path': np.concatenate([new_paths[added_idx], old_paths[removed_idx], new_paths[common_new]]),
+        'Status': pd.Categorical.from_codes(status, DIFF_STATUSES),
+        'Old Size': np.concatenate([np.zeros(len(added_idx), dtype=np.int64), old.size[removed_idx], old.size[common_old]]),
+        'New Size': np.concatenate([new.size[added_idx], np.zeros(len(removed_idx), dtype=np.int64), new.size[common_new]]),
+        'Category': category_names[np.concatenate([new.category[added_idx], old.category[removed_idx], new.category[common_new]])],
+        'Folder': np.concatenate([
+            _side(new, added_idx, rollup_depth),
+            _side(old, removed_idx, rollup_depth),
+            _side(new, common_new, rollup_depth)
+        ])
+    })
+    entries['Delta'] = entries['New Size'] - entries['Old Size']
+    return SnapshotDiff(old, new, entries, _rollup(entries, 'Folder'), _rollup(entries, 'Category'), _unknown_paths(old, new) if len(unknown_keys) else ())
+
+
+def _rollup(entries, column):
+    if entries.empty:
+        return pd.DataFrame(columns=[column, 'Net Delta', 'Added', 'Removed', 'Grown', 'Shrunk', 'Changed Files'])
+    table = entries.pivot_table(index=column, columns='Status', values='Delta', aggfunc='sum', fill_value=0, observed=False)
+    table = table.reindex(columns=DIFF_STATUSES, fill_value=0)
+    table['Net Delta'] = table.sum(axis=1)
+    table['Changed Files'] = entries.groupby(column).size()
+    table = table.reset_index()[[column, 'Net Delta', 'Added', 'Removed', 'Grown', 'Shrunk', 'Changed Files']]
+    table.columns.name = None
+    return table.sort_values('Net Delta', key=lambda values: values.abs(), ascending=False, ignore_index=True)
+
+
+def in_gb(table, columns=('Net Delta', 'Added', 'Removed', 'Grown', 'Shrunk', 'Old Size', 'New Size', 'Delta')):
+    table = table.copy()
+    renamed = {}
+    for column in columns:
+        if column in table.columns:
+            table[column] = (table[column] / (1024 ** 3)).round(3)
+            renamed[column] = f"{column} (GB)"
+    return table.rename(columns=renamed)
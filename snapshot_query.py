@@ -0,0 +1,140 @@
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from scan_engine import CATEGORY_NAMES
+
+SORT_COLUMNS = {'Size': 'total', 'Name': 'name', 'Modified': 'mtime', 'Depth': 'depth'}
+GROUP_BY = ['Category', 'Extension', 'Depth']
+
+_lock = threading.Lock()
+
+
+def _cached(snapshot, name, build):
+    # Derived arrays are computed once per snapshot and shared by every session viewing it
+    cache = snapshot.__dict__.setdefault('_query_cache', {})
+    value = cache.get(name)
+    if value is None:
+        with _lock:
+            value = cache.get(name)
+            if value is None:
+                value = cache[name] = build()
+    return value
+
+
+def sort_order(snapshot, sort):
+    column = SORT_COLUMNS[sort]
+    return _cached(snapshot, f'order_{column}', lambda: np.argsort(getattr(snapshot, column), kind='stable'))
+
+
+def extension_codes(snapshot):
+    codes, labels = _cached(snapshot, 'extension_codes', lambda: pd.factorize(snapshot.ext))
+    return np.asarray(labels, dtype=object), codes
+
+
+def entry_mask(snapshot, kind='All', category='All', search=None):
+    mask = np.ones(len(snapshot), dtype=bool)
+    mask[0] = False
+    if kind == 'File':
+        mask &= ~snapshot.is_dir
+    elif kind == 'Folder':
+        mask &= snapshot.is_dir
+    if category != 'All':
+        mask &= snapshot.category == CATEGORY_NAMES.index(category)
+    if search:
+        search = search.lower()
+        mask &= np.fromiter((search in name.lower() for name in snapshot.name), dtype=bool, count=len(snapshot))
+    return mask
+
+
+def query_indices(snapshot, kind='All', category='All', search=None, sort='Size', descending=True):
+    mask = entry_mask(snapshot, kind, category, search)
+    order = sort_order(snapshot, sort)
+    if descending:
+        order = order[::-1]
+    return order[mask[order]], mask
+
+
+def query_entries(snapshot, kind='All', category='All', search=None, sort='Size', descending=True, offset=0, limit=100):
+    matches, mask = query_indices(snapshot, kind, category, search, sort, descending)
+    page = matches[offset:offset + limit]
+    totals = {
+        'count': len(matches),
+        'bytes': int(snapshot.size[mask].sum()),
+        'files': int((mask & ~snapshot.is_dir).sum()),
+        'folders': int((mask & snapshot.is_dir).sum())
+    }
+    frame = pd.DataFrame({
+        'Path': snapshot.relative_paths()[page],
+        'Type': np.where(snapshot.is_dir[page], 'Folder', 'File'),
+        'Size (GB)': (snapshot.total[page] / (1024 ** 3)).round(3),
+        'Files': snapshot.file_count[page],
+        'Category': np.asarray(CATEGORY_NAMES, dtype=object)[snapshot.category[page]],
+        'Modified': pd.to_datetime(snapshot.mtime[page], unit='s')
+    })
+    if snapshot.partial is not None:
+        frame['Complete'] = ~snapshot.incomplete[page]
+    return frame, totals
+
+
+def group_entries(snapshot, by='Category', kind='All', category='All', search=None):
+    mask = entry_mask(snapshot, kind, category, search)
+    files = mask & ~snapshot.is_dir
+    if by == 'Category':
+        labels, codes = np.asarray(CATEGORY_NAMES, dtype=object), snapshot.category.astype(np.int64)
+    elif by == 'Extension':
+        labels, codes = extension_codes(snapshot)
+        labels = np.where(labels == '', '(none)', labels)
+        codes = codes.astype(np.int64)
+    else:
+        codes = snapshot.depth.astype(np.int64)
+        labels = np.arange(int(codes.max()) + 1)
+    # Bytes are summed over files only so nested folders are not counted twice
+    length = len(labels)
+    table = pd.DataFrame({
+        by: labels,
+        'Entries': np.bincount(codes[mask], minlength=length),
+        'Files': np.bincount(codes[files], minlength=length),
+        'Folders': np.bincount(codes[mask & snapshot.is_dir], minlength=length),
+        'Size (GB)': (np.bincount(codes[files], weights=snapshot.size[files], minlength=length) / (1024 ** 3)).round(3)
+    })
+    table = table[table['Entries'] > 0]
+    return table.sort_values(by if by == 'Depth' else 'Size (GB)', ascending=by == 'Depth', ignore_index=True)
+
+
+def tree_nodes(snapshot, root=0, max_depth=3, min_fraction=0.005, max_children=25):
+    # Level-of-detail pruning: per folder keep the largest children above min_fraction of the focus
+    # folder and fold the rest into one "other" node, so the figure size is independent of the tree size
+    threshold = int(snapshot.total[root]) * min_fraction
+    ids, parents, labels, values, indices = [str(root)], [''], [os.path.basename(snapshot.path_of(root).rstrip(os.sep)) or snapshot.path_of(root)], [int(snapshot.total[root])], [root]
+    frontier = [(root, 0)]
+    while frontier:
+        index, depth = frontier.pop()
+        if depth >= max_depth:
+            continue
+        children = snapshot.children(index)
+        if not len(children):
+            continue
+        sizes = snapshot.total[children]
+        order = np.argsort(sizes, kind='stable')[::-1]
+        keep = order[:max_children]
+        keep = keep[sizes[keep] >= max(threshold, 1)]
+        for child in children[keep]:
+            ids.append(str(child))
+            parents.append(str(index))
+            labels.append(snapshot.name[child])
+            values.append(int(snapshot.total[child]))
+            indices.append(int(child))
+            if snapshot.is_dir[child]:
+                frontier.append((child, depth + 1))
+        rest = len(children) - len(keep)
+        rest_bytes = int(sizes.sum()) - int(sizes[keep].sum())
+        if rest and rest_bytes:
+            ids.append(f'{index}/other')
+            parents.append(str(index))
+            labels.append(f'other ({rest:,} items)')
+            values.append(rest_bytes)
+            indices.append(-1)
+    return pd.DataFrame({'id': ids, 'parent': parents, 'label': labels, 'value': values, 'index': indices})
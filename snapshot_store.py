@@ -0,0 +1,75 @@
+import hashlib
+import json
+import os
+import re
+import time
+
+from scan_engine import Snapshot
+
+DEFAULT_DATA_DIR = os.environ.get('ANALYZER_DATA_DIR') or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'analyzer_data')
+
+
+def root_slug(root):
+    name = re.sub(r'[^A-Za-z0-9_-]+', '_', os.path.basename(root.rstrip('/\\')) or 'root')[:40]
+    digest = hashlib.blake2b(os.path.normcase(root).encode('utf-8', 'surrogatepass'), digest_size=6).hexdigest()
+    return f"{name}_{digest}"
+
+
+class SnapshotStore:
+    def __init__(self, data_dir=None, keep=30):
+        self.base_dir = os.path.join(data_dir or DEFAULT_DATA_DIR, 'snapshots')
+        self.keep = keep
+
+    def _root_dir(self, root):
+        return os.path.join(self.base_dir, root_slug(root))
+
+    def save(self, snapshot):
+        root_dir = self._root_dir(snapshot.root)
+        os.makedirs(root_dir, exist_ok=True)
+        stamp = time.strftime('%Y%m%d_%H%M%S', time.localtime(snapshot.created))
+        path = os.path.join(root_dir, f"{stamp}.snapshot")
+        temp_path = path + '.tmp'
+        snapshot.save(temp_path)
+        os.replace(temp_path, path)
+        meta = {
+            'root': snapshot.root,
+            'created': snapshot.created,
+            'entries': len(snapshot),
+            'total_size': snapshot.total_size,
+            'errors': len(snapshot.errors),
+            'partial': snapshot.partial
+        }
+        with open(path + '.json', 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        self._prune(snapshot.root)
+        return path
+
+    def list_snapshots(self, root):
+        root_dir = self._root_dir(root)
+        if not os.path.isdir(root_dir):
+            return []
+        snapshots = []
+        for filename in os.listdir(root_dir):
+            if not filename.endswith('.snapshot.json'):
+                continue
+            try:
+                with open(os.path.join(root_dir, filename), encoding='utf-8') as f:
+                    meta = json.load(f)
+            except (OSError, ValueError):
+                continue
+            meta['path'] = os.path.join(root_dir, filename[:-len('.json')])
+            if os.path.exists(meta['path']):
+                snapshots.append(meta)
+        snapshots.sort(key=lambda meta: meta['created'], reverse=True)
+        return snapshots
+
+    def load(self, path):
+        return Snapshot.load(path)
+
+    def _prune(self, root):
+        for meta in self.list_snapshots(root)[self.keep:]:
+            for path in (meta['path'], meta['path'] + '.json'):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
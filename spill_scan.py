@@ -0,0 +1,233 @@
+import gzip
+import heapq
+import os
+import pickle
+import shutil
+import tempfile
+import time
+
+from scan_engine import (CATEGORY_NAMES, DEFAULT_RULES, FILE_CATEGORIES, FOLDER_CATEGORY, OTHER_CATEGORY, ScanCancelled,
+                         category_codes, file_suffix)
+from scan_rules import compile_rules
+
+DEFAULT_MEMORY_MB = int(os.environ.get('ANALYZER_SPILL_MB', '256'))
+SPILL_COLUMNS = ['Path', 'Type', 'Size', 'Files', 'Extension', 'Category', 'Depth', 'Modified']
+# Rough in-memory cost of one buffered row (tuple, key str, floats) and of one folder aggregate
+ROW_BYTES = 240
+AGGREGATE_BYTES = 160
+BLOCK_ROWS = 4096
+# Chunks merged at once: each open chunk holds one decompressed block in memory
+MERGE_FAN_IN = 32
+SEP = '\0'
+
+
+def _write_chunk(path, rows):
+    # Sorted rows, pickled in blocks into one gzip stream so readers never hold more than a block
+    with gzip.open(path, 'wb', compresslevel=3) as f:
+        for start in range(0, len(rows), BLOCK_ROWS):
+            pickle.dump(rows[start:start + BLOCK_ROWS], f, protocol=pickle.HIGHEST_PROTOCOL)
+    return path
+
+
+def _read_chunk(path):
+    with gzip.open(path, 'rb') as f:
+        while True:
+            try:
+                block = pickle.load(f)
+            except EOFError:
+                return
+            yield from block
+
+
+def _sum_aggregates(rows):
+    # Rows are (key, bytes, files) sorted by key; equal keys from different chunks are added up
+    current = None
+    for key, size, files in rows:
+        if current is not None and current[0] == key:
+            current[1] += size
+            current[2] += files
+            continue
+        if current is not None:
+            yield tuple(current)
+        current = [key, size, files]
+    if current is not None:
+        yield tuple(current)
+
+
+class SpilledScan:
+    # Scan result kept on disk: entry chunks sorted by path, folder totals merged externally. Rows come back
+    # through iterators in path order (a folder before its contents), so memory stays at one block per chunk.
+    def __init__(self, root, directory):
+        self.root = root
+        self.directory = directory
+        self.created = time.time()
+        self.errors = []
+        self.rule_hits = []
+        self.entry_chunks = []
+        self.aggregate_chunks = []
+        self.entries = 0
+        self.total_size = 0
+        self.file_count = 0
+        self.spilled_bytes = 0
+        self._chunk_number = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+        self.entry_chunks = []
+        self.aggregate_chunks = []
+
+    def _chunk_path(self, kind):
+        self._chunk_number += 1
+        return os.path.join(self.directory, f'{kind}_{self._chunk_number:05d}.pkl.gz')
+
+    def spill(self, rows, aggregates):
+        rows.sort()
+        self.entry_chunks.append(_write_chunk(self._chunk_path('entries'), rows))
+        self.aggregate_chunks.append(_write_chunk(self._chunk_path('totals'), sorted((key, size, files) for key, (size, files) in aggregates.items())))
+        self.spilled_bytes = sum(os.path.getsize(path) for path in self.entry_chunks + self.aggregate_chunks)
+
+    def compact(self, fan_in=MERGE_FAN_IN):
+        # Multi-pass merge until every final merge opens at most fan_in chunks at once
+        while len(self.entry_chunks) > fan_in:
+            group, self.entry_chunks = self.entry_chunks[:fan_in], self.entry_chunks[fan_in:]
+            self.entry_chunks.append(self._merge_to_chunk('entries', group, heapq.merge(*map(_read_chunk, group))))
+        while len(self.aggregate_chunks) > fan_in:
+            group, self.aggregate_chunks = self.aggregate_chunks[:fan_in], self.aggregate_chunks[fan_in:]
+            self.aggregate_chunks.append(self._merge_to_chunk('totals', group, _sum_aggregates(heapq.merge(*map(_read_chunk, group)))))
+        self.spilled_bytes = sum(os.path.getsize(path) for path in self.entry_chunks + self.aggregate_chunks)
+
+    def _merge_to_chunk(self, kind, group, rows):
+        path = self._chunk_path(kind)
+        with gzip.open(path, 'wb', compresslevel=3) as f:
+            block = []
+            for row in rows:
+                block.append(row)
+                if len(block) >= BLOCK_ROWS:
+                    pickle.dump(block, f, protocol=pickle.HIGHEST_PROTOCOL)
+                    block = []
+            if block:
+                pickle.dump(block, f, protocol=pickle.HIGHEST_PROTOCOL)
+        for old in group:
+            os.remove(old)
+        return path
+
+    def iter_entries(self):
+        # (Path, Type, Size, Files, Extension, Category, Depth, Modified) in path order; folder sizes are subtree totals
+        totals = _sum_aggregates(heapq.merge(*map(_read_chunk, self.aggregate_chunks)))
+        pending = next(totals, None)
+        category_names = CATEGORY_NAMES
+        for key, is_dir, size, mtime, extension, category, depth in heapq.merge(*map(_read_chunk, self.entry_chunks)):
+            files = 1
+            if is_dir:
+                while pending is not None and pending[0] < key:
+                    pending = next(totals, None)
+                size, files = (pending[1], pending[2]) if pending is not None and pending[0] == key else (0, 0)
+            yield (key.replace(SEP, os.sep), 'Folder' if is_dir else 'File', size, files, extension, category_names[category], depth, mtime)
+
+    def search(self, text, kind='All'):
+        text = text.lower()
+        for row in self.iter_entries():
+            if (kind == 'All' or row[1] == kind) and text in os.path.basename(row[0]).lower():
+                yield row
+
+    def top(self, n=10, kind='File', rows=None):
+        rows = self.iter_entries() if rows is None else rows
+        return heapq.nlargest(n, (row for row in rows if kind == 'All' or row[1] == kind), key=lambda row: row[2])
+
+
+def spill_scan(root, memory_budget=None, rules=DEFAULT_RULES, categories=FILE_CATEGORIES, progress=None, progress_interval=0.5,
+               cancel=None, profile=None, spill_dir=None):
+    # Out-of-core variant of scan_tree: rows are buffered up to memory_budget bytes, then sorted and written out
+    root = os.path.abspath(root)
+    memory_budget = memory_budget if memory_budget is not None else DEFAULT_MEMORY_MB * 1024 * 1024
+    rules = compile_rules(rules) or None
+    hits = [[0, 0] for _ in rules.lines] if rules is not None else None
+    prefix = len(os.path.join(root, ''))
+    os.stat(root)
+    scan = SpilledScan(root, tempfile.mkdtemp(prefix='folder_analyzer_spill_', dir=spill_dir))
+    walk = profile.start('walk') if profile is not None else None
+    extension_categories = category_codes(categories)
+    extension_pool = {}
+    rows, aggregates = [], {}
+    last_report = time.monotonic()
+    # Depth-first: the pending stack holds one sibling list per level instead of a whole breadth-first level
+    stack = [(root, '', (), 0)]
+    dirs_listed = 0
+    try:
+        while stack:
+            if cancel is not None and cancel.is_set():
+                raise ScanCancelled(root)
+            path, key, ancestors, depth = stack.pop()
+            dirs_listed += 1
+            check = rules is not None and (rules.max_depth is None or depth < rules.max_depth)
+            folder_bytes = folder_files = 0
+            try:
+                with os.scandir(path) as entries:
+                    for entry in entries:
+                        try:
+                            directory = entry.is_dir(follow_symlinks=False)
+                            if check:
+                                rule = rules.match(entry.name if rules.names_only else entry.path[prefix:], directory)
+                                if rule >= 0:
+                                    hits[rule][0 if directory else 1] += 1
+                                    if not rules.negated[rule]:
+                                        continue
+                            child_key = key + SEP + entry.name if key else entry.name
+                            if directory:
+                                st = entry.stat(follow_symlinks=False)
+                                stack.append((entry.path, child_key, ancestors + (child_key,), depth + 1))
+                                rows.append((child_key, True, 0, st.st_mtime, '', FOLDER_CATEGORY, depth + 1))
+                            elif entry.is_file():
+                                st = entry.stat()
+                                extension = file_suffix(entry.name)
+                                extension = extension_pool.setdefault(extension, extension)
+                                rows.append((child_key, False, st.st_size, st.st_mtime, extension,
+                                             extension_categories.get(extension, OTHER_CATEGORY), depth + 1))
+                                folder_bytes += st.st_size
+                                folder_files += 1
+                        except OSError as e:
+                            scan.errors.append((entry.path, str(e)))
+            except OSError as e:
+                scan.errors.append((path, str(e)))
+            if folder_files:
+                # Files are summed per folder first, so each folder costs one update per ancestor rather than each file
+                for ancestor in ancestors:
+                    totals = aggregates.get(ancestor)
+                    if totals is None:
+                        aggregates[ancestor] = [folder_bytes, folder_files]
+                    else:
+                        totals[0] += folder_bytes
+                        totals[1] += folder_files
+                scan.total_size += folder_bytes
+                scan.file_count += folder_files
+            if len(rows) * ROW_BYTES + len(aggregates) * AGGREGATE_BYTES >= memory_budget:
+                scan.entries += len(rows)
+                scan.spill(rows, aggregates)
+                rows, aggregates = [], {}
+            if progress is not None and time.monotonic() - last_report >= progress_interval:
+                last_report = time.monotonic()
+                progress(scan.entries + len(rows), scan.total_size, [])
+        if rows or not scan.entry_chunks:
+            scan.entries += len(rows)
+            scan.spill(rows, aggregates)
+        rows, aggregates = [], {}
+        if profile is not None:
+            profile.stop(walk, scan.entries, dirs_listed=dirs_listed, stat_calls=scan.entries, errors=len(scan.errors), chunks=len(scan.entry_chunks),
+                         spilled_mb=round(scan.spilled_bytes / (1024 ** 2), 1))
+            walk = profile.start('merge')
+        scan.compact()
+        if profile is not None:
+            profile.stop(walk, scan.entries, chunks=len(scan.entry_chunks), spilled_mb=round(scan.spilled_bytes / (1024 ** 2), 1))
+    except BaseException:
+        scan.close()
+        raise
+    scan.rule_hits = rules.report(hits) if rules is not None else []
+    if progress is not None:
+        progress(scan.entries, scan.total_size, [])
+    return scan
@@ -11,30 +11,29 @@ from io import BytesIO
 import zipfile
 import json
 import platform
+import sqlite3
+import uuid
+from scan_engine import CATEGORY_NAMES, DEFAULT_RULES, change_token, run_scan, scan_tree, get_folder_size
+from scan_rules import check_rules
+from snapshot_store import SnapshotStore
+from snapshot_diff import DIFF_STATUSES, diff_snapshots, in_gb
+from history_store import HistoryStore
+from scan_jobs import JobManager, SingleFlight
+from snapshot_cache import SnapshotCache, estimate_nbytes
+from mount_table import MountTable
+from snapshot_query import SORT_COLUMNS, GROUP_BY, query_entries, group_entries, tree_nodes
+from run_profile import RunProfile, report_path
+from live_watch import WatchRegistry, watch_key
+from size_estimate import SizeEstimator
+from io_scheduler import IOScheduler, parse_workers, resolve_workers
+from scan_checkpoint import ScanCheckpoint
+
+@st.cache_resource
+def get_mount_table():
+    return MountTable()
 
 def normalize_windows_path(path):
-    if not path: return path
-    if platform.system() == "Linux":
-        available_mounts = []
-        for drive in 'cdefghijklmnopqrstuvwxyz':
-            mount_path = f'/host/{drive}'
-            if os.path.exists(mount_path): available_mounts.append(drive.upper())
-        for drive_letter in 'cdefghijklmnopqrstuvwxyz':
-            drive_upper = drive_letter.upper()
-            if path.upper().startswith(f'{drive_upper}:'):
-                if drive_upper in available_mounts:
-                    normalized_path = path[3:].replace('\\', '/').replace('//', '/')
-                    return f'/host/{drive_letter}/{normalized_path}'
-                else: return None
-        if path.startswith('/host/'): return path
-    elif platform.system() == "Windows":
-        if path.endswith('\\') and len(path) == 2:
-            normalized = path.rstrip('\\')
-            if len(normalized) == 1: return normalized + ":\\"
-            return normalized
-        path = path.replace('\\\\', '\\')
-        if len(path) >= 2 and path[1] == ':' and len(path) == 2: path = path + "\\"
-    return path.strip()
+    return get_mount_table().normalize(path)
 
 def get_folder_name(path):
     if not path: return path
@@ -575,6 +574,244 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+@st.cache_resource
+def get_job_manager():
+    return JobManager()
+
+@st.cache_resource
+def get_snapshot_cache():
+    return SnapshotCache()
+
+@st.cache_resource
+def get_single_flight():
+    return SingleFlight()
+
+# Listing threads per scan ('auto' = the device's limit); every session's scans share one per-device scheduler
+SCAN_THREADS = parse_workers(os.environ['ANALYZER_SCAN_THREADS']) if os.environ.get('ANALYZER_SCAN_THREADS') else None
+
+@st.cache_resource
+def get_io_scheduler():
+    return IOScheduler.from_env()
+
+def store_snapshot(snapshot):
+    try: snapshot_path = snapshot_store.save(snapshot)
+    except OSError: snapshot_path = None
+    try: history_store.record(snapshot)
+    except (OSError, sqlite3.Error) as e: print(f"Scan history could not be recorded: {e}")
+    return snapshot_path
+
+def session_id():
+    return st.session_state.setdefault('session_id', uuid.uuid4().hex)
+
+def build_scan(scan_key, job=None, holder=None, snapshot_path=None):
+    folder_path, file_type_filter, search_filter, _, options = scan_key
+    profile = RunProfile(folder_path)
+    io = {'scheduler': get_io_scheduler(), 'workers': resolve_workers(SCAN_THREADS, get_io_scheduler(), folder_path)}
+    if snapshot_path is not None and os.path.exists(snapshot_path):
+        # Evicted from the shared cache: reload the stored snapshot instead of walking the disk again
+        with profile.phase('load') as record:
+            snapshot = snapshot_store.load(snapshot_path)
+            record['entries'] = len(snapshot)
+    elif options:
+        # Budget-limited or custom-rule scans see a different tree, so they neither join nor serve a shared full walk
+        snapshot = run_scan(folder_path, categories=analyzer.file_categories, progress=job.progress if job is not None else None,
+                             cancel=job.cancel_event if job is not None else None, profile=profile, **dict(options), **io)
+        snapshot_path = store_snapshot(snapshot)
+    else:
+        # Full walks checkpoint their progress, so a restarted container or a failed run continues where it stopped
+        snapshot, snapshot_path = get_single_flight().run(folder_path, lambda root, progress, cancel: run_scan(root, categories=analyzer.file_categories, progress=progress, cancel=cancel, profile=profile, checkpoint=ScanCheckpoint(root), **io), store_snapshot, job)
+    with profile.phase('filter', len(snapshot)):
+        files_data = analyzer.analyze_folder_contents(folder_path, list(file_type_filter) if file_type_filter else None, None, None, search_filter, snapshot=snapshot)
+    if profile.deep:
+        try: profile.save(report_path(folder_path))
+        except OSError as e: print(f"Run report could not be saved: {e}")
+    result = {'snapshot': snapshot, 'files_data': files_data, 'snapshot_path': snapshot_path, 'profile': profile}
+    return get_snapshot_cache().put(scan_key, result, estimate_nbytes(snapshot, files_data), holder)
+
+def scan_result(scan_key, holder=None, snapshot_path=None):
+    result = get_snapshot_cache().acquire(scan_key, holder)
+    return result if result is not None else build_scan(scan_key, holder=holder, snapshot_path=snapshot_path)
+
+def attach_result(scan_key, snapshot_path, root):
+    previous_key = st.session_state.get('scan_key')
+    if previous_key is not None and previous_key != scan_key: get_snapshot_cache().release(previous_key, session_id())
+    get_snapshot_cache().acquire(scan_key, session_id())
+    st.session_state.scan_key = scan_key
+    st.session_state.snapshot_path = snapshot_path
+    st.session_state.folder_path = root
+    st.session_state.analysis_complete = True
+
+def attach_job(job):
+    st.session_state.attached_job = job.id
+    if job.state != 'done': return
+    attach_result(job.key, job.result, job.root)
+
+def attach_cached(scan_key, root):
+    # Same folder, unchanged since a scan that finished in any session: the warm result is used instead of walking again
+    result = get_snapshot_cache().acquire(scan_key, session_id())
+    if result is None: return False
+    attach_result(scan_key, result['snapshot_path'], root)
+    st.session_state.scan_job_id = None
+    st.session_state.attached_job = None
+    st.query_params.pop('job', None)
+    return True
+
+@st.fragment(run_every=1.0)
+def scan_job_panel(job_id):
+    job = get_job_manager().get(job_id)
+    if job is None:
+        st.session_state.attached_job = job_id
+        st.warning("⚠️ Scan job is no longer available, please analyze again")
+        return
+    if job.done:
+        attach_job(job)
+        st.rerun()
+    st.subheader(f"⏳ Scanning: {job.root}")
+    col1, col2, col3, col4 = st.columns(4)
+    with col1: st.metric("📋 Entries", f"{job.entries:,}")
+    with col2: st.metric("💾 Size Found", f"{job.bytes / (1024 ** 3):.2f} GB")
+    with col3: st.metric("⏱️ Elapsed", f"{job.elapsed:.1f} s")
+    with col4: st.metric("⚡ Entries/s", f"{job.entries / job.elapsed:,.0f}" if job.elapsed > 0 else "-")
+    if job.largest:
+        st.markdown("**🏆 Largest files so far:**")
+        st.dataframe(pd.DataFrame([{'Path': path, 'Size (GB)': round(size / (1024 ** 3), 3)} for size, path in job.largest]), use_container_width=True, hide_index=True)
+    if st.button("⏹️ Cancel Scan", key=f"cancel_{job.id}"):
+        job.cancel()
+        st.info("⏹️ Cancelling...")
+
+@st.cache_resource
+def get_watch_registry():
+    return WatchRegistry()
+
+def follow_live_watch(scan_key, watch):
+    # Each applied batch becomes a new scan key, so every cached view below recomputes from the updated tree
+    folder_path, file_type_filter, search_filter, _, options = scan_key
+    # A copy: the watcher keeps changing its own tree in place while other sessions render this one from the cache
+    snapshot, version = watch.current()
+    files_data = analyzer.analyze_folder_contents(folder_path, list(file_type_filter) if file_type_filter else None, None, None, search_filter, snapshot=snapshot)
+    live_key = (folder_path, file_type_filter, search_filter, f"live-{id(watch)}-{version}", options)
+    get_snapshot_cache().put(live_key, {'snapshot': snapshot, 'files_data': files_data, 'snapshot_path': None, 'profile': RunProfile(folder_path)}, estimate_nbytes(snapshot, files_data), session_id())
+    get_snapshot_cache().release(scan_key, session_id())
+    st.session_state.scan_key = live_key
+    st.session_state.snapshot_path = None
+    st.session_state.live_version = (id(watch), version)
+
+def live_watch_key(root):
+    return watch_key(root, dict(st.session_state.scan_key[4]).get('rules', DEFAULT_RULES))
+
+@st.fragment(run_every=2.0)
+def live_watch_panel(root, snapshot):
+    key = live_watch_key(root)
+    watch = get_watch_registry().acquire(key, snapshot, session_id(), categories=analyzer.file_categories, rules=key[1])
+    stats = watch.stats()
+    st.caption(f"🔴 Live ({stats['mode']}): {stats['watches']:,} folders watched, {stats['unwatched']:,} polled, {stats['events']:,} events, "
+               f"{stats['batches']:,} updates, last change {datetime.fromtimestamp(stats['updated']).strftime('%H:%M:%S')}")
+    if stats['error']: st.warning(f"⚠️ {stats['error']}")
+    if st.session_state.get('live_version') != (id(watch), watch.version):
+        follow_live_watch(st.session_state.scan_key, watch)
+        st.rerun()
+
+ESTIMATE_BUDGET = 1.0
+
+def start_estimate(folder_path, active_extensions, search_filter, rules=DEFAULT_RULES):
+    # A first answer within the budget, then the job keeps refining towards exact sizes until it is stopped or done
+    cancel_estimate()
+    estimator = SizeEstimator(folder_path, rules=rules, categories=analyzer.file_categories).run(ESTIMATE_BUDGET)
+    job = get_job_manager().submit(('estimate', folder_path), folder_path, lambda job: estimator.run(cancel=job.cancel_event))
+    st.session_state.estimate = {'job_id': job.id, 'estimator': estimator, 'extensions': active_extensions, 'search': search_filter}
+
+def cancel_estimate():
+    estimate = st.session_state.pop('estimate', None)
+    if estimate is not None: get_job_manager().cancel(estimate['job_id'])
+
+@st.fragment(run_every=1.0)
+def estimate_panel(estimate):
+    estimator = estimate['estimator']
+    job = get_job_manager().get(estimate['job_id'])
+    stats = estimator.stats()
+    total, low, high = estimator.total()
+    st.subheader(f"⚡ Quick Estimate: {estimator.root}")
+    col1, col2, col3, col4 = st.columns(4)
+    with col1: st.metric("💾 Estimated Size", f"{total / (1024 ** 3):.2f} GB", f"{low / (1024 ** 3):.2f} - {high / (1024 ** 3):.2f} GB" if high != float('inf') else f"≥ {low / (1024 ** 3):.2f} GB", delta_color="off")
+    with col2: st.metric("✅ Exact Items", f"{stats['exact']} / {stats['children']}")
+    with col3: st.metric("📂 Folders Listed", f"{stats['listed']:,}")
+    with col4: st.metric("⏱️ Elapsed", f"{stats['elapsed']:.1f} s")
+    st.dataframe(pd.DataFrame(analyzer.estimate_rows(estimator, estimate['extensions'], None, None, estimate['search'])), use_container_width=True, hide_index=True)
+    if estimator.complete:
+        st.success("✅ Estimate refined to exact sizes")
+    elif job is not None and not job.done:
+        st.caption(f"🎲 {estimator.confidence:.0%} confidence intervals from {stats['probes']:,} random probes, refining towards exact sizes...")
+        if st.button("⏹️ Stop Refining", key=f"stop_{job.id}"): job.cancel()
+    else:
+        st.info("⏹️ Refining stopped, sizes not marked exact are estimates")
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def load_frame(scan_key):
+    return pd.DataFrame(scan_result(scan_key)['files_data'])
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def summary_metrics(scan_key):
+    df = load_frame(scan_key)
+    type_counts = df['Type'].value_counts() if not df.empty else pd.Series(dtype='int64')
+    files_df = df[df['Type'] == 'File'] if not df.empty else df
+    return {
+        'total_items': len(df),
+        'files_count': int(type_counts.get('File', 0)),
+        'folders_count': int(type_counts.get('Folder', 0)),
+        'error_count': int(type_counts.get('Error', 0)),
+        'total_size_gb': float(df.loc[df['Type'].isin(['File', 'Folder']), 'Size (GB)'].sum()) if not df.empty else 0.0,
+        'largest_file': files_df.loc[files_df['Size (GB)'].idxmax(), 'Name'] if not files_df.empty else 'None',
+        'smallest_file': files_df.loc[files_df['Size (GB)'].idxmin(), 'Name'] if not files_df.empty else 'None'
+    }
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def filter_frame(scan_key, type_filter, category_filter):
+    filtered_df = load_frame(scan_key)
+    if type_filter != "All": filtered_df = filtered_df[filtered_df['Type'] == type_filter]
+    if category_filter != "All" and 'Category' in filtered_df.columns: filtered_df = filtered_df[filtered_df['Category'] == category_filter]
+    return filtered_df
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def entry_page(scan_key, kind, category, search, sort, descending, offset, limit):
+    return query_entries(scan_result(scan_key)['snapshot'], kind, category, search, sort, descending, offset, limit)
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def entry_groups(scan_key, by, kind, category, search):
+    return group_entries(scan_result(scan_key)['snapshot'], by, kind, category, search)
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def tree_figure(scan_key, focus, depth, chart_kind):
+    nodes = tree_nodes(scan_result(scan_key)['snapshot'], focus, depth)
+    trace = go.Treemap if chart_kind == "Treemap" else go.Sunburst
+    fig = go.Figure(trace(ids=nodes['id'], parents=nodes['parent'], labels=nodes['label'], values=nodes['value'], branchvalues='total',
+                          customdata=nodes['value'] / (1024 ** 3), hovertemplate='<b>%{label}</b><br>%{customdata:.2f} GB<br>%{percentRoot:.1%} of view<extra></extra>'))
+    fig.update_layout(height=550, margin=dict(t=10, l=10, r=10, b=10))
+    return fig
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def chart_figures(scan_key):
+    df = load_frame(scan_key)
+    fig1 = fig2 = fig3 = None
+    # File types and the size histogram come from the rollups the scan already built, over the whole tree
+    rollups = scan_result(scan_key)['snapshot'].rollups
+    file_types = pd.DataFrame(rollups.extension_table(12))
+    if not file_types.empty:
+        file_types['extension'] = file_types['extension'].replace('', '(none)')
+        fig1 = px.pie(file_types, values='files', names='extension', title="📄 File Types (whole tree)")
+        fig1.update_layout(height=300)
+    histogram = pd.DataFrame(rollups.histogram())
+    if not histogram.empty:
+        histogram['GB'] = histogram['bytes'] / (1024 ** 3)
+        fig3 = px.bar(histogram, x='bin', y='files', hover_data=['GB'], title="📏 File Size Distribution")
+        fig3.update_layout(height=300)
+    if 'Size (GB)' in df.columns:
+        top_items = df.nlargest(10, 'Size (GB)')
+        if not top_items.empty:
+            fig2 = px.bar(top_items, x='Name', y='Size (GB)', title="📊 Top 10 Largest Items")
+            fig2.update_xaxes(tickangle=45)
+            fig2.update_layout(height=300)
+    return fig1, fig2, fig3
+
 class FileSizeAnalyzerWeb:
     def __init__(self):
         self.file_categories = {
@@ -624,14 +861,9 @@ class FileSizeAnalyzerWeb:
         }
     
     def get_folder_size(self, folder_path):
-        total_size = 0
-        try:
-            for item in Path(folder_path).rglob('*'):
-                if item.is_file(): total_size += item.stat().st_size
-        except PermissionError: pass
-        return total_size
+        return get_folder_size(folder_path)
     
-    def analyze_folder_contents(self, folder_path, file_type_filter=None, size_filter=None, date_filter=None, search_filter=None):
+    def analyze_folder_contents(self, folder_path, file_type_filter=None, size_filter=None, date_filter=None, search_filter=None, snapshot=None):
         files_data = []
         try:
             selected_path = Path(folder_path)
@@ -639,47 +871,54 @@ class FileSizeAnalyzerWeb:
                 return [{'Name': f'Hata: Klasör bulunamadı - {folder_path}', 'Type': 'Error', 'Size (GB)': 0, 'Extension': '❌', 'Full Path': folder_path, 'Category': 'Error'}]
             if not selected_path.is_dir():
                 return [{'Name': f'Hata: Bu bir klasör değil - {folder_path}', 'Type': 'Error', 'Size (GB)': 0, 'Extension': '❌', 'Full Path': folder_path, 'Category': 'Error'}]
-            system_folders = ['$RECYCLE.BIN', 'System Volume Information', 'RECYCLER', 'Thumbs.db']
-            folders, files = [], []
-            try:
-                for item in selected_path.iterdir():
-                    if item.is_dir():
-                        if item.name not in system_folders:
-                            if search_filter and search_filter.lower() not in item.name.lower(): continue
-                            folders.append(item)
-                    elif item.is_file():
-                        if item.name not in system_folders:
-                            if file_type_filter:
-                                file_extension = item.suffix.lower()
-                                if file_extension not in file_type_filter: continue
-                            if size_filter:
-                                size_bytes = item.stat().st_size
-                                size_gb = size_bytes / (1024 * 1024 * 1024)
-                                min_size, max_size = size_filter
-                                if not (min_size <= size_gb <= max_size): continue
-                            if date_filter:
-                                from datetime import datetime
-                                file_creation_time = datetime.fromtimestamp(item.stat().st_ctime)
-                                start_date, end_date = date_filter
-                                if not (start_date <= file_creation_time <= end_date): continue
-                            if search_filter and search_filter.lower() not in item.name.lower(): continue
-                            files.append(item)
-            except PermissionError:
+            if snapshot is None: snapshot = scan_tree(folder_path, categories=self.file_categories)
+            if any(path == snapshot.root for path, _ in snapshot.errors):
                 return [{'Name': f'Hata: Klasöre erişim izni yok - {folder_path}', 'Type': 'Error', 'Size (GB)': 0, 'Extension': '❌', 'Full Path': folder_path, 'Category': 'Error'}]
-            for folder in folders:
-                folder_size = self.get_folder_size(folder)
-                folder_size_mb = folder_size / (1024 * 1024)
-                folder_size_gb = folder_size_mb / 1024
-                files_data.append({'Name': folder.name, 'Type': 'Folder', 'Size (GB)': round(folder_size_gb, 2), 'Extension': '📁', 'Full Path': str(folder), 'Category': 'Folder'})
-            for file in files:
-                size_bytes = file.stat().st_size
-                size_mb = size_bytes / (1024 * 1024)
-                size_gb = size_mb / 1024
-                category = self.get_file_category(file.suffix.lower())
-                files_data.append({'Name': file.name, 'Type': 'File', 'Size (GB)': round(size_gb, 2), 'Extension': file.suffix.lower(), 'Full Path': str(file), 'Category': category})
+            folders, files = [], []
+            for index in snapshot.children(0):
+                name = snapshot.name[index]
+                if snapshot.is_dir[index]:
+                    if search_filter and search_filter.lower() not in name.lower(): continue
+                    folders.append(index)
+                else:
+                    if file_type_filter and snapshot.ext[index] not in file_type_filter: continue
+                    if size_filter:
+                        size_gb = snapshot.size[index] / (1024 * 1024 * 1024)
+                        min_size, max_size = size_filter
+                        if not (min_size <= size_gb <= max_size): continue
+                    if date_filter:
+                        file_creation_time = datetime.fromtimestamp(snapshot.ctime[index])
+                        start_date, end_date = date_filter
+                        if not (start_date <= file_creation_time <= end_date): continue
+                    if search_filter and search_filter.lower() not in name.lower(): continue
+                    files.append(index)
+            for index in folders:
+                folder_size_gb = snapshot.total[index] / (1024 * 1024 * 1024)
+                files_data.append({'Name': snapshot.name[index], 'Type': 'Folder', 'Size (GB)': round(folder_size_gb, 2), 'Extension': '📁', 'Full Path': snapshot.path_of(index), 'Category': 'Folder'})
+                if snapshot.partial is not None: files_data[-1]['Complete'] = not snapshot.incomplete[index]
+            for index in files:
+                size_gb = snapshot.size[index] / (1024 * 1024 * 1024)
+                extension = snapshot.ext[index]
+                category = self.get_file_category(extension)
+                files_data.append({'Name': snapshot.name[index], 'Type': 'File', 'Size (GB)': round(size_gb, 2), 'Extension': extension, 'Full Path': snapshot.path_of(index), 'Category': category})
             return files_data
         except Exception as e:
-            return [{'Name': f'Error: {str(e)}', 'Type': 'Error', 'Size (GB)': 0, 'Extension': '❌', 'Full Path': folder_path, 'Category': 'Error'}]
+            # Rows gathered before the failure are kept; the error is reported as one more row
+            return files_data + [{'Name': f'Error: {str(e)}', 'Type': 'Error', 'Size (GB)': 0, 'Extension': '❌', 'Full Path': folder_path, 'Category': 'Error'}]
+    
+    def estimate_rows(self, estimator, file_type_filter=None, size_filter=None, date_filter=None, search_filter=None):
+        # Same filters as a full analysis; sizes are sampled estimates with a confidence interval until a child is walked exactly
+        files_data = []
+        for row in estimator.estimates():
+            if search_filter and search_filter.lower() not in row['name'].lower(): continue
+            if not row['is_dir']:
+                if file_type_filter and row['extension'] not in file_type_filter: continue
+                if size_filter and not (size_filter[0] <= row['estimate'] / (1024 ** 3) <= size_filter[1]): continue
+                if date_filter and not (date_filter[0] <= datetime.fromtimestamp(row['ctime']) <= date_filter[1]): continue
+            files_data.append({'Name': row['name'], 'Type': 'Folder' if row['is_dir'] else 'File', 'Size (GB)': round(row['estimate'] / (1024 ** 3), 2),
+                               'Low (GB)': round(row['low'] / (1024 ** 3), 2), 'High (GB)': round(row['high'] / (1024 ** 3), 2) if row['high'] != float('inf') else None,
+                               'Exact': row['exact'], 'Extension': '📁' if row['is_dir'] else row['extension'], 'Full Path': row['path'], 'Category': row['category']})
+        return files_data
     
     def get_file_category(self, file_extension):
         for category, extensions in self.file_categories.items():
@@ -739,24 +978,15 @@ def main():
             else:
                 folder_path = st.text_input("Enter folder path:", placeholder="C:\\Users\\YourName\\Documents", help="Enter the full path of the folder to analyze")
             st.markdown("**🚀 Quick options:**")
-            available_drives = []
-            if platform.system() == "Linux":
-                for drive in 'cdefghijklmnopqrstuvwxyz':
-                    mount_path = f'/host/{drive}'
-                    if os.path.exists(mount_path): available_drives.append(drive.upper())
-            else:
-                import string
-                for letter in string.ascii_uppercase:
-                    drive_path = f"{letter}:\\"
-                    if os.path.exists(drive_path): available_drives.append(letter)
+            available_drives = get_mount_table().drives()
             if available_drives:
                 st.info(f"💡 Mevcut sürücüler: {', '.join(available_drives)}")
                 col1, col2, col3 = st.columns(3)
                 for i, drive in enumerate(available_drives[:3]):
                     with [col1, col2, col3][i]:
                         if st.button(f"💾 {drive}:", use_container_width=True):
-                            if platform.system() == "Linux": drive_path = f"/host/{drive.lower()}/"
-                            else: drive_path = f"{drive}:\\"
+                            drive_path = get_mount_table().drive_path(drive)
+                            if platform.system() == "Linux": drive_path = drive_path + "/"
                             st.session_state.suggested_path = drive_path
                             st.session_state.folder_path = drive_path
                             st.success(f"✅ Suggested path: {drive_path}")
@@ -799,31 +1029,24 @@ def main():
                                 if len(normalized_path) >= 3: st.write(f"- Third char: '{normalized_path[2]}'")
                         if platform.system() == "Linux":
                             st.write("**🐳 Docker Environment Check:**")
-                            docker_mounts = ['/host/c', '/host/d', '/host/e', '/host/f']
-                            available_mounts = []
-                            for mount in docker_mounts:
-                                if os.path.exists(mount): available_mounts.append(mount)
-                            st.write(f"- Available Docker mounts: {', '.join(available_mounts) if available_mounts else 'None'}")
+                            mounts = get_mount_table().info()
+                            mount_list = ', '.join(f"{mount['path']} ({mount['fs_type'] or 'dir'})" for mount in mounts.values())
+                            st.write(f"- Available Docker mounts: {mount_list if mounts else 'None'}")
+                            st.write(f"- Mount table age: {get_mount_table().age:.0f} s")
                             if normalized_path and normalized_path.startswith('/host/'):
                                 drive_part = normalized_path.split('/')[2] if len(normalized_path.split('/')) > 2 else ''
                                 if drive_part:
                                     st.write(f"- Checking Docker mount: /host/{drive_part}")
-                                    st.write(f"- Mount exists: {os.path.exists(f'/host/{drive_part}')}")
+                                    st.write(f"- Mount exists: {drive_part.upper() in mounts}")
                         elif platform.system() == "Windows" and normalized_path and len(normalized_path) >= 2:
                             if normalized_path[1] == ':':
                                 drive_letter = normalized_path[0].upper()
                                 st.write(f"**💾 Drive check:**")
                                 st.write(f"- Drive letter: {drive_letter}")
-                                st.write(f"- Drive exists (forward slash): {os.path.exists(drive_letter + ':/')}")
-                                backslash_path = drive_letter + ':\\'
-                                st.write(f"- Drive exists (backslash): {os.path.exists(backslash_path)}")
-                                import string
-                                available_drives = []
-                                for letter in string.ascii_uppercase:
-                                    drive_path_forward = f"{letter}:/"
-                                    drive_path_backslash = f"{letter}:\\"
-                                    if os.path.exists(drive_path_forward) or os.path.exists(drive_path_backslash): available_drives.append(letter)
-                                st.write(f"- Available drives: {', '.join(available_drives)}")
+                                mounts = get_mount_table().info()
+                                st.write(f"- Drive exists: {drive_letter in mounts}")
+                                if drive_letter in mounts: st.write(f"- Drive type: {mounts[drive_letter]['fs_type']}")
+                                st.write(f"- Available drives: {', '.join(mounts)}")
                 st.write(f"**Session state folder_path:** `{st.session_state.get('folder_path', 'None')}`")
                 st.write(f"**Session state suggested_path:** `{st.session_state.get('suggested_path', 'None')}`")
         else:
@@ -844,6 +1067,30 @@ def main():
             search_filter = st.text_input("Search term:", value=st.session_state.search_filter, placeholder="Enter file or folder name...", help="Search for files/folders by name")
             st.session_state.search_filter = search_filter
             search_filter = search_filter if search_filter.strip() else None
+        with st.expander("⏱️ Scan Limits"):
+            st.caption("Stop early on huge folders: the result is partial and folders that were not fully scanned are marked")
+            col1, col2, col3 = st.columns(3)
+            with col1: max_depth = st.number_input("Max depth:", min_value=0, value=0, help="Folders deeper than this are not opened (0 = unlimited)")
+            with col2: max_entries = st.number_input("Max entries:", min_value=0, value=0, step=100000, help="Stop opening folders after this many entries (0 = unlimited)")
+            with col3: time_budget = st.number_input("Time budget (s):", min_value=0.0, value=0.0, step=5.0, help="Stop opening folders after this many seconds (0 = unlimited)")
+        with st.expander("🚫 Exclusion Rules"):
+            st.caption("gitignore syntax, one rule per line: `node_modules/` skips that folder name anywhere, `/build` only directly under the folder, "
+                       "`*.tmp` matches files, `!keep.tmp` includes again; the last matching rule wins and excluded folders are never opened")
+            rules_text = st.text_area("Rules:", value='\n'.join(DEFAULT_RULES.lines), height=120, help="Default: system folders directly under the analyzed folder")
+        # Scan options are part of the cache key: () is a full scan with the default rules
+        rules, invalid_rules = check_rules(line.strip() for line in rules_text.splitlines() if line.strip() and not line.strip().startswith('#'))
+        rules = tuple(rules)
+        if invalid_rules: st.warning("⚠️ Invalid rules ignored: " + "; ".join(message.removeprefix('Invalid rule: ') for _, message in invalid_rules))
+        options = tuple((name, value) for name, value in [('max_depth', int(max_depth) or None), ('max_entries', int(max_entries) or None),
+                                                          ('time_budget', float(time_budget) or None)] if value is not None)
+        if rules != tuple(DEFAULT_RULES.lines): options += (('rules', rules),)
+        checkpoint_path = normalize_windows_path(st.session_state.get('folder_path') or folder_path) if st.session_state.get('folder_path') or folder_path else None
+        checkpoint_info = ScanCheckpoint(checkpoint_path).info() if checkpoint_path and not options and os.path.isdir(checkpoint_path) else None
+        resume_scan = True
+        if checkpoint_info:
+            st.info(f"♻️ An earlier scan of this folder stopped after {checkpoint_info['entries']:,} entries ({checkpoint_info['pending']:,} folders left, "
+                    f"saved {datetime.fromtimestamp(checkpoint_info['saved']).strftime('%Y-%m-%d %H:%M')})")
+            resume_scan = st.checkbox("Resume from checkpoint", value=True, help="Continue the interrupted scan instead of walking the folder again")
         
         col1, col2, col3 = st.columns([1, 2, 1])
         with col2:
@@ -855,16 +1102,8 @@ def main():
                     st.error("❌ Please enter a folder path!")
                 elif current_folder_path is None:
                     st.error("❌ Drive not found or not accessible!")
-                    available_drives = []
-                    if platform.system() == "Linux":
-                        for drive in 'cdefghijklmnopqrstuvwxyz':
-                            mount_path = f'/host/{drive}'
-                            if os.path.exists(mount_path): available_drives.append(drive.upper())
-                    else:
-                        import string
-                        for letter in string.ascii_uppercase:
-                            drive_path = f"{letter}:\\"
-                            if os.path.exists(drive_path): available_drives.append(letter)
+                    get_mount_table().refresh()
+                    available_drives = get_mount_table().drives()
                     if available_drives: st.info(f"💡 Mevcut sürücüler: {', '.join(available_drives)}")
                     else: st.info("💡 Hiçbir sürücü bulunamadı!")
                     if platform.system() == "Linux": st.info("💡 Docker: Sürücüler mount edilmemiş olabilir")
@@ -883,43 +1122,122 @@ def main():
                     st.info("💡 Please enter a folder path, not a file path")
                 else:
                     try:
-                        with st.spinner("📊 Analyzing folder contents..."):
-                            active_extensions = []
-                            for category in file_type_filter: active_extensions.extend(analyzer.file_categories[category])
-                            file_type_filter_to_use = active_extensions if active_extensions else None
-                            files_data = analyzer.analyze_folder_contents(current_folder_path, file_type_filter_to_use, None, None, search_filter)
-                            st.session_state.files_data = files_data
-                            st.session_state.folder_path = current_folder_path
-                            st.session_state.analysis_complete = True
-                        st.success("✅ Analysis completed!")
-                        if st.checkbox("🔧 Show debug info"):
-                            st.write("**Debug Information:**")
-                            st.write(f"- File type filter: {file_type_filter}")
-                            st.write(f"- Active extensions: {active_extensions}")
-                            st.write(f"- Total items found: {len(files_data)}")
-                            st.write(f"- Files: {len([item for item in files_data if item['Type'] == 'File'])}")
-                            st.write(f"- Folders: {len([item for item in files_data if item['Type'] == 'Folder'])}")
-                            st.write(f"- Errors: {len([item for item in files_data if item['Type'] == 'Error'])}")
+                        active_extensions = []
+                        for category in file_type_filter: active_extensions.extend(analyzer.file_categories[category])
+                        scan_key = (current_folder_path, tuple(active_extensions) or None, search_filter, change_token(current_folder_path), options)
+                        cancel_estimate()
+                        st.session_state.active_extensions = active_extensions
+                        if attach_cached(scan_key, current_folder_path):
+                            st.success("⚡ Served from the shared cache: this folder has not changed since its last scan")
+                        else:
+                            if not resume_scan: ScanCheckpoint(current_folder_path).clear()
+                            job = get_job_manager().submit(scan_key, current_folder_path, lambda job: build_scan(scan_key, job)['snapshot_path'])
+                            st.session_state.scan_job_id = job.id
+                            st.query_params['job'] = job.id
                     except PermissionError:
                         st.error("❌ You don't have permission to access this folder!")
                         st.info("💡 Try running as administrator or select a different folder")
                     except Exception as e:
                         st.error(f"❌ Error occurred during analysis: {str(e)}")
                         st.info("💡 Please try a different folder or restart the application")
+            if st.button("⚡ Quick Estimate", help="Sampled size estimate of each top-level item within a second, refined towards exact sizes while it runs", use_container_width=True):
+                current_folder_path = normalize_windows_path(st.session_state.get('folder_path') or folder_path)
+                if not current_folder_path or not os.path.isdir(current_folder_path):
+                    st.error(f"❌ Folder not found: {current_folder_path}")
+                else:
+                    active_extensions = [extension for category in file_type_filter for extension in analyzer.file_categories[category]]
+                    try: start_estimate(current_folder_path, active_extensions or None, search_filter, rules)
+                    except PermissionError: st.error("❌ You don't have permission to access this folder!")
+    
+    if st.session_state.get('estimate') is not None: estimate_panel(st.session_state.estimate)
+    
+    with st.expander("🛠️ Shared Cache (admin)"):
+        stats = get_snapshot_cache().stats()
+        col1, col2, col3, col4, col5 = st.columns(5)
+        with col1: st.metric("🗃️ Snapshots", stats['entries'], f"{stats['pinned']} in use", delta_color="off")
+        with col2: st.metric("💾 Memory", f"{stats['bytes'] / (1024 ** 2):.0f} MB", f"of {stats['max_bytes'] / (1024 ** 2):.0f} MB", delta_color="off")
+        with col3: st.metric("🎯 Hits", stats['hits'], f"{stats['hit_rate']:.0%} hit rate", delta_color="off")
+        with col4: st.metric("❌ Misses", stats['misses'])
+        with col5: st.metric("🧹 Evictions", stats['evictions'])
+        if stats['items']:
+            st.dataframe(pd.DataFrame([{
+                'Folder': item['key'][0], 'Size (MB)': round(item['nbytes'] / (1024 ** 2), 1), 'Hits': item['hits'], 'Sessions': item['refs'],
+                'Last Used': datetime.fromtimestamp(item['last_used']).strftime('%H:%M:%S')
+            } for item in stats['items']]), use_container_width=True, hide_index=True)
+        st.caption(f"🔗 Coalesced scans: {get_single_flight().coalesced} identical, {get_single_flight().sliced} subtree")
+        jobs = get_job_manager().jobs()
+        if jobs:
+            st.markdown("**⏳ Scan jobs**")
+            st.dataframe(pd.DataFrame([{'Job': job.id, 'Folder': job.root, 'State': job.state, 'Entries': job.entries, 'Elapsed (s)': round(job.elapsed, 1)} for job in reversed(jobs)]), use_container_width=True, hide_index=True)
+    
+    job_id = st.session_state.get('scan_job_id') or st.query_params.get('job')
+    if job_id and st.session_state.get('attached_job') != job_id:
+        st.session_state.scan_job_id = job_id
+        scan_job_panel(job_id)
+    elif job_id:
+        job = get_job_manager().get(job_id)
+        if job is not None and job.state == 'done':
+            st.success(f"✅ Analysis completed! ({job.entries:,} entries in {job.elapsed:.1f} s)")
+            if st.checkbox("🔧 Show debug info"):
+                metrics = summary_metrics(job.key)
+                st.write("**Debug Information:**")
+                st.write(f"- Active extensions: {st.session_state.get('active_extensions', [])}")
+                st.write(f"- Total items found: {metrics['total_items']}")
+                st.write(f"- Files: {metrics['files_count']}")
+                st.write(f"- Folders: {metrics['folders_count']}")
+                st.write(f"- Errors: {metrics['error_count']}")
+                result = scan_result(job.key, session_id(), st.session_state.get('snapshot_path'))
+                if result['snapshot'].rule_hits:
+                    st.markdown("**🚫 Exclusion rule hits:**")
+                    st.dataframe(pd.DataFrame(result['snapshot'].rule_hits), use_container_width=True, hide_index=True)
+                profile = result.get('profile')
+                if profile is not None and profile.phases:
+                    st.write(f"**⏱️ Run profile:** {profile.summary()}")
+                    st.dataframe(pd.DataFrame(profile.phases).drop(columns=['top_functions', 'rule_hits'], errors='ignore'), use_container_width=True, hide_index=True)
+                    for record in profile.phases:
+                        if record.get('top_functions'):
+                            st.markdown(f"**🔬 {record['phase']}: top functions (cProfile)**")
+                            st.dataframe(pd.DataFrame(record['top_functions']), use_container_width=True, hide_index=True)
+                    st.download_button("📥 Download Run Report (JSON)", profile.to_json(), file_name=f"run_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json", mime="application/json")
+        elif job is not None and job.state == 'cancelled':
+            st.warning("⏹️ Scan cancelled")
+        elif job is not None and job.state == 'failed':
+            if isinstance(job.error, PermissionError):
+                st.error("❌ You don't have permission to access this folder!")
+                st.info("💡 Try running as administrator or select a different folder")
+            else:
+                st.error(f"❌ Error occurred during analysis: {str(job.error)}")
+                st.info("💡 Please try a different folder or restart the application")
     
     if hasattr(st.session_state, 'analysis_complete') and st.session_state.analysis_complete:
-        files_data = st.session_state.get('files_data', [])
         folder_path = st.session_state.get('folder_path', 'Unknown')
+        scan_key = st.session_state.get('scan_key')
+        scan = scan_result(scan_key, session_id(), st.session_state.get('snapshot_path')) if scan_key is not None else None
+        files_data = scan['files_data'] if scan is not None else []
         if not files_data:
             st.warning("⚠️ Analiz verisi bulunamadı!")
             st.info("💡 Lütfen tekrar analiz yapın")
             return
         st.subheader("📊 Analysis Summary")
-        total_items = len(files_data)
-        files_count = len([item for item in files_data if item['Type'] == 'File'])
-        folders_count = len([item for item in files_data if item['Type'] == 'Folder'])
-        error_count = len([item for item in files_data if item['Type'] == 'Error'])
-        total_size_gb = sum(item['Size (GB)'] for item in files_data if item['Type'] in ['File', 'Folder'])
+        snapshot = scan['snapshot']
+        if snapshot.partial is not None:
+            reason = {'max_depth': "max depth", 'max_entries': "max entries", 'time_budget': "time budget"}[snapshot.partial]
+            st.warning(f"⚠️ Partial scan: stopped by the {reason} limit, {len(snapshot.unlisted):,} folders were not opened. "
+                       f"Sizes of folders marked incomplete are what was found so far.")
+        excluded = [hit for hit in snapshot.rule_hits if hit['action'] == 'exclude' and (hit['dirs'] or hit['files'])]
+        if excluded:
+            st.caption(f"🚫 Excluded by rules: {sum(hit['dirs'] for hit in excluded):,} folders (never opened), {sum(hit['files'] for hit in excluded):,} files")
+        if st.toggle("🔴 Live watch", key='live_watch', disabled=snapshot.partial is not None, help="Keep totals current as files change on disk (inotify on Linux, periodic rescan elsewhere)"):
+            live_watch_panel(scan['snapshot'].root, scan['snapshot'])
+        elif st.session_state.get('live_version') is not None:
+            get_watch_registry().release(live_watch_key(scan['snapshot'].root), session_id())
+            st.session_state.live_version = None
+        metrics = summary_metrics(scan_key)
+        total_items = metrics['total_items']
+        files_count = metrics['files_count']
+        folders_count = metrics['folders_count']
+        error_count = metrics['error_count']
+        total_size_gb = metrics['total_size_gb']
         col1, col2, col3, col4, col5 = st.columns(5)
         with col1: st.metric("📁 Total", total_items, help="Total number of items")
         with col2: st.metric("📄 Files", files_count, help="Number of files")
@@ -928,10 +1246,10 @@ def main():
         with col5: st.metric("💾 Size", f"{total_size_gb:.2f} GB", help="Total size in GB")
         st.markdown(f"""<div class="folder-info max-w-4xl mx-auto w-full"><strong>📁 Folder:</strong> {get_folder_name(folder_path)}<br><strong>📅 Date:</strong> {datetime.now().strftime('%d.%m.%Y %H:%M:%S')}</div>""", unsafe_allow_html=True)
         
-        tab1, tab2, tab3 = st.tabs(["📋 Data", "📈 Charts", "📄 Export"])
+        tab1, tab2, tab3, tab4, tab5 = st.tabs(["📋 Data", "📈 Charts", "📄 Export", "🔀 Compare", "📉 Trends"])
         with tab1:
             st.subheader("📋 File Analysis Data")
-            df = pd.DataFrame(files_data)
+            df = load_frame(scan_key)
             if df.empty:
                 st.warning("⚠️ Hiçbir dosya veya klasör bulunamadı!")
                 st.info("💡 Bu klasör boş olabilir veya erişim izniniz olmayabilir")
@@ -942,23 +1260,44 @@ def main():
                 st.error(f"❌ Eksik sütunlar: {', '.join(missing_columns)}")
                 st.info("💡 Analiz verilerinde sorun var")
                 return
-            col1, col2 = st.columns(2)
-            with col1: type_filter = st.selectbox("Filter by Type:", ["All", "File", "Folder", "Error"], help="Filter by item type")
-            with col2:
-                if 'Category' in df.columns:
-                    categories = list(set(df['Category'].unique()))
-                    category_filter = st.selectbox("Filter by Category:", ["All"] + categories, help="Filter by file category")
+            table_view = st.radio("View:", ["📋 Top level", "🗂️ All entries (paged)", "📊 Grouped"], horizontal=True, help="Paged and grouped views query the whole scanned tree on the server and only send the visible rows")
+            if table_view == "📋 Top level":
+                col1, col2 = st.columns(2)
+                with col1: type_filter = st.selectbox("Filter by Type:", ["All", "File", "Folder", "Error"], help="Filter by item type")
+                with col2:
+                    if 'Category' in df.columns:
+                        categories = list(set(df['Category'].unique()))
+                        category_filter = st.selectbox("Filter by Category:", ["All"] + categories, help="Filter by file category")
+                    else:
+                        category_filter = "All"
+                        st.info("ℹ️ Category filter not available")
+                filtered_df = filter_frame(scan_key, type_filter, category_filter)
+                if filtered_df.empty:
+                    st.warning("⚠️ Seçilen filtrelere uygun dosya/klasör bulunamadı!")
+                    st.info("💡 Farklı filtreler deneyin")
+                    return
+                st.dataframe(filtered_df[['Name', 'Type', 'Size (GB)', 'Extension']], use_container_width=True, hide_index=True, height=400)
+            else:
+                col1, col2, col3 = st.columns(3)
+                with col1: tree_type = st.selectbox("Filter by Type:", ["All", "File", "Folder"], key="tree_type", help="Filter by item type")
+                with col2: tree_category = st.selectbox("Filter by Category:", ["All"] + CATEGORY_NAMES, key="tree_category", help="Filter by file category")
+                with col3: tree_search = st.text_input("Name contains:", key="tree_search", help="Case-insensitive match on file and folder names").strip() or None
+                if table_view == "📊 Grouped":
+                    group_by = st.radio("Group by:", GROUP_BY, horizontal=True)
+                    groups = entry_groups(scan_key, group_by, tree_type, tree_category, tree_search)
+                    st.dataframe(groups, use_container_width=True, hide_index=True, height=400)
+                    st.caption(f"{groups['Entries'].sum():,} entries in {len(groups):,} groups • {groups['Size (GB)'].sum():.2f} GB")
                 else:
-                    category_filter = "All"
-                    st.info("ℹ️ Category filter not available")
-            filtered_df = df.copy()
-            if type_filter != "All": filtered_df = filtered_df[filtered_df['Type'] == type_filter]
-            if category_filter != "All" and 'Category' in filtered_df.columns: filtered_df = filtered_df[filtered_df['Category'] == category_filter]
-            if filtered_df.empty:
-                st.warning("⚠️ Seçilen filtrelere uygun dosya/klasör bulunamadı!")
-                st.info("💡 Farklı filtreler deneyin")
-                return
-            st.dataframe(filtered_df[['Name', 'Type', 'Size (GB)', 'Extension']], use_container_width=True, hide_index=True, height=400)
+                    col1, col2, col3 = st.columns(3)
+                    with col1: tree_sort = st.selectbox("Sort by:", list(SORT_COLUMNS), key="tree_sort")
+                    with col2: tree_order = st.selectbox("Order:", ["Descending", "Ascending"], key="tree_order")
+                    with col3: page_size = st.selectbox("Rows per page:", [50, 100, 500, 1000], index=1, key="tree_page_size")
+                    _, totals = entry_page(scan_key, tree_type, tree_category, tree_search, tree_sort, tree_order == "Descending", 0, 0)
+                    page_count = max((totals['count'] + page_size - 1) // page_size, 1)
+                    page = st.number_input(f"Page (of {page_count:,}):", min_value=1, max_value=page_count, value=1, key="tree_page")
+                    rows, totals = entry_page(scan_key, tree_type, tree_category, tree_search, tree_sort, tree_order == "Descending", (page - 1) * page_size, page_size)
+                    st.dataframe(rows, use_container_width=True, hide_index=True, height=400)
+                    st.caption(f"Showing {min((page - 1) * page_size + 1, totals['count']):,}-{min(page * page_size, totals['count']):,} of {totals['count']:,} • {totals['files']:,} files, {totals['folders']:,} folders • {totals['bytes'] / (1024 ** 3):.2f} GB")
         
         with tab2:
             st.subheader("📈 Analysis Charts")
@@ -970,27 +1309,44 @@ def main():
             if missing_columns:
                 st.error(f"❌ Grafik gösterilemiyor - eksik sütunlar: {', '.join(missing_columns)}")
                 return
+            fig1, fig2, fig3 = chart_figures(scan_key)
             col1, col2 = st.columns(2)
             with col1:
-                files_df = df[df['Type'] == 'File']
-                if not files_df.empty and 'Extension' in files_df.columns:
-                    file_types = files_df['Extension'].value_counts()
-                    if len(file_types) > 0:
-                        fig1 = px.pie(values=file_types.values, names=file_types.index, title="📄 File Types")
-                        fig1.update_layout(height=300)
-                        st.plotly_chart(fig1, use_container_width=True)
-                    else: st.info("ℹ️ Dosya türü grafiği gösterilemiyor")
+                if fig1 is not None: st.plotly_chart(fig1, use_container_width=True)
                 else: st.info("ℹ️ Dosya bulunamadı")
             with col2:
-                if 'Size (GB)' in df.columns:
-                    top_items = df.nlargest(10, 'Size (GB)')
-                    if not top_items.empty:
-                        fig2 = px.bar(top_items, x='Name', y='Size (GB)', title="📊 Top 10 Largest Items")
-                        fig2.update_xaxes(tickangle=45)
-                        fig2.update_layout(height=300)
-                        st.plotly_chart(fig2, use_container_width=True)
-                    else: st.info("ℹ️ Boyut grafiği gösterilemiyor")
+                if fig2 is not None: st.plotly_chart(fig2, use_container_width=True)
                 else: st.info("ℹ️ Boyut bilgisi bulunamadı")
+            if fig3 is not None:
+                col1, col2 = st.columns(2)
+                with col1: st.plotly_chart(fig3, use_container_width=True)
+                with col2:
+                    categories = pd.DataFrame(scan['snapshot'].rollups.categories(0))
+                    categories['Size (GB)'] = (categories.pop('bytes') / (1024 ** 3)).round(3)
+                    categories['On disk (GB)'] = (categories.pop('allocated') / (1024 ** 3)).round(3)
+                    st.markdown("**🗂️ Categories (whole tree)**")
+                    st.dataframe(categories.rename(columns={'category': 'Category', 'files': 'Files'}), use_container_width=True, hide_index=True)
+            st.markdown("**🌳 Space by Folder**")
+            snapshot = scan['snapshot']
+            if st.session_state.get('tree_scan') != scan_key:
+                st.session_state.tree_scan = scan_key
+                st.session_state.tree_focus = 0
+            focus = st.session_state.tree_focus
+            col1, col2, col3 = st.columns([1, 1, 2])
+            with col1: chart_kind = st.radio("Chart:", ["Treemap", "Sunburst"], horizontal=True)
+            with col2: tree_depth = st.slider("Levels:", min_value=1, max_value=6, value=3, help="Folder levels drawn below the focused folder; small items are grouped as 'other'")
+            with col3:
+                subfolders = [index for index in snapshot.children(focus) if snapshot.is_dir[index]]
+                subfolders = sorted(subfolders, key=lambda index: snapshot.total[index], reverse=True)[:100]
+                drill = st.selectbox("Drill into:", [None] + subfolders, format_func=lambda index: "—" if index is None else f"📂 {snapshot.name[index]} ({snapshot.total[index] / (1024 ** 3):.2f} GB)", key=f"tree_drill_{focus}")
+                if drill is not None:
+                    st.session_state.tree_focus = int(drill)
+                    st.rerun()
+            st.caption(f"📍 {snapshot.path_of(focus)}")
+            if focus != 0 and st.button("⬆️ Up one level"):
+                st.session_state.tree_focus = int(snapshot.parent[focus])
+                st.rerun()
+            st.plotly_chart(tree_figure(scan_key, focus, tree_depth, chart_kind), use_container_width=True)
         
         with tab3:
             st.subheader("📄 Export Options")
@@ -1007,7 +1363,8 @@ def main():
             with col1:
                 if st.button("📊 Excel", help="Export data to Excel format"):
                     if not df.empty:
-                        df_export = pd.DataFrame(files_data)
+                        export = scan['profile'].start('export_excel')
+                        df_export = load_frame(scan_key)
                         output = BytesIO()
                         with pd.ExcelWriter(output, engine='openpyxl') as writer:
                             from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
@@ -1093,8 +1450,7 @@ def main():
                                 'Metric': ['Total Items', 'File Count', 'Folder Count', 'Error Count', 'Total Size (GB)', 'Largest File', 'Smallest File', 'Average File Size (GB)', 'Analyzed Folders'],
                                 'Value': [
                                     total_items, files_count, folders_count, error_count, round(total_size_gb, 2),
-                                    max([item for item in files_data if item['Type'] == 'File'], key=lambda x: x['Size (GB)'])['Name'] if files_count > 0 else 'None',
-                                    min([item for item in files_data if item['Type'] == 'File'], key=lambda x: x['Size (GB)'])['Name'] if files_count > 0 else 'None',
+                                    metrics['largest_file'], metrics['smallest_file'],
                                     round(total_size_gb / files_count, 2) if files_count > 0 else 0, len(df_export['Name'].unique())
                                 ]
                             }
@@ -1181,16 +1537,19 @@ def main():
                             if 'Sheet' in workbook.sheetnames: workbook.remove(workbook['Sheet'])
                         
                         output.seek(0)
+                        scan['profile'].stop(export, len(df_export))
                         st.download_button(label="📥 Download Excel File", data=output.getvalue(), file_name=f"detailed_file_analysis_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx", mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
             with col2:
                 if st.button("📄 CSV", help="Export data to CSV format"):
                     if len(files_data) > 0:
-                        df_export = pd.DataFrame(files_data)
-                        csv = df_export.to_csv(index=False)
+                        with scan['profile'].phase('export_csv', len(files_data)):
+                            df_export = load_frame(scan_key)
+                            csv = df_export.to_csv(index=False)
                         st.download_button(label="📥 Download CSV File", data=csv, file_name=f"file_analysis_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv", mime="text/csv")
             with col3:
                 if st.button("📊 Package", help="Export data package with charts"):
                     if len(files_data) > 0:
+                        export = scan['profile'].start('export_package')
                         zip_buffer = BytesIO()
                         with zipfile.ZipFile(zip_buffer, 'w') as zip_file:
                             json_data = json.dumps(files_data, indent=2, default=str)
@@ -1206,7 +1565,80 @@ Errors: {error_count}
 Total Size: {total_size_gb:.2f} GB"""
                             zip_file.writestr('summary.txt', summary_text)
                         zip_buffer.seek(0)
+                        scan['profile'].stop(export, len(files_data))
                         st.download_button(label="📥 Download Data Package", data=zip_buffer.getvalue(), file_name=f"file_analysis_package_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip", mime="application/zip")
+        
+        with tab5:
+            st.subheader("📉 Growth Trends")
+            snapshot = scan['snapshot']
+            scans = history_store.scans(snapshot.root) if snapshot is not None else []
+            if len(scans) < 2:
+                st.info("ℹ️ Trends appear after this folder has been analyzed at least twice")
+            else:
+                col1, col2 = st.columns([1, 3])
+                with col1: last_n = st.number_input("Last scans:", min_value=2, max_value=90, value=min(90, len(scans)), help="Number of most recent scans to include")
+                category_series = history_store.category_series(snapshot.root, last_n)
+                if not category_series.empty:
+                    category_series['Size (GB)'] = category_series['Size'] / (1024 ** 3)
+                    category_chart = category_series.pivot_table(index='Date', columns='Category', values='Size (GB)', fill_value=0).reset_index().melt(id_vars='Date', value_name='Size (GB)')
+                    fig = px.area(category_chart, x='Date', y='Size (GB)', color='Category', title="🗂️ Size by Category")
+                    fig.update_layout(height=350)
+                    st.plotly_chart(fig, use_container_width=True)
+                folder_options = ['.'] + sorted(snapshot.name[index] for index in snapshot.children(0) if snapshot.is_dir[index])
+                trend_folder = st.selectbox("Folder:", folder_options, help="Folder to chart over time ('.' is the analyzed folder itself)")
+                folder_series = history_store.folder_series(snapshot.root, trend_folder, last_n)
+                if not folder_series.empty:
+                    folder_series['Size (GB)'] = folder_series['Size'] / (1024 ** 3)
+                    fig = px.line(folder_series, x='Date', y='Size (GB)', markers=True, title=f"📂 {trend_folder} over time")
+                    fig.update_layout(height=300)
+                    st.plotly_chart(fig, use_container_width=True)
+                st.markdown("**🚀 Fastest-growing folders**")
+                max_depth = st.number_input("Max folder depth:", min_value=1, max_value=20, value=3, help="Only report folders up to this depth below the analyzed folder")
+                growing = history_store.fastest_growing(snapshot.root, last_n, max_depth=max_depth, limit=50)
+                st.dataframe(in_gb(growing, columns=('Start Size', 'End Size', 'Growth', 'Growth per Day')), use_container_width=True, hide_index=True, height=350)
+                st.download_button(label="📥 Download Growth Report", data=growing.to_csv(index=False), file_name=f"growth_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv", mime="text/csv")
+        
+        with tab4:
+            st.subheader("🔀 Compare With Earlier Scan")
+            snapshot = scan['snapshot']
+            if snapshot is None:
+                st.info("ℹ️ Run the analysis to record a snapshot for comparison")
+                return
+            previous = [meta for meta in snapshot_store.list_snapshots(snapshot.root) if meta['path'] != st.session_state.get('snapshot_path')]
+            if not previous:
+                st.info("ℹ️ No earlier snapshot of this folder yet - analyze it again later to see what changed")
+                return
+            options = {f"{datetime.fromtimestamp(meta['created']).strftime('%d.%m.%Y %H:%M:%S')} - {meta['entries']} entries, {meta['total_size'] / (1024 ** 3):.2f} GB{' (partial)' if meta.get('partial') else ''}": meta['path'] for meta in previous}
+            col1, col2 = st.columns([3, 1])
+            with col1: baseline_label = st.selectbox("Compare with:", list(options), help="Earlier snapshot of the same folder")
+            with col2: rollup_depth = st.number_input("Folder depth:", min_value=1, max_value=10, value=1, help="Depth at which changes are rolled up per folder")
+            # Live updates keep the stored snapshot path, so the live version decides when the diff is recomputed
+            diff_key = (options[baseline_label], st.session_state.get('snapshot_path'), st.session_state.get('live_version'), rollup_depth)
+            if st.session_state.get('diff_key') != diff_key:
+                with st.spinner("🔀 Comparing snapshots..."):
+                    st.session_state.diff_result = diff_snapshots(snapshot_store.load(options[baseline_label]), snapshot, rollup_depth)
+                    st.session_state.diff_key = diff_key
+            diff = st.session_state.diff_result
+            summary = diff.summary()
+            col1, col2, col3, col4, col5 = st.columns(5)
+            with col1: st.metric("📊 Net Change", f"{diff.net_delta / (1024 ** 3):+.2f} GB")
+            with col2: st.metric("🆕 Added", summary['Added']['count'], f"{summary['Added']['bytes'] / (1024 ** 3):+.2f} GB")
+            with col3: st.metric("🗑️ Removed", summary['Removed']['count'], f"{summary['Removed']['bytes'] / (1024 ** 3):+.2f} GB")
+            with col4: st.metric("📈 Grown", summary['Grown']['count'], f"{summary['Grown']['bytes'] / (1024 ** 3):+.2f} GB")
+            with col5: st.metric("📉 Shrunk", summary['Shrunk']['count'], f"{summary['Shrunk']['bytes'] / (1024 ** 3):+.2f} GB")
+            if diff.unknown: st.warning(f"⚠️ {len(diff.unknown):,} folders were not opened by a partial scan and are left out of the comparison: " + ", ".join(f"`{path}`" for path in diff.unknown[:10]) + (" …" if len(diff.unknown) > 10 else ""))
+            col1, col2 = st.columns(2)
+            with col1:
+                st.markdown("**📂 Changes by folder**")
+                st.dataframe(in_gb(diff.by_folder.head(200)), use_container_width=True, hide_index=True, height=300)
+            with col2:
+                st.markdown("**🗂️ Changes by category**")
+                st.dataframe(in_gb(diff.by_category), use_container_width=True, hide_index=True, height=300)
+            status_filter = st.selectbox("Show entries:", ["All"] + DIFF_STATUSES)
+            top_entries = diff.top(None if status_filter == "All" else status_filter, n=500)
+            st.dataframe(in_gb(top_entries), use_container_width=True, hide_index=True, height=400)
  
 analyzer = FileSizeAnalyzerWeb()
+snapshot_store = SnapshotStore()
+history_store = HistoryStore()
 if __name__ == "__main__": main() 
\ No newline at end of file
@@ -0,0 +1,36 @@
+import os
+
+import pytest
+
+from scan_engine import scan_tree
+from snapshot_diff import diff_snapshots
+
+
+@pytest.fixture
+def tree(tmp_path):
+    for folder in ('a/x', 'a/y', 'b', 'c/z'):
+        os.makedirs(tmp_path / folder)
+        for number in range(5):
+            (tmp_path / folder / f'f{number}.txt').write_bytes(b'x' * (100 * number + 1))
+    return tmp_path
+
+
+def test_partial_scan_of_unchanged_tree_reports_no_changes(tree):
+    full = scan_tree(str(tree))
+    partial = scan_tree(str(tree), max_entries=3)
+    assert partial.partial == 'max_entries'
+    for old, new in ((full, partial), (partial, full)):
+        diff = diff_snapshots(old, new)
+        assert diff.entries.empty
+        assert diff.net_delta == 0
+        assert diff.unknown == ['a', 'b', 'c']
+
+
+def test_depth_limited_scan_still_reports_changes_it_saw(tree):
+    old = scan_tree(str(tree), max_depth=1)
+    (tree / 'new.bin').write_bytes(b'y' * 50)
+    (tree / 'a' / 'x' / 'f0.txt').write_bytes(b'x' * 1000)
+    diff = diff_snapshots(old, scan_tree(str(tree)))
+    assert diff.entries['Path'].tolist() == ['new.bin']
+    assert diff.net_delta == 50
+    assert diff.unknown == ['a', 'b', 'c']
@@ -0,0 +1,203 @@
+import tkinter as tk
+from datetime import datetime
+from tkinter import ttk
+
+import numpy as np
+
+# Rows inserted per folder at a time: a Treeview slows down with every item it holds, so a folder with 100k
+# files shows its first page in the current order and a "more" row that loads the next one
+PAGE_SIZE = 500
+# Heading -> (Snapshot column, default descending)
+SORT_COLUMNS = {'#0': ('name', False), 'size': ('total', True), 'files': ('file_count', True), 'modified': ('mtime', True)}
+HEADINGS = {'#0': 'Name', 'size': 'Size', 'share': '%', 'files': 'Files', 'modified': 'Modified'}
+
+
+def format_size(size):
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == 'B' else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.2f} TB"
+
+
+def sorted_children(snapshot, index, column='total', descending=True):
+    # Order of one folder's children from the snapshot columns; nothing is read from disk
+    children = snapshot.children(index)
+    if column == 'name':
+        names = snapshot.name[children]
+        order = np.array(sorted(range(len(children)), key=lambda position: names[position].lower()), dtype=np.int64)
+    else:
+        order = np.argsort(getattr(snapshot, column)[children], kind='stable')
+    return children[order[::-1] if descending else order]
+
+
+class SnapshotExplorer(tk.Frame):
+    # Tree of an in-memory snapshot. Only opened folders have rows, inserted a page at a time in the current sort order,
+    # so the widget holds a few thousand items however large the scan. Double-click drills into a folder, ⬆️ goes back up.
+    def __init__(self, master, colors, height=14):
+        super().__init__(master, bg=colors['bg'])
+        self.colors = colors
+        self.snapshot = None
+        self.focus_index = 0
+        self.sort = 'size'
+        self.descending = True
+        # folder index -> (sorted children, rows inserted so far)
+        self.loaded = {}
+        self.grid_columnconfigure(1, weight=1)
+        self.grid_rowconfigure(1, weight=1)
+        self.up_button = tk.Button(self, text="⬆️ Up", command=self.go_up, font=("Segoe UI", 9, "bold"), bg=colors['secondary_bg'], fg=colors['fg'],
+                                   relief='flat', padx=8, cursor='hand2', state='disabled', activebackground=colors['border'], activeforeground=colors['fg'])
+        self.up_button.grid(row=0, column=0, padx=(0, 6), pady=(0, 4), sticky="w")
+        self.path_label = tk.Label(self, text="", font=("Segoe UI", 9), bg=colors['bg'], fg=colors['text_secondary'], anchor='w')
+        self.path_label.grid(row=0, column=1, columnspan=2, pady=(0, 4), sticky="ew")
+        self.tree = ttk.Treeview(self, columns=('size', 'share', 'files', 'modified'), height=height, selectmode='browse')
+        for column, width, anchor in (('#0', 280, 'w'), ('size', 90, 'e'), ('share', 55, 'e'), ('files', 80, 'e'), ('modified', 125, 'w')):
+            self.tree.column(column, width=width, minwidth=40, anchor=anchor, stretch=column == '#0')
+            if column in SORT_COLUMNS:
+                self.tree.heading(column, text=HEADINGS[column], anchor=anchor, command=lambda column=column: self.sort_by(column))
+            else:
+                self.tree.heading(column, text=HEADINGS[column], anchor=anchor)
+        self.tree.tag_configure('incomplete', foreground=colors['warning'])
+        self.tree.tag_configure('more', foreground=colors['accent'])
+        y_scrollbar = ttk.Scrollbar(self, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=y_scrollbar.set)
+        self.tree.grid(row=1, column=0, columnspan=2, sticky="nsew")
+        y_scrollbar.grid(row=1, column=2, sticky="ns")
+        self.tree.bind('<<TreeviewOpen>>', self.on_open)
+        self.tree.bind('<<TreeviewSelect>>', self.on_select)
+        self.tree.bind('<Double-1>', self.on_double_click)
+        self.update_headings()
+
+    def load(self, snapshot):
+        # A new scan starts at its root; a refreshed snapshot of the same root (live watch) keeps the view
+        if self.snapshot is not None and snapshot is not None and snapshot.root == self.snapshot.root:
+            self.rebuild(snapshot)
+            return
+        self.snapshot = snapshot
+        self.focus_index = 0
+        self.show()
+
+    def show(self, reopen=(), select=None):
+        self.tree.delete(*self.tree.get_children())
+        self.loaded = {}
+        snapshot = self.snapshot
+        if snapshot is None:
+            self.path_label.config(text="")
+            self.up_button.config(state='disabled')
+            return
+        index = self.focus_index
+        self.path_label.config(text=f"📂 {snapshot.path_of(index)}  —  {format_size(int(snapshot.total[index]))}, "
+                                    f"{int(snapshot.file_count[index]):,} files, {len(snapshot.children(index)):,} items")
+        self.up_button.config(state='normal' if index != 0 else 'disabled')
+        self.populate(index, '')
+        # Parents were opened before their children, so each folder to reopen already has its row
+        for folder in reopen:
+            if self.tree.exists(str(folder)):
+                self.tree.item(str(folder), open=True)
+                self.expand(folder)
+        if select is not None and self.tree.exists(str(select)):
+            self.tree.selection_set(str(select))
+            self.tree.see(str(select))
+
+    def populate(self, index, item):
+        column, _ = SORT_COLUMNS[self.sort]
+        self.loaded[index] = (sorted_children(self.snapshot, index, column, self.descending), 0)
+        self.insert_page(index, item)
+
+    def insert_page(self, index, item):
+        snapshot = self.snapshot
+        order, shown = self.loaded[index]
+        page = order[shown:shown + PAGE_SIZE]
+        parent_total = max(int(snapshot.total[index]), 1)
+        incomplete = snapshot.incomplete if snapshot.partial is not None else None
+        names, is_dir, totals, files, mtimes = snapshot.name, snapshot.is_dir, snapshot.total, snapshot.file_count, snapshot.mtime
+        more = f'+{index}'
+        if self.tree.exists(more):
+            self.tree.delete(more)
+        for child in page.tolist():
+            directory = bool(is_dir[child])
+            total = int(totals[child])
+            values = (format_size(total), f"{total * 100 / parent_total:.1f}", f"{int(files[child]):,}" if directory else '',
+                      datetime.fromtimestamp(mtimes[child]).strftime('%Y-%m-%d %H:%M'))
+            tags = ('incomplete',) if incomplete is not None and incomplete[child] else ()
+            self.tree.insert(item, 'end', iid=str(child), text=('📁 ' if directory else '📄 ') + names[child], values=values, tags=tags)
+            if directory and len(snapshot.children(child)):
+                # Placeholder so the folder gets an expander; its rows are inserted when it is first opened
+                self.tree.insert(str(child), 'end', iid=f'~{child}', text='…')
+        shown += len(page)
+        self.loaded[index] = (order, shown)
+        if shown < len(order):
+            self.tree.insert(item, 'end', iid=more, text=f"⋯ {len(order) - shown:,} more (click to load)", tags=('more',))
+
+    def expand(self, index):
+        placeholder = f'~{index}'
+        if self.tree.exists(placeholder):
+            self.tree.delete(placeholder)
+            self.populate(index, str(index))
+
+    def on_open(self, event=None):
+        item = self.tree.focus()
+        if item and item[0].isdigit():
+            self.expand(int(item))
+
+    def on_select(self, event=None):
+        selection = self.tree.selection()
+        if selection and selection[0].startswith('+'):
+            index = int(selection[0][1:])
+            self.tree.selection_remove(selection[0])
+            self.insert_page(index, str(index) if index != self.focus_index else '')
+
+    def on_double_click(self, event):
+        item = self.tree.identify_row(event.y)
+        if item and item[0].isdigit() and self.snapshot.is_dir[int(item)]:
+            self.drill(int(item))
+            return 'break'
+
+    def drill(self, index):
+        # Re-roots the view at a folder of the same snapshot: no rescan, the rows come from the columns already in memory
+        self.focus_index = index
+        self.show()
+
+    def go_up(self):
+        if self.snapshot is not None and self.focus_index != 0:
+            previous = self.focus_index
+            self.focus_index = int(self.snapshot.parent[previous])
+            self.show(select=previous)
+
+    def open_folders(self):
+        return [index for index in self.loaded if index != self.focus_index and self.tree.exists(str(index)) and self.tree.item(str(index), 'open')]
+
+    def rebuild(self, snapshot=None):
+        # Same folders open and selected after a re-sort or a refreshed snapshot. Indices of a refreshed snapshot can
+        # differ, so open folders are carried over by their path key.
+        selection = self.tree.selection()
+        select = int(selection[0]) if selection and selection[0].isdigit() else None
+        reopen = self.open_folders()
+        if snapshot is not None and snapshot is not self.snapshot:
+            keys = self.snapshot.key
+            mapped = [self.find_key(snapshot, keys[index]) for index in [self.focus_index] + reopen + ([select] if select is not None else [])]
+            self.snapshot = snapshot
+            self.focus_index = mapped[0] if mapped[0] is not None else 0
+            reopen = [index for index in mapped[1:len(reopen) + 1] if index is not None]
+            select = mapped[-1] if select is not None else None
+        self.show(reopen, select)
+
+    @staticmethod
+    def find_key(snapshot, key):
+        matches = np.flatnonzero(snapshot.key == key)
+        return int(matches[0]) if len(matches) else None
+
+    def sort_by(self, column):
+        if column == self.sort:
+            self.descending = not self.descending
+        else:
+            self.sort = column
+            self.descending = SORT_COLUMNS[column][1]
+        self.update_headings()
+        if self.snapshot is not None:
+            self.rebuild()
+
+    def update_headings(self):
+        for column in SORT_COLUMNS:
+            arrow = (' ▼' if self.descending else ' ▲') if column == self.sort else ''
+            self.tree.heading(column, text=HEADINGS[column] + arrow)